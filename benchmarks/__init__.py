@@ -0,0 +1 @@
+# Benchmarks for the ML pipeline 
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Compare the original nested-loop correlation pruning with the vectorized one.
+
+Usage:
+    python -m benchmarks.correlation_pruning [--rows 2000] [--features 500 2000 8000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.normalization import correlated_columns
+
+def legacy_correlated_columns(df, cutoff=0.5):
+    """The loop normalization.process used before: pandas .corr() + iloc."""
+    cor_matrix = df.corr()
+    to_drop = set()
+    for i in range(len(cor_matrix.columns)):
+        for j in range(i):
+            if abs(cor_matrix.iloc[i, j]) > cutoff:
+                to_drop.add(cor_matrix.columns[i])
+    return to_drop
+
+def synthetic_descriptors(n_rows, n_features, seed=0):
+    """Descriptor-like matrix: noisy copies of shared latent factors, scaled to [0, 1]."""
+    rng = np.random.default_rng(seed)
+    n_factors = max(1, n_features // 10)
+    latent = rng.standard_normal((n_rows, n_factors))
+    noise = rng.uniform(0.3, 3.0, n_features)
+    data = latent[:, rng.integers(0, n_factors, n_features)] + noise * rng.standard_normal((n_rows, n_features))
+    data -= data.min(axis=0)
+    data /= data.max(axis=0)
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--features', type=int, nargs='+', default=[500, 2000, 8000])
+    parser.add_argument('--cutoff', type=float, default=0.5)
+    parser.add_argument('--legacy-max-features', type=int, default=2000,
+                        help='Skip the legacy loop above this many features (it is O(p^2) in Python)')
+    args = parser.parse_args()
+
+    print(f"{'p':>6} {'legacy s':>10} {'float64 s':>10} {'float32 s':>10} {'dropped':>8}  same drop set")
+    for p in args.features:
+        data = synthetic_descriptors(args.rows, p)
+        columns = [f'f{k}' for k in range(p)]
+
+        start = time.perf_counter()
+        drop64 = correlated_columns(data, args.cutoff)
+        t64 = time.perf_counter() - start
+
+        start = time.perf_counter()
+        drop32 = correlated_columns(data, args.cutoff, dtype=np.float32)
+        t32 = time.perf_counter() - start
+
+        new_set = {columns[k] for k in np.flatnonzero(drop64)}
+        same32 = np.array_equal(drop64, drop32)
+        if p <= args.legacy_max_features:
+            start = time.perf_counter()
+            legacy_set = legacy_correlated_columns(pd.DataFrame(data, columns=columns), args.cutoff)
+            legacy_time = f"{time.perf_counter() - start:10.2f}"
+            same = 'yes' if legacy_set == new_set else f"no ({len(legacy_set ^ new_set)} differ)"
+        else:
+            legacy_time = f"{'skipped':>10}"
+            same = '-'
+        print(f"{p:>6} {legacy_time} {t64:10.2f} {t32:10.2f} {len(new_set):>8}  "
+              f"{same} (float32 {'same' if same32 else 'differs'})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Time every create-model and predict stage on synthetic data.
+
+For each dataset size, synthetic DataWarrior/GOLD files are generated
+(see benchmarks.synthetic) and the stages run one after another, each in a
+fresh process so its peak RSS is its own: prepare_files, pre_treatment,
+normalization, train_models and predict_compounds (raw descriptors scored
+through the fitted preprocessing). Stage outputs are handed over through
+files in a scratch directory and are not part of the timings.
+
+Results (wall time, peak RSS, rows and rows/sec per stage, plus the commit,
+machine and library versions) are written as JSON. With --compare, the wall
+times are printed next to those of an earlier results file.
+
+Everything runs offline on the CPU.
+
+Usage:
+    python -m benchmarks.pipeline_stages [--sizes 2000x200 20000x500] [--active-fraction 0.1]
+        [--predict-rows 100000] [--max-fits 10] [--resampling smote] [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from benchmarks import synthetic
+
+STAGES = ['prepare_files', 'pre_treatment', 'normalization', 'train_models', 'predict_compounds']
+
+def _run_stage(stage, workdir, paths, options):
+    """Run one stage in this (fresh) process; returns its measurements."""
+    import joblib
+    import pandas as pd
+
+    from core import prepare_files, pre_treatment, normalization, train_models, predict_compounds
+    from core.pipeline import peak_rss_mb
+    from core.storage import write_frame, read_frame, frame_extension
+    from core.transform import PreprocessingTransform
+
+    def frame_path(name):
+        return os.path.join(workdir, name + frame_extension())
+
+    start = time.perf_counter()
+    if stage == 'prepare_files':
+        df = prepare_files.process(paths['actives_dw_path'], paths['decoys_dw_path'],
+                                   paths['actives_cons_path'], paths['decoys_cons_path'])
+        elapsed = time.perf_counter() - start
+        write_frame(df, os.path.join(workdir, 'df_final'))
+    elif stage == 'pre_treatment':
+        df = read_frame(frame_path('df_final'))
+        start = time.perf_counter()
+        df = pre_treatment.process(df, max_zero_fraction=options['max_zero_fraction'],
+                                   min_variance=options['min_variance'])
+        elapsed = time.perf_counter() - start
+        write_frame(df, os.path.join(workdir, 'df_var_final'))
+    elif stage == 'normalization':
+        df = read_frame(frame_path('df_var_final'))
+        start = time.perf_counter()
+        df, scaler = normalization.process(df, corr_cutoff=options['corr_cutoff'])
+        elapsed = time.perf_counter() - start
+        write_frame(df, os.path.join(workdir, 'df_reduced'))
+        joblib.dump(scaler, os.path.join(workdir, 'scaler.joblib'))
+    elif stage == 'train_models':
+        df = read_frame(frame_path('df_reduced'))
+        start = time.perf_counter()
+        models, _, _ = train_models.process(df, n_jobs=options['n_jobs'], max_fits=options['max_fits'],
+                                            resampling_strategy=options['resampling'])
+        elapsed = time.perf_counter() - start
+        joblib.dump(models, os.path.join(workdir, 'models.joblib'))
+    elif stage == 'predict_compounds':
+        models = joblib.load(os.path.join(workdir, 'models.joblib'))
+        df_reduced = read_frame(frame_path('df_reduced'))
+        transform = PreprocessingTransform.from_stages(
+            joblib.load(os.path.join(workdir, 'scaler.joblib')),
+            [col for col in df_reduced.columns if col != 'atividade'],
+            options['max_zero_fraction'], options['min_variance'], options['corr_cutoff']
+        )
+        # Raw descriptors, repeated up to the requested library size
+        raw = read_frame(frame_path('df_final')).drop(columns=['atividade'])
+        repeats = -(-options['predict_rows'] // len(raw))
+        raw = pd.concat([raw] * repeats, ignore_index=True).iloc[:options['predict_rows']]
+        input_path = os.path.join(workdir, 'predict_input.csv')
+        raw.to_csv(input_path, index=False)
+        del raw
+        start = time.perf_counter()
+        df = predict_compounds.process_with_models(input_path, models, workers=options['workers'],
+                                                   transform=transform)
+        elapsed = time.perf_counter() - start
+    else:
+        raise ValueError(f"Unknown stage '{stage}'")
+
+    return {
+        'wall_s': round(elapsed, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rows': int(len(df)),
+        'rows_per_s': round(len(df) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def run_stage(stage, workdir, paths, options):
+    """Run a stage in a new spawned process (clean peak RSS, no state left by earlier stages)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(_run_stage, stage, workdir, paths, options).result()
+
+def environment():
+    """Commit, machine and library versions the results were measured with."""
+    from importlib.metadata import version, PackageNotFoundError
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    libraries = {}
+    for package in ['numpy', 'pandas', 'scikit-learn', 'xgboost', 'pyarrow']:
+        try:
+            libraries[package] = version(package)
+        except PackageNotFoundError:
+            pass
+    return {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'libraries': libraries,
+    }
+
+def parse_size(text):
+    """'ROWSxDESCRIPTORS' -> (rows, descriptors)."""
+    try:
+        rows, descriptors = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ROWSxDESCRIPTORS, got '{text}'")
+    return rows, descriptors
+
+def compare(results, baseline):
+    """Print wall times of results next to a baseline results dict."""
+    base_runs = {(run['rows'], run['descriptors'], run['active_fraction']): run for run in baseline['runs']}
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({baseline['environment'].get('created_at')})")
+    print(f"{'size':>12} {'stage':<18} {'before s':>9} {'after s':>9} {'ratio':>7}")
+    for run in results['runs']:
+        base = base_runs.get((run['rows'], run['descriptors'], run['active_fraction']))
+        if base is None:
+            continue
+        for stage, timing in run['stages'].items():
+            before = base['stages'].get(stage)
+            if before is None:
+                continue
+            ratio = timing['wall_s'] / before['wall_s'] if before['wall_s'] else float('nan')
+            print(f"{run['rows']:>6}x{run['descriptors']:<5} {stage:<18} {before['wall_s']:9.2f} "
+                  f"{timing['wall_s']:9.2f} {ratio:7.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(2000, 200), (20000, 500)],
+                        help='Datasets as ROWSxDESCRIPTORS')
+    parser.add_argument('--active-fraction', type=float, default=0.1)
+    parser.add_argument('--predict-rows', type=int, default=100000,
+                        help='Rows of the library scored by predict_compounds')
+    parser.add_argument('--max-fits', type=int, default=10,
+                        help='Per-model CV fit limit in train_models (0 = full search)')
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--resampling', default='smote', choices=['smote', 'undersample', 'class_weight', 'none'],
+                        help='Class balancing of train_models')
+    parser.add_argument('--workers', type=int, default=1, help='Scoring processes in predict_compounds')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES,
+                        help='Stages to report (earlier stages still run to produce their inputs)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', default=None, help='Earlier results file to compare wall times with')
+    args = parser.parse_args()
+
+    options = {
+        'max_zero_fraction': 0.5, 'min_variance': 0.01, 'corr_cutoff': 0.5,
+        'n_jobs': args.n_jobs, 'max_fits': args.max_fits or None, 'resampling': args.resampling,
+        'workers': args.workers, 'predict_rows': args.predict_rows,
+    }
+    last_stage = max(STAGES.index(stage) for stage in args.stages)
+    results = {'environment': environment(), 'options': options, 'runs': []}
+    for rows, descriptors in args.sizes:
+        with tempfile.TemporaryDirectory(prefix='mlcli-bench-') as workdir:
+            paths = synthetic.generate(os.path.join(workdir, 'inputs'), rows, descriptors,
+                                       args.active_fraction, args.seed)
+            run = {'rows': rows, 'descriptors': descriptors, 'active_fraction': args.active_fraction,
+                   'stages': {}}
+            for stage in STAGES[:last_stage + 1]:
+                timing = run_stage(stage, workdir, paths, options)
+                if stage in args.stages:
+                    run['stages'][stage] = timing
+                    print(f"{rows:>6}x{descriptors:<5} {stage:<18} {timing['wall_s']:8.2f} s "
+                          f"{timing['peak_rss_mb']:8.1f} MiB {timing['rows_per_s'] or 0:12.0f} rows/s",
+                          file=sys.stderr)
+            results['runs'].append(run)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+if __name__ == '__main__':
+    main()
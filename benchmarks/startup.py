@@ -0,0 +1,75 @@
+"""
+Startup time and import budget of the CLI's light commands.
+
+Each command runs several times in a fresh interpreter. The check fails
+(exit status 1) when the median wall time is over the budget, or when the
+command imports any of the ML stack (numpy, pandas, scikit-learn, scipy,
+xgboost, imblearn, joblib). Run it before merging changes to cli.py or
+the modules it imports at startup.
+
+Usage:
+    python -m benchmarks.startup [--budget-ms 400] [--repeat 5] [--model-dir models]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ('numpy', 'pandas', 'sklearn', 'scipy', 'xgboost', 'imblearn', 'joblib')
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli.py')
+
+# Runs cli.py like `python cli.py ...`, then reports the heavy modules it imported
+_PROBE = (
+    "import runpy, sys\n"
+    "sys.argv = [{cli!r}] + sys.argv[1:]\n"
+    "try:\n"
+    "    runpy.run_path({cli!r}, run_name='__main__')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "heavy = [name for name in {heavy!r} if name in sys.modules]\n"
+    "sys.stderr.write('\\nHEAVY:' + ','.join(heavy) + '\\n')\n"
+)
+
+def run_command(args):
+    """Run cli.py args once; returns (seconds, heavy modules imported)."""
+    probe = _PROBE.format(cli=CLI_PATH, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', probe] + args, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    heavy_line = [line for line in completed.stderr.splitlines() if line.startswith('HEAVY:')]
+    heavy = [name for name in heavy_line[-1][len('HEAVY:'):].split(',') if name] if heavy_line else ['?']
+    return elapsed, heavy
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=400.0,
+                        help='Maximum median wall time of each command')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--model-dir', default='models')
+    args = parser.parse_args()
+
+    commands = [
+        ['--help'],
+        ['predict', '--help'],
+        ['list-models', '--model-dir', args.model_dir],
+    ]
+
+    failed = False
+    print(f"{'command':<40} {'median ms':>10}  heavy imports")
+    for command in commands:
+        runs = [run_command(command) for _ in range(args.repeat)]
+        median_ms = statistics.median(seconds for seconds, _ in runs) * 1000
+        heavy = sorted({name for _, names in runs for name in names})
+        over = median_ms > args.budget_ms
+        failed = failed or over or bool(heavy)
+        status = 'FAIL' if over or heavy else 'ok'
+        print(f"{' '.join(command):<40} {median_ms:>10.0f}  {', '.join(heavy) or '-'}  {status}")
+
+    print(f"Budget: {args.budget_ms:.0f} ms, no {', '.join(HEAVY_MODULES)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
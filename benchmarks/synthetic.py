@@ -0,0 +1,136 @@
+"""
+Synthetic DataWarrior and GOLD exports for benchmarking create-model and predict.
+
+The files have the layout of example_files/: DataWarrior tab-separated
+exports (idcode and SMILES columns, name, descriptors, trailing empty column)
+and GOLD consolidated CSVs ('Entry' as 'i|name.pdb|1', Index, Version and
+Rescore.Rmsd columns, scores). GOLD rows are shuffled so the name join has
+work to do. Descriptors are noisy mixtures of shared latent factors, some of
+them zero-inflated or nearly constant, and actives are shifted along a few
+factors so the models have something to learn.
+
+Usage:
+    python -m benchmarks.synthetic --output-dir DIR [--rows 5000] [--descriptors 200] [--active-fraction 0.1]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Share of the descriptor columns written to the DataWarrior files (the rest go to GOLD)
+DATAWARRIOR_SHARE = 0.15
+
+def descriptor_matrix(n_rows, n_columns, actives, rng, zero_fraction=0.1, constant_fraction=0.05):
+    """
+    Descriptor-like matrix: correlated, differently scaled, partly zero-inflated or constant columns.
+
+    Args:
+        n_rows (int): Number of compounds.
+        n_columns (int): Number of descriptor columns.
+        actives (numpy.ndarray): Boolean mask of the active rows.
+        rng (numpy.random.Generator): Random source.
+        zero_fraction (float): Fraction of columns that are mostly zeros.
+        constant_fraction (float): Fraction of columns with (almost) no variance.
+
+    Returns:
+        numpy.ndarray: (n_rows x n_columns) float64 values.
+    """
+    n_factors = max(2, n_columns // 10)
+    latent = rng.standard_normal((n_rows, n_factors))
+    # Actives differ from decoys along a few factors
+    informative = rng.choice(n_factors, size=max(1, n_factors // 4), replace=False)
+    latent[np.ix_(actives, informative)] += 1.5
+
+    noise = rng.uniform(0.3, 3.0, n_columns)
+    values = latent[:, rng.integers(0, n_factors, n_columns)] + noise * rng.standard_normal((n_rows, n_columns))
+    values = values * rng.uniform(0.1, 500.0, n_columns) + rng.uniform(-100.0, 100.0, n_columns)
+
+    kinds = rng.random(n_columns)
+    sparse = kinds < zero_fraction
+    values[:, sparse] *= rng.random((n_rows, sparse.sum())) < 0.2
+    constant = (kinds >= zero_fraction) & (kinds < zero_fraction + constant_fraction)
+    values[:, constant] = np.round(values[:1, constant], 1)
+    return values
+
+def compound_names(n_actives, n_decoys):
+    """DataWarrior-style names: 'LocE_<i>_rank1.pdb' for actives, 'LocE_ZINC<12 digits>_rank1.pdb' for decoys."""
+    actives = [f"LocE_{i + 1}_rank1.pdb" for i in range(n_actives)]
+    decoys = [f"LocE_ZINC{i + 1:012d}_rank1.pdb" for i in range(n_decoys)]
+    return actives, decoys
+
+def write_datawarrior(path, names, values, columns):
+    """Write a DataWarrior tab-separated export (with its trailing empty column)."""
+    df = pd.DataFrame(values, columns=columns)
+    df.insert(0, 'name', names)
+    df.insert(0, 'smiles', 'C')
+    df.insert(0, 'Structure of smiles [idcode]', 'fH@@')
+    df[''] = ''
+    df.to_csv(path, sep='\t', index=False, float_format='%.6g')
+
+def write_gold(path, names, values, columns, rng):
+    """Write a GOLD consolidated CSV, rows in random order."""
+    order = rng.permutation(len(names))
+    df = pd.DataFrame(values[order], columns=columns)
+    df.insert(0, 'Version', '5.8.1')
+    df.insert(0, 'Rescore.Rmsd', 0.0)
+    df.insert(0, 'Index', np.arange(len(names)))
+    df.insert(0, 'Entry', [f"{i}|{names[k]}|1" for i, k in enumerate(order)])
+    df.to_csv(path, index=False, float_format='%.6g')
+
+def generate(output_dir, n_rows=5000, n_descriptors=200, active_fraction=0.1, seed=0):
+    """
+    Write actives/decoys DataWarrior and GOLD files.
+
+    Args:
+        output_dir (str): Directory for the four files.
+        n_rows (int): Total number of compounds.
+        n_descriptors (int): Total descriptor columns (DataWarrior + GOLD).
+        active_fraction (float): Fraction of actives (class imbalance).
+        seed (int): Random seed.
+
+    Returns:
+        dict: Paths, keyed like the create-model options (actives_dw_path, decoys_dw_path,
+            actives_cons_path, decoys_cons_path).
+    """
+    rng = np.random.default_rng(seed)
+    n_actives = max(2, int(round(n_rows * active_fraction)))
+    n_decoys = max(2, n_rows - n_actives)
+    n_dw = max(1, int(round(n_descriptors * DATAWARRIOR_SHARE)))
+    n_gold = max(1, n_descriptors - n_dw)
+
+    actives = np.zeros(n_actives + n_decoys, dtype=bool)
+    actives[:n_actives] = True
+    values = descriptor_matrix(len(actives), n_dw + n_gold, actives, rng)
+    dw_columns = [f"DW descriptor {i}" for i in range(n_dw)]
+    gold_columns = [f"energies_residues.RES{i}.PLP.S(buried)" for i in range(n_gold)]
+    active_names, decoy_names = compound_names(n_actives, n_decoys)
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {
+        'actives_dw_path': os.path.join(output_dir, 'actives_datawarrior.txt'),
+        'decoys_dw_path': os.path.join(output_dir, 'decoys_datawarrior.txt'),
+        'actives_cons_path': os.path.join(output_dir, 'active_consolidated.csv'),
+        'decoys_cons_path': os.path.join(output_dir, 'decoys_consolidated.csv'),
+    }
+    write_datawarrior(paths['actives_dw_path'], active_names, values[actives, :n_dw], dw_columns)
+    write_datawarrior(paths['decoys_dw_path'], decoy_names, values[~actives, :n_dw], dw_columns)
+    write_gold(paths['actives_cons_path'], active_names, values[actives, n_dw:], gold_columns, rng)
+    write_gold(paths['decoys_cons_path'], decoy_names, values[~actives, n_dw:], gold_columns, rng)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--descriptors', type=int, default=200)
+    parser.add_argument('--active-fraction', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate(args.output_dir, args.rows, args.descriptors, args.active_fraction, args.seed)
+    for path in paths.values():
+        print(path)
+
+if __name__ == '__main__':
+    main()
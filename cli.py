@@ -1,21 +1,46 @@
 import os
 import click
-import pandas as pd
-import numpy as np
-import pickle
-import shutil
 import warnings
-from pathlib import Path
 from datetime import datetime
 
-# Suppress sklearn version inconsistency warnings
-from sklearn.exceptions import InconsistentVersionWarning
-warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+# The ML stack (numpy, pandas, scikit-learn, xgboost) is imported inside the
+# commands that need it, so --help and the bundle listing commands start fast.
+
+# Suppress sklearn version inconsistency warnings (matched by message, to avoid importing sklearn)
+warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+
+def _parse_model_values(pairs, option_name):
+    """Parse repeated NAME=VALUE options into a {name: float} dict."""
+    values = {}
+    for pair in pairs:
+        name, sep, value = pair.rpartition('=')
+        if not sep or not name:
+            raise click.BadParameter(f"expected NAME=VALUE, got '{pair}'", param_hint=option_name)
+        try:
+            values[name] = float(value)
+        except ValueError:
+            raise click.BadParameter(f"'{value}' is not a number", param_hint=option_name)
+    return values
 
 @click.group()
-def cli():
+@click.option('--trace', 'trace_path', default=None, envvar='MLCLI_TRACE',
+              help='Append timing spans of this run to a trace file (env: MLCLI_TRACE)')
+@click.option('--trace-format', default='jsonl', show_default=True, type=click.Choice(['jsonl', 'chrome']),
+              help='JSON lines (one span per line) or Chrome trace format (chrome://tracing, Perfetto)')
+@click.option('--profile', 'profile_path', default=None,
+              help='Run the command under cProfile and write the stats (.prof) to this file')
+@click.pass_context
+def cli(ctx, trace_path, trace_format, profile_path):
     """ML Pipeline CLI tool for compound activity prediction."""
-    pass
+    from core import instrumentation
+    
+    # Resources are released in reverse order: profile, command span, then the trace file
+    if trace_path:
+        tracer = instrumentation.configure(trace_path, trace_format, {'command': ctx.invoked_subcommand})
+        ctx.call_on_close(tracer.close)
+        ctx.with_resource(instrumentation.span(ctx.invoked_subcommand or 'cli', 'command'))
+    if profile_path:
+        ctx.with_resource(instrumentation.profiled(profile_path))
 
 @cli.command('create-model')
 @click.option('--actives-datawarrior', 'actives_dw_path', required=True, 
@@ -28,106 +53,271 @@ def cli():
               help='Path to decoys_consolidated.csv file')
 @click.option('--output', 'output_prefix', required=True,
               help='Prefix for output files')
-def create_model(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path, output_prefix):
+@click.option('--descriptor-dtype', default='float32', show_default=True,
+              type=click.Choice(['float32', 'float64']),
+              help='Type the input descriptors are parsed as (float64 reproduces older runs exactly)')
+@click.option('--join', 'join_how', default='inner', show_default=True, type=click.Choice(['inner', 'left']),
+              help='Keep compounds found in both exports (inner) or every DataWarrior compound (left)')
+@click.option('--max-zero-fraction', default=0.5, show_default=True, type=click.FloatRange(0, 1),
+              help='Drop descriptors with a larger fraction of zero values')
+@click.option('--min-variance', default=0.01, show_default=True, type=float,
+              help='Drop descriptors with a smaller variance')
+@click.option('--corr-cutoff', default=0.5, show_default=True, type=float,
+              help='Drop a feature whose absolute correlation with an earlier one exceeds this')
+@click.option('--corr-float32', is_flag=True, default=False,
+              help='Compute feature correlations in float32 (faster, half the memory)')
+@click.option('--streaming-preprocessing', is_flag=True, default=False,
+              help='Fit and apply the zero/variance filter, scaling and correlation drop in row chunks '
+                   '(for inputs whose intermediate copies do not fit in memory)')
+@click.option('--resampling', 'resampling_strategy', default='smote', show_default=True,
+              type=click.Choice(['smote', 'undersample', 'class_weight', 'none']),
+              help='Balance the classes by oversampling actives, undersampling decoys, weighting the classes, or not at all')
+@click.option('--resampling-float32', is_flag=True, default=False,
+              help='Resample (and train on) float32 features (half the memory of float64)')
+@click.option('--calibration', 'calibration_method', default='sigmoid', show_default=True,
+              type=click.Choice(['sigmoid', 'isotonic']),
+              help='How probabilities are calibrated on the held-out CV scores (Platt or isotonic)')
+@click.option('--calibrate', 'calibrate_list', default='SVM', show_default=True,
+              help='Comma-separated model families to calibrate, e.g. SVM,RF (SVM always is)')
+@click.option('--search', 'search_strategy', default='grid', show_default=True,
+              type=click.Choice(['grid', 'random', 'halving']),
+              help='Hyperparameter search strategy')
+@click.option('--n-jobs', default=1, show_default=True, type=int,
+              help='Worker processes shared by all model searches (-1 = all cores)')
+@click.option('--n-iter', default=10, show_default=True, type=int,
+              help='Candidates per model for --search random')
+@click.option('--max-fits', default=None, type=int,
+              help='Per-model limit on the number of CV fits')
+@click.option('--time-budget', default=None, type=float,
+              help='Per-model limit on CV fit time, in seconds')
+@click.option('--early-stop', is_flag=True, default=False,
+              help='Skip the remaining CV folds of candidates that can no longer beat the best one')
+@click.option('--bootstrap', 'n_boot', default=0, show_default=True, type=click.IntRange(min=0),
+              help='Bootstrap resamples for metric confidence intervals (0 = none)')
+@click.option('--keep-intermediates', default=None, type=click.Path(file_okay=False),
+              help='Directory to save the intermediate data frames to (for debugging)')
+@click.option('--no-cache', is_flag=True, default=False,
+              help='Recompute every preprocessing stage instead of using the stage cache')
+@click.option('--cache-dir', default=None,
+              help='Stage cache directory (default: $MLCLI_CACHE_DIR or ~/.cache/mlcli)')
+@click.option('--cache-max-mb', default=2048, show_default=True, type=click.IntRange(min=0),
+              help='Size above which least recently used cache entries are removed')
+def create_model(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path, output_prefix,
+                 descriptor_dtype, join_how, max_zero_fraction, min_variance, corr_cutoff, corr_float32,
+                 streaming_preprocessing, resampling_strategy, resampling_float32, calibration_method, calibrate_list, search_strategy, n_jobs,
+                 n_iter, max_fits, time_budget, early_stop, n_boot, keep_intermediates, no_cache, cache_dir,
+                 cache_max_mb):
     """Create ML models from input data files."""
     click.echo(f"Creating models with prefix: {output_prefix}")
     
-    # Create temporary directory for processing
-    temp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir)
-    
-    # Copy input files to temp directory
-    shutil.copy(actives_dw_path, os.path.join(temp_dir, 'actives_datawarrior.txt'))
-    shutil.copy(decoys_dw_path, os.path.join(temp_dir, 'decoys_datawarrior.txt'))
-    shutil.copy(actives_cons_path, os.path.join(temp_dir, 'active_consolidated.csv'))
-    shutil.copy(decoys_cons_path, os.path.join(temp_dir, 'decoys_consolidated.csv'))
-    
-    # Change to temp directory
-    original_dir = os.getcwd()
-    os.chdir(temp_dir)
-    
     # Import processing modules
-    from core import (
-        prepare_files, 
-        pre_treatment, 
-        normalization, 
-        train_models
-    )
+    import numpy as np
+    from core import instrumentation, pipeline, stage_cache
+    
+    cache = None if no_cache else stage_cache.StageCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024)
     
     try:
-        # Step 1: Prepare files
-        click.echo("Step 1: Preparing files...")
-        df_final = prepare_files.process()
-        df_final.to_csv('df_final.csv', index=False)
-        
-        # Step 2: Pre-treatment
-        click.echo("Step 2: Pre-treating data...")
-        df_var_final = pre_treatment.process('df_final.csv')
-        df_var_final.to_csv('df_var_final.csv', index=False)
-        
-        # Step 3: Normalization
-        click.echo("Step 3: Normalizing data...")
-        df_reduced, scaler = normalization.process('df_var_final.csv')
-        df_reduced.to_csv('df_reduced.csv', index=False)
-        
-        # Step 4: Train models
-        click.echo("Step 4: Training models...")
-        models, metrics, data_splits = train_models.process('df_reduced.csv')
+        result = pipeline.run(
+            actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path,
+            descriptor_dtype=np.dtype(descriptor_dtype),
+            join=join_how,
+            max_zero_fraction=max_zero_fraction,
+            min_variance=min_variance,
+            corr_cutoff=corr_cutoff,
+            corr_dtype=np.float32 if corr_float32 else np.float64,
+            train_options={
+                'search_strategy': search_strategy, 'n_jobs': n_jobs, 'n_iter': n_iter,
+                'max_fits': max_fits, 'time_budget': time_budget, 'early_stop': early_stop,
+                'n_boot': n_boot, 'resampling_strategy': resampling_strategy,
+                'resampling_dtype': np.float32 if resampling_float32 else None,
+                'calibration_method': calibration_method,
+                'calibrated_models': [name.strip() for name in calibrate_list.split(',') if name.strip()]
+            },
+            keep_intermediates=keep_intermediates,
+            cache=cache,
+            streaming_preprocessing=streaming_preprocessing,
+            log=click.echo
+        )
         
         # Save outputs with prefix
-        models_dir = os.path.join(original_dir, 'models')
-        metrics_dir = os.path.join(original_dir, 'metrics')
-        data_dir = os.path.join(original_dir, 'data')
-        
-        # Save models
-        for model_name, model in models.items():
-            model_path = os.path.join(models_dir, f"{output_prefix}_{model_name}_model.pkl")
-            with open(model_path, 'wb') as f:
-                pickle.dump(model, f)
-        
-        # Save scaler
-        scaler_path = os.path.join(models_dir, f"{output_prefix}_scaler.pkl")
-        with open(scaler_path, 'wb') as f:
-            pickle.dump(scaler, f)
-        
-        # Save metrics
-        metrics.to_csv(os.path.join(metrics_dir, f"{output_prefix}_metrics.csv"), index=False)
-        
-        # Save data splits
-        np.savez(os.path.join(data_dir, f"{output_prefix}_train_test_data.npz"), 
-                 X_train=data_splits['X_train'], 
-                 X_test=data_splits['X_test'], 
-                 y_train=data_splits['y_train'], 
-                 y_test=data_splits['y_test'])
-        
-        # Save config info
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         config_info = {
-            'created_at': timestamp,
+            'created_at': datetime.now().strftime("%Y%m%d_%H%M%S"),
             'actives_datawarrior': actives_dw_path,
             'decoys_datawarrior': decoys_dw_path,
             'actives_consolidated': actives_cons_path,
             'decoys_consolidated': decoys_cons_path,
-            'output_prefix': output_prefix
+            'output_prefix': output_prefix,
+            'stages': result['report'].stages
         }
+        with instrumentation.span('save_outputs', 'io', prefix=output_prefix):
+            pipeline.save_outputs(result, output_prefix, os.getcwd(), config_info)
         
-        config_path = os.path.join(models_dir, f"{output_prefix}_config.pkl")
-        with open(config_path, 'wb') as f:
-            pickle.dump(config_info, f)
-            
+        click.echo(result['report'].summary())
         click.echo(f"Model creation completed successfully! Files saved with prefix: {output_prefix}")
         
     except Exception as e:
         click.echo(f"Error during model creation: {str(e)}", err=True)
         raise
+
+@cli.command('update-model')
+@click.option('--prefix', 'model_prefix', required=True,
+              help='Model set to update (create-model --output)')
+@click.option('--actives-datawarrior', 'actives_dw_path', required=True,
+              help='DataWarrior export of the new actives')
+@click.option('--decoys-datawarrior', 'decoys_dw_path', required=True,
+              help='DataWarrior export of the new decoys')
+@click.option('--actives-consolidated', 'actives_cons_path', required=True,
+              help='GOLD consolidated CSV of the new actives')
+@click.option('--decoys-consolidated', 'decoys_cons_path', required=True,
+              help='GOLD consolidated CSV of the new decoys')
+@click.option('--output', 'output_prefix', default=None,
+              help='Prefix for the updated model set (default: update --prefix in place)')
+@click.option('--descriptor-dtype', default='float32', show_default=True,
+              type=click.Choice(['float32', 'float64']),
+              help='dtype the descriptor and score columns are parsed as')
+@click.option('--join', 'join_how', default='inner', show_default=True, type=click.Choice(['inner', 'left']),
+              help='inner: compounds in both exports; left: every DataWarrior compound (missing GOLD scores = 0)')
+@click.option('--resampling', 'resampling_strategy', default='smote', show_default=True,
+              type=click.Choice(['smote', 'none']),
+              help='Rebalance the extended training set with SMOTE, or add the new rows as they are')
+def update_model(model_prefix, actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path, output_prefix,
+                 descriptor_dtype, join_how, resampling_strategy):
+    """Update a model set with newly docked compounds, without rebuilding it."""
+    import numpy as np
+    import pandas as pd
+    from core import instrumentation, model_bundle, pipeline, prepare_files, update_models
     
-    finally:
-        # Return to original directory and clean up
-        os.chdir(original_dir)
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+    output_prefix = output_prefix or model_prefix
+    base_dir = os.getcwd()
+    models_dir = os.path.join(base_dir, 'models')
+    data_path = os.path.join(base_dir, 'data', f"{model_prefix}_train_test_data.npz")
+    if model_prefix not in model_bundle.find_bundles(models_dir):
+        raise click.UsageError(f"No model bundle '{model_prefix}' in {models_dir}")
+    if not os.path.exists(data_path):
+        raise click.UsageError(f"No saved splits for '{model_prefix}': {data_path} does not exist")
+    
+    click.echo(f"Updating models with prefix: {model_prefix}")
+    report = pipeline.StageReport(log=click.echo)
+    
+    # Load fully (no memory-mapping): an in-place update rewrites the payload files
+    with report.stage('load', "Loading models and saved splits...") as span:
+        bundle = model_bundle.open_bundle(models_dir, model_prefix, mmap_mode=None)
+        if not bundle.has_artifact('preprocessing'):
+            raise click.UsageError(f"Bundle '{model_prefix}' has no preprocessing transform; "
+                                   f"recreate it with create-model")
+        models = bundle.load_models()
+        artifacts = {name: bundle.load_artifact(name) for name in bundle.manifest['artifacts']}
+        data_splits = pipeline.load_data_splits(data_path, bundle.feature_names)
+        span.set(models=len(models), rows=len(data_splits['X_train']))
+    
+    with report.stage('prepare_files', "Preparing the new files...") as span:
+        df_new = prepare_files.process(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path,
+                                       descriptor_dtype=np.dtype(descriptor_dtype), how=join_how)
+        span.set(rows=df_new.shape[0], columns=df_new.shape[1])
+    
+    with report.stage('update_models', "Updating models...") as span:
+        try:
+            models, metrics_df, data_splits, comparison = update_models.process(
+                models, artifacts['preprocessing'], data_splits, df_new, resampling_strategy, log=click.echo
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        span.set(rows=len(data_splits['X_train']), models=len(models))
+    
+    # Same outputs as create-model; the update is recorded in the bundle config
+    config_info = dict(bundle.manifest.get('config', {}))
+    config_info['output_prefix'] = output_prefix
+    config_info['updates'] = config_info.get('updates', []) + [{
+        'updated_at': datetime.now().strftime("%Y%m%d_%H%M%S"),
+        'from_prefix': model_prefix,
+        'actives_datawarrior': actives_dw_path,
+        'decoys_datawarrior': decoys_dw_path,
+        'actives_consolidated': actives_cons_path,
+        'decoys_consolidated': decoys_cons_path,
+        'rows': int(df_new.shape[0]),
+        'stages': report.stages,
+    }]
+    result = {'models': models, 'metrics': metrics_df, 'data_splits': data_splits,
+              'scaler': artifacts['scaler'], 'transform': artifacts['preprocessing']}
+    with instrumentation.span('save_outputs', 'io', prefix=output_prefix):
+        pipeline.save_outputs(result, output_prefix, base_dir, config_info)
+    
+    click.echo("Stored test split, before and after the update:")
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        click.echo(comparison.to_string(index=False))
+    click.echo(report.summary())
+    click.echo(f"Model update completed successfully! Files saved with prefix: {output_prefix}")
+
+@cli.command('create-models')
+@click.option('--manifest', 'manifest_path', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='YAML (or .json) file listing the targets and their input files')
+@click.option('--output-dir', default='.', show_default=True, type=click.Path(file_okay=False),
+              help='Directory for the models/, metrics/, data/ and logs/ folders and the progress journal')
+@click.option('--workers', default=-1, show_default=True, type=int,
+              help='Total worker processes, split between targets and their searches (-1 = all cores)')
+@click.option('--jobs', default=None, type=click.IntRange(min=1),
+              help='Targets built at the same time (default: as many as --workers allows)')
+@click.option('--force', is_flag=True, default=False,
+              help='Rebuild every target, ignoring the progress journal')
+@click.option('--no-cache', is_flag=True, default=False,
+              help='Recompute every preprocessing stage instead of using the stage cache')
+@click.option('--cache-dir', default=None,
+              help='Stage cache directory (default: $MLCLI_CACHE_DIR or ~/.cache/mlcli)')
+@click.option('--cache-max-mb', default=2048, show_default=True, type=click.IntRange(min=0),
+              help='Size above which least recently used cache entries are removed')
+@click.pass_context
+def create_models(ctx, manifest_path, output_dir, workers, jobs, force, no_cache, cache_dir, cache_max_mb):
+    """Create models for every target of a manifest, several targets at a time."""
+    from core import batch, instrumentation
+
+    # Workers append their spans to a JSON lines trace; a Chrome trace is only written by this process
+    tracer = instrumentation.get_tracer()
+    trace_path = tracer.path if tracer.enabled and tracer.fmt == 'jsonl' else None
+
+    try:
+        statuses = batch.process(manifest_path, output_dir, n_workers=workers, jobs=jobs, cache_dir=cache_dir,
+                                 cache_max_mb=cache_max_mb, no_cache=no_cache, force=force,
+                                 trace_path=trace_path, log=click.echo)
+    except (ValueError, ImportError) as e:
+        raise click.ClickException(str(e))
+
+    counts = {status: sum(1 for s in statuses.values() if s == status) for status in ['done', 'skipped', 'failed']}
+    click.echo(f"{counts['done']} built, {counts['skipped']} skipped, {counts['failed']} failed")
+    if counts['failed']:
+        ctx.exit(1)
+
+@cli.group('cache')
+def cache_group():
+    """Inspect or clear the create-model stage cache."""
+    pass
+
+@cache_group.command('info')
+@click.option('--cache-dir', default=None,
+              help='Stage cache directory (default: $MLCLI_CACHE_DIR or ~/.cache/mlcli)')
+def cache_info(cache_dir):
+    """List cached stage outputs, least recently used first."""
+    from core import stage_cache
+    
+    cache = stage_cache.StageCache(cache_dir)
+    entries = cache.entries()
+    click.echo(f"Cache directory: {cache.cache_dir}")
+    for entry in entries:
+        last_used = datetime.fromtimestamp(entry['last_used']).strftime("%Y-%m-%d %H:%M:%S")
+        shape = 'x'.join(str(n) for n in entry['shape'] or [])
+        click.echo(f"{entry['key'][:12]}  {entry['stage']:<14} {shape:>12} "
+                   f"{entry['bytes'] / 1024 ** 2:>9.1f} MiB  {last_used}")
+    click.echo(f"{len(entries)} entries, {sum(e['bytes'] for e in entries) / 1024 ** 2:.1f} MiB")
+
+@cache_group.command('clear')
+@click.option('--cache-dir', default=None,
+              help='Stage cache directory (default: $MLCLI_CACHE_DIR or ~/.cache/mlcli)')
+def cache_clear(cache_dir):
+    """Remove every cached stage output."""
+    from core import stage_cache
+    
+    cache = stage_cache.StageCache(cache_dir)
+    removed = cache.clear()
+    click.echo(f"Removed {removed} entries from {cache.cache_dir}")
 
 @cli.command('predict')
 @click.option('--input-data', required=True, 
@@ -136,26 +326,92 @@ def create_model(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons
               help='Directory containing model files (default: models)')
 @click.option('--output', 'output_name', required=True,
               help='Name for output file (without extension)')
-def predict(input_data, model_dir, output_name):
+@click.option('--prefix', 'model_prefix', default=None,
+              help='Only use the models created with this prefix (default: the unprefixed legacy models, else the newest set)')
+@click.option('--models', 'model_list', default=None,
+              help='Comma-separated subset of models to load, e.g. LR,RF (bundles only open these)')
+@click.option('--threshold', default=0.5, show_default=True, type=float,
+              help='Probability above which a model votes active')
+@click.option('--model-threshold', multiple=True,
+              help='Per-model vote threshold as MODEL=VALUE (repeatable)')
+@click.option('--weight', 'weight_pairs', multiple=True,
+              help='Per-model vote weight as MODEL=VALUE (repeatable); adds a consensus_weighted column')
+@click.option('--chunk-size', default=None, type=click.IntRange(min=1),
+              help='Stream the input in chunks of this many rows (bounded memory)')
+@click.option('--workers', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of processes scoring (model, row block) work units')
+@click.option('--raw-input', is_flag=True, default=False,
+              help='Input has raw DataWarrior/GOLD descriptors; apply the bundle\'s preprocessing (needs --prefix)')
+@click.option('--top-k', default=None, type=click.IntRange(min=1),
+              help='Only write the K best compounds (most votes, then highest mean probability), streaming the input')
+@click.option('--min-consensus', default=None, type=click.IntRange(min=0),
+              help='Only write compounds with at least this many models voting active')
+@click.option('--compact', is_flag=True, default=False,
+              help='float32 probabilities and a consensus_mask bitfield instead of the consensus_Model names')
+@click.option('--format', 'output_format', default='csv', show_default=True, type=click.Choice(['csv', 'parquet']),
+              help='Output file format (parquet needs pyarrow)')
+@click.option('--compiled-trees', is_flag=True, default=False,
+              help='Score DT/RF/XGB with their compiled array form (same probabilities, faster on small inputs; see check-trees)')
+@click.option('--cascade', is_flag=True, default=False,
+              help='With --min-consensus: score RF/XGB/SVM only on rows that can still reach it')
+def predict(input_data, model_dir, output_name, model_prefix, model_list, threshold, model_threshold,
+            weight_pairs, chunk_size, workers, raw_input, top_k, min_consensus, compact, output_format,
+            compiled_trees, cascade):
     """Predict compound activity using all trained models."""
     click.echo(f"Predicting using models from directory: {model_dir}")
     click.echo(f"Input data: {input_data}")
     
     # Load prediction module
-    from core import predict_compounds
+    from core import instrumentation, predict_compounds
+    
+    model_thresholds = _parse_model_values(model_threshold, '--model-threshold')
+    weights = _parse_model_values(weight_pairs, '--weight') if weight_pairs else None
+    if raw_input and not model_prefix:
+        raise click.UsageError("--raw-input needs --prefix: the preprocessing belongs to one model bundle")
+    if cascade and min_consensus is None:
+        raise click.UsageError("--cascade needs --min-consensus: it skips rows that cannot reach it")
+    if output_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise click.UsageError("--format parquet needs pyarrow (pip install pyarrow)")
     
     try:
         base_dir = os.path.dirname(os.path.abspath(__file__))
         models_dir = os.path.join(base_dir, model_dir)
         output_dir = os.path.join(base_dir, 'output')
         
+        output_path = os.path.join(output_dir, f"{output_name}.{output_format}")
+        
+        model_names = [name.strip() for name in model_list.split(',')] if model_list else None
+        with instrumentation.span('load_models', 'io', prefix=model_prefix) as span:
+            loaded_models = predict_compounds.load_models(models_dir, model_prefix, model_names)
+            transform = predict_compounds.load_transform(models_dir, model_prefix) if raw_input else None
+            span.set(models=len(loaded_models))
+        if compiled_trees:
+            from core import tree_compiler
+            with instrumentation.span('compile_trees', 'transform'):
+                loaded_models = tree_compiler.compile_models(loaded_models, log=click.echo)
+        
         # Run prediction
         click.echo("Running prediction...")
-        results = predict_compounds.process_all_models(input_data, models_dir)
-        
-        # Save results
-        output_path = os.path.join(output_dir, f"{output_name}.csv")
-        results.to_csv(output_path, index=False)
+        if chunk_size or top_k or min_consensus is not None:
+            # Results are appended to output_path chunk by chunk (top-k: written at the end)
+            predict_compounds.stream_with_models(
+                input_data, output_path, chunk_size or predict_compounds.DEFAULT_CHUNK_SIZE, loaded_models,
+                threshold, model_thresholds, weights, workers, transform,
+                compact=compact, top_k=top_k, min_consensus=min_consensus, output_format=output_format,
+                cascade=cascade
+            )
+        else:
+            results = predict_compounds.process_with_models(
+                input_data, loaded_models, threshold, model_thresholds, weights, workers, transform,
+                compact=compact
+            )
+            
+            # Save results
+            with predict_compounds.OutputWriter(output_path, output_format) as writer:
+                writer.write(results)
         
         click.echo(f"Prediction completed successfully! Results saved to: {output_path}")
         
@@ -163,5 +419,199 @@ def predict(input_data, model_dir, output_name):
         click.echo(f"Error during prediction: {str(e)}", err=True)
         raise
 
+@cli.command('evaluate')
+@click.option('--prefix', 'model_prefix', required=True,
+              help='Model set to evaluate (create-model --output)')
+@click.option('--model-dir', default='models',
+              help='Directory containing model files (default: models)')
+@click.option('--data-dir', default='data',
+              help='Directory containing {prefix}_train_test_data.npz (default: data)')
+@click.option('--models', 'model_list', default=None,
+              help='Comma-separated subset of models to evaluate, e.g. LR,RF')
+@click.option('--bootstrap', 'n_boot', default=1000, show_default=True, type=click.IntRange(min=0),
+              help='Bootstrap resamples for confidence intervals (0 = none)')
+@click.option('--confidence', default=0.95, show_default=True, type=click.FloatRange(0, 1, min_open=True, max_open=True),
+              help='Coverage of the bootstrap confidence intervals')
+@click.option('--output', 'output_path', default=None,
+              help='CSV file to write the metrics to (default: print them)')
+def evaluate(model_prefix, model_dir, data_dir, model_list, n_boot, confidence, output_path):
+    """Recompute the metrics of a model set on its saved train/test splits."""
+    import pandas as pd
+    from core import pipeline, predict_compounds, train_models
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    models_dir = os.path.join(base_dir, model_dir)
+    data_path = os.path.join(base_dir, data_dir, f"{model_prefix}_train_test_data.npz")
+    if not os.path.exists(data_path):
+        raise click.UsageError(f"No saved splits for '{model_prefix}': {data_path} does not exist")
+    
+    model_names = [name.strip() for name in model_list.split(',')] if model_list else None
+    loaded_models = predict_compounds.load_models(models_dir, model_prefix, model_names)
+    feature_names = getattr(next(iter(loaded_models.values())), 'feature_names_in_', None)
+    data_splits = pipeline.load_data_splits(data_path, feature_names)
+    
+    metrics_df = train_models.evaluate(loaded_models, data_splits, n_boot=n_boot, confidence=confidence)
+    if output_path:
+        metrics_df.to_csv(output_path, index=False)
+        click.echo(f"Metrics saved to: {output_path}")
+    else:
+        with pd.option_context('display.max_columns', None, 'display.width', 200):
+            click.echo(metrics_df.to_string(index=False))
+
+@cli.command('check-trees')
+@click.option('--prefix', 'model_prefix', default=None,
+              help='Model set whose tree models to check (default: every model in --model-dir)')
+@click.option('--model-dir', default='models',
+              help='Directory containing model files (default: models)')
+@click.option('--data-dir', default='data',
+              help='Directory containing {prefix}_train_test_data.npz (default: data)')
+@click.option('--input-data', default=None,
+              help='Score this prediction input instead of the saved train/test splits')
+@click.option('--repeat', default=3, show_default=True, type=click.IntRange(min=1),
+              help='Timing repetitions (the best is reported)')
+def check_trees(model_prefix, model_dir, data_dir, input_data, repeat):
+    """Check that the compiled DT/RF/XGB models give the original probabilities."""
+    import pandas as pd
+    from core import pipeline, predict_compounds, tree_compiler
+    
+    if not model_prefix and not input_data:
+        raise click.UsageError("Without --prefix there are no saved splits to score: give --input-data")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    models_dir = os.path.join(base_dir, model_dir)
+    loaded_models = predict_compounds.load_models(models_dir, model_prefix)
+    feature_names = getattr(next(iter(loaded_models.values())), 'feature_names_in_', None)
+    if input_data:
+        X = pd.read_csv(input_data)
+        if feature_names is not None:
+            X = X[list(feature_names)]
+    else:
+        data_path = os.path.join(base_dir, data_dir, f"{model_prefix}_train_test_data.npz")
+        if not os.path.exists(data_path):
+            raise click.UsageError(f"No saved splits for '{model_prefix}': {data_path} does not exist "
+                                   f"(use --input-data)")
+        data_splits = pipeline.load_data_splits(data_path, feature_names)
+        X = pd.concat([data_splits['X_train'], data_splits['X_test']], ignore_index=True)
+    
+    rows = []
+    for name, model in loaded_models.items():
+        try:
+            compiled = tree_compiler.compile_model(model)
+        except ValueError as e:
+            click.echo(f"{name}: not compiled ({e})")
+            continue
+        if compiled is None:
+            continue
+        result = tree_compiler.check_parity(model, compiled, X, repeat=repeat)
+        rows.append({'model': name, **result, 'speedup': result['original_s'] / max(result['compiled_s'], 1e-9)})
+    if not rows:
+        raise click.UsageError("No compilable tree models (DT, RF, XGB) were loaded")
+    
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        click.echo(pd.DataFrame(rows).to_string(index=False))
+    if not all(row['ok'] for row in rows):
+        click.echo("Compiled probabilities differ from the originals", err=True)
+        raise SystemExit(1)
+
+@cli.command('list-models')
+@click.option('--model-dir', default='models',
+              help='Directory containing model files (default: models)')
+def list_models(model_dir):
+    """List model bundles and legacy model files (reads manifests only)."""
+    from core import model_bundle
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    models_dir = os.path.join(base_dir, model_dir)
+    bundles = model_bundle.find_bundles(models_dir)
+    for prefix in bundles:
+        manifest = model_bundle.open_bundle(models_dir, prefix).manifest
+        size = sum(entry['bytes'] for kind in ('models', 'artifacts') for entry in manifest.get(kind, {}).values())
+        click.echo(f"{prefix:<24} {manifest.get('created_at', '-'):<16} {len(manifest['feature_names']):>5} features  "
+                   f"{size / 1024 ** 2:>8.1f} MiB  {', '.join(manifest['models'])}")
+    legacy = sorted(f for f in os.listdir(models_dir) if f.endswith('.pkl')) if os.path.isdir(models_dir) else []
+    for file_name in legacy:
+        click.echo(f"{file_name:<24} (legacy pickle)")
+    if not bundles and not legacy:
+        click.echo(f"No models found in {models_dir}")
+
+@cli.command('inspect-bundle')
+@click.option('--prefix', 'model_prefix', required=True,
+              help='Bundle to describe (create-model --output)')
+@click.option('--model-dir', default='models',
+              help='Directory containing model bundles (default: models)')
+@click.option('--features', 'show_features', is_flag=True, default=False,
+              help='Also list the feature names')
+@click.option('--json', 'as_json', is_flag=True, default=False,
+              help='Print the raw manifest')
+def inspect_bundle(model_prefix, model_dir, show_features, as_json):
+    """Describe a model bundle from its manifest, without loading any model."""
+    import json
+    from core import model_bundle
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    models_dir = os.path.join(base_dir, model_dir)
+    if model_prefix not in model_bundle.find_bundles(models_dir):
+        raise click.UsageError(f"No bundle '{model_prefix}' in {models_dir}")
+    manifest = model_bundle.open_bundle(models_dir, model_prefix).manifest
+    if as_json:
+        click.echo(json.dumps(manifest, indent=2))
+        return
+    
+    click.echo(f"Bundle:     {model_prefix} (format {manifest.get('format_version')})")
+    click.echo(f"Created:    {manifest.get('created_at', '-')}")
+    click.echo(f"Features:   {len(manifest['feature_names'])}")
+    click.echo("Versions:   " + ', '.join(f"{name} {version}" for name, version in manifest.get('versions', {}).items()))
+    for kind in ('models', 'artifacts'):
+        click.echo(f"{kind.capitalize()}:")
+        for name, entry in manifest.get(kind, {}).items():
+            click.echo(f"  {name:<14} {entry['class']:<55} {entry['bytes'] / 1024:>10.1f} KiB")
+    config = manifest.get('config', {})
+    if config:
+        click.echo("Config:")
+        for key, value in config.items():
+            if key != 'stages':
+                click.echo(f"  {key}: {value}")
+    if show_features:
+        click.echo("Feature names:")
+        for name in manifest['feature_names']:
+            click.echo(f"  {name}")
+
+@cli.command('serve')
+@click.option('--model-dir', default='models',
+              help='Directory containing model bundles (default: models)')
+@click.option('--host', default='127.0.0.1', show_default=True,
+              help='Interface to listen on')
+@click.option('--port', default=8765, show_default=True, type=int,
+              help='TCP port to listen on')
+@click.option('--socket', 'socket_path', default=None,
+              help='Listen on this Unix socket instead of TCP')
+@click.option('--cache-size', default=4, show_default=True, type=click.IntRange(min=1),
+              help='Number of model sets kept loaded (LRU)')
+@click.option('--max-batch-rows', default=4096, show_default=True, type=click.IntRange(min=1),
+              help='Rows after which a micro-batch is scored without waiting')
+@click.option('--max-wait-ms', default=5.0, show_default=True, type=float,
+              help='Longest time a request waits for others to join its micro-batch')
+@click.option('--compiled-trees', is_flag=True, default=False,
+              help='Score DT/RF/XGB with their compiled array form (faster on small batches)')
+def serve(model_dir, host, port, socket_path, cache_size, max_batch_rows, max_wait_ms, compiled_trees):
+    """Run a warm prediction server (POST /predict, GET /stats)."""
+    from core import server as prediction_server
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    models_dir = os.path.join(base_dir, model_dir)
+    
+    server, batcher = prediction_server.make_server(
+        models_dir, host=host, port=port, socket_path=socket_path, cache_size=cache_size,
+        max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms, compiled_trees=compiled_trees
+    )
+    where = socket_path if socket_path else f"http://{host}:{server.server_address[1]}"
+    click.echo(f"Serving models from {models_dir} on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Shutting down...")
+    finally:
+        server.server_close()
+        batcher.close()
+
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
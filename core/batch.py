@@ -0,0 +1,367 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import get_context
+
+from core import instrumentation
+
+JOURNAL_NAME = 'create_models_journal.jsonl'
+LOGS_DIR = 'logs'
+
+# Input files of a target (manifest keys, in pipeline.run order)
+TARGET_FILES = ['actives_datawarrior', 'decoys_datawarrior', 'actives_consolidated', 'decoys_consolidated']
+
+# create-model options a manifest may set (under 'defaults' or per target), with their defaults
+TARGET_OPTIONS = {
+    'descriptor_dtype': 'float32',
+    'join': 'inner',
+    'max_zero_fraction': 0.5,
+    'min_variance': 0.01,
+    'corr_cutoff': 0.5,
+    'corr_float32': False,
+    'streaming_preprocessing': False,
+    'resampling': 'smote',
+    'resampling_float32': False,
+    'calibration': 'sigmoid',
+    'calibrate': ['SVM'],
+    'search': 'grid',
+    'n_iter': 10,
+    'max_fits': None,
+    'time_budget': None,
+    'early_stop': False,
+    'bootstrap': 0,
+}
+
+_TARGET_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+def _read_manifest_file(path):
+    if path.endswith('.json'):
+        with open(path) as file:
+            return json.load(file)
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(f"Reading {path} needs PyYAML (pip install pyyaml); "
+                          f"or write the manifest as JSON (.json)")
+    with open(path) as file:
+        return yaml.safe_load(file)
+
+def load_manifest(path):
+    """
+    Read a create-models manifest.
+
+    The manifest (YAML, or JSON with a .json extension) lists the targets
+    and, optionally, option defaults shared by all of them:
+
+        defaults:
+          max_fits: 10
+        targets:
+          - name: ABL1
+            actives_datawarrior: abl1/actives_datawarrior.txt
+            decoys_datawarrior: abl1/decoys_datawarrior.txt
+            actives_consolidated: abl1/active_consolidated.csv
+            decoys_consolidated: abl1/decoys_consolidated.csv
+            corr_cutoff: 0.6
+
+    Relative file paths are relative to the manifest. 'output' (the bundle
+    prefix) defaults to the target name; two targets cannot have the same
+    output.
+
+    Args:
+        path (str): Manifest file.
+
+    Returns:
+        list: One dict per target with name, output, files (TARGET_FILES -> absolute
+            path) and options (every TARGET_OPTIONS key).
+    """
+    manifest = _read_manifest_file(path) or {}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('targets'), list):
+        raise ValueError(f"{path}: expected a 'targets' list")
+    root = os.path.dirname(os.path.abspath(path))
+
+    def check_options(options, where):
+        unknown = sorted(set(options) - set(TARGET_OPTIONS))
+        if unknown:
+            raise ValueError(f"{path}: unknown option(s) {unknown} in {where}. "
+                             f"Allowed: {sorted(TARGET_OPTIONS)}")
+
+    defaults = manifest.get('defaults') or {}
+    check_options(defaults, 'defaults')
+
+    targets = []
+    seen = set()
+    outputs = {}
+    for i, entry in enumerate(manifest['targets']):
+        entry = dict(entry)
+        name = str(entry.pop('name', ''))
+        if not _TARGET_NAME.match(name):
+            raise ValueError(f"{path}: target {i + 1} needs a 'name' of letters, digits, '.', '_' or '-'")
+        output = str(entry.pop('output', name))
+        if name in seen:
+            raise ValueError(f"{path}: duplicate target '{name}'")
+        seen.add(name)
+        if output in outputs:
+            # They would overwrite each other's bundle, metrics and data splits
+            raise ValueError(f"{path}: targets '{outputs[output]}' and '{name}' have the same output '{output}'")
+        outputs[output] = name
+
+        missing = [key for key in TARGET_FILES if key not in entry]
+        if missing:
+            raise ValueError(f"{path}: target '{name}' is missing {missing}")
+        files = {key: os.path.normpath(os.path.join(root, entry.pop(key))) for key in TARGET_FILES}
+        check_options(entry, f"target '{name}'")
+
+        targets.append({
+            'name': name,
+            'output': output,
+            'files': files,
+            'options': {**TARGET_OPTIONS, **defaults, **entry},
+        })
+    return targets
+
+def fingerprint(target):
+    """Digest of a target's definition; a journal entry only counts while it is unchanged."""
+    spec = json.dumps({'output': target['output'], 'files': target['files'], 'options': target['options']},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+def split_workers(n_workers, n_targets, jobs=None):
+    """
+    Split a worker budget between concurrent targets and their CV searches.
+
+    Args:
+        n_workers (int): Total worker processes (-1 = all cores).
+        n_targets (int): Targets left to build.
+        jobs (int): Targets built at the same time (default: as many as the budget allows).
+
+    Returns:
+        tuple: (jobs, n_jobs) - concurrent targets and search workers per target.
+    """
+    from core.hyperparameter_search import effective_n_jobs
+
+    n_workers = effective_n_jobs(n_workers)
+    jobs = max(1, min(jobs or n_workers, n_workers, max(n_targets, 1)))
+    return jobs, max(1, n_workers // jobs)
+
+def read_journal(path):
+    """
+    Last journal record of each target.
+
+    Returns:
+        dict: target name -> record (status 'started', 'done' or 'failed').
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash
+                continue
+            records[record['target']] = record
+    return records
+
+def append_journal(path, record):
+    """Append one record (a single write, flushed to disk before returning)."""
+    record = {'time': datetime.now().isoformat(timespec='seconds'), **record}
+    with open(path, 'a') as file:
+        file.write(json.dumps(record, default=str) + '\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+def _metrics_path(base_dir, target):
+    return os.path.join(base_dir, 'metrics', f"{target['output']}_metrics.csv")
+
+def pending_targets(targets, journal, base_dir):
+    """Targets without a 'done' journal record for their current definition and outputs."""
+    pending = []
+    for target in targets:
+        record = journal.get(target['name'])
+        done = (record is not None and record['status'] == 'done'
+                and record.get('fingerprint') == fingerprint(target)
+                and os.path.exists(_metrics_path(base_dir, target)))
+        if not done:
+            pending.append(target)
+    return pending
+
+@contextmanager
+def _output_to(path):
+    """Send this process' stdout/stderr, and those of processes it starts, to a file."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    with open(path, 'w') as file:
+        os.dup2(file.fileno(), 1)
+        os.dup2(file.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved:
+                os.close(fd)
+
+def build_target(target, base_dir, n_jobs=1, journal_path=None, cache_dir=None, cache_max_mb=2048,
+                 no_cache=False, trace_path=None, manifest_path=None):
+    """
+    Run create-model for one target (in a batch worker process).
+
+    Progress output goes to base_dir/logs/<name>.log; outputs are saved under
+    base_dir like create-model's, with the target's output prefix.
+
+    Returns:
+        dict: Per-stage timings, start time and pid of the worker.
+    """
+    import numpy as np
+    from core import pipeline, stage_cache
+
+    started_at = time.time()
+    if journal_path:
+        append_journal(journal_path, {'target': target['name'], 'status': 'started', 'pid': os.getpid()})
+    for folder in ['models', 'metrics', 'data', LOGS_DIR]:
+        os.makedirs(os.path.join(base_dir, folder), exist_ok=True)
+    if trace_path:
+        instrumentation.configure(trace_path, 'jsonl', {'command': 'create-models', 'target': target['name']})
+
+    options = target['options']
+    files = target['files']
+    cache = None if no_cache else stage_cache.StageCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024)
+    log_path = os.path.join(base_dir, LOGS_DIR, f"{target['name']}.log")
+    with _output_to(log_path):
+        try:
+            print(f"Creating models for target {target['name']} with prefix: {target['output']}")
+            result = pipeline.run(
+                files['actives_datawarrior'], files['decoys_datawarrior'],
+                files['actives_consolidated'], files['decoys_consolidated'],
+                descriptor_dtype=np.dtype(options['descriptor_dtype']),
+                join=options['join'],
+                max_zero_fraction=options['max_zero_fraction'],
+                min_variance=options['min_variance'],
+                corr_cutoff=options['corr_cutoff'],
+                corr_dtype=np.float32 if options['corr_float32'] else np.float64,
+                streaming_preprocessing=options['streaming_preprocessing'],
+                train_options={
+                    'search_strategy': options['search'], 'n_jobs': n_jobs, 'n_iter': options['n_iter'],
+                    'max_fits': options['max_fits'], 'time_budget': options['time_budget'],
+                    'early_stop': options['early_stop'], 'n_boot': options['bootstrap'],
+                    'resampling_strategy': options['resampling'],
+                    'resampling_dtype': np.float32 if options['resampling_float32'] else None,
+                    'calibration_method': options['calibration'],
+                    'calibrated_models': (options['calibrate'].split(',') if isinstance(options['calibrate'], str)
+                                          else options['calibrate'])
+                },
+                cache=cache,
+            )
+            config_info = {
+                'created_at': datetime.now().strftime("%Y%m%d_%H%M%S"),
+                **files,
+                'output_prefix': target['output'],
+                'manifest': manifest_path,
+                'target': target['name'],
+                'stages': result['report'].stages
+            }
+            with instrumentation.span('save_outputs', 'io', prefix=target['output']):
+                pipeline.save_outputs(result, target['output'], base_dir, config_info)
+            print(result['report'].summary())
+        except Exception:
+            traceback.print_exc()
+            raise
+        finally:
+            instrumentation.get_tracer().close()
+
+    return {'stages': result['report'].stages, 'started_at': started_at, 'pid': os.getpid()}
+
+def process(manifest_path, base_dir, n_workers=1, jobs=None, cache_dir=None, cache_max_mb=2048,
+            no_cache=False, force=False, trace_path=None, log=print):
+    """
+    Build models for every target of a manifest, several targets at a time.
+
+    Each target runs in its own freshly spawned process (a single-worker
+    executor per target), so module state, memory and progress output are
+    never shared between targets; outputs only share base_dir's models/,
+    metrics/ and data/ folders, under distinct prefixes. The worker budget is split between concurrent
+    targets and the CV search of each (see split_workers).
+
+    Progress is recorded in base_dir/create_models_journal.jsonl. A rerun
+    skips the targets already built with their current definition, so a
+    crashed or interrupted batch resumes from the incomplete targets.
+
+    Args:
+        manifest_path (str): Manifest file (see load_manifest).
+        base_dir (str): Directory holding the models/, metrics/, data/ and logs/ folders.
+        n_workers (int): Total worker processes (-1 = all cores).
+        jobs (int): Targets built at the same time (default: derived from n_workers).
+        cache_dir (str): Stage cache directory (shared by the targets).
+        cache_max_mb (int): Stage cache size limit.
+        no_cache (bool): Recompute every preprocessing stage.
+        force (bool): Rebuild every target, ignoring the journal.
+        trace_path (str): JSON lines trace file the workers append their spans to.
+        log (callable): Where to send progress messages.
+
+    Returns:
+        dict: target name -> 'done', 'failed' or 'skipped'.
+    """
+    targets = load_manifest(manifest_path)
+    os.makedirs(base_dir, exist_ok=True)
+    journal_path = os.path.join(base_dir, JOURNAL_NAME)
+    journal = {} if force else read_journal(journal_path)
+    pending = pending_targets(targets, journal, base_dir)
+    statuses = {target['name']: 'skipped' for target in targets}
+    if len(pending) < len(targets):
+        log(f"Skipping {len(targets) - len(pending)} target(s) already built (see {journal_path})")
+    if not pending:
+        return statuses
+
+    jobs, n_jobs = split_workers(n_workers, len(pending), jobs)
+    log(f"Building {len(pending)} target(s), {jobs} at a time with {n_jobs} search worker(s) each")
+
+    queue = list(pending)
+    running = {}
+
+    def launch(target):
+        # A single-worker executor per target: a freshly spawned process on every Python version
+        executor = ProcessPoolExecutor(1, mp_context=get_context('spawn'))
+        future = executor.submit(build_target, target, base_dir, n_jobs, journal_path, cache_dir,
+                                 cache_max_mb, no_cache, trace_path, os.path.abspath(manifest_path))
+        running[future] = (target, executor)
+
+    try:
+        while queue or running:
+            while queue and len(running) < jobs:
+                launch(queue.pop(0))
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                target, executor = running.pop(future)
+                executor.shutdown(wait=True)
+                record = {'target': target['name'], 'fingerprint': fingerprint(target)}
+                try:
+                    info = future.result()
+                except Exception as e:
+                    statuses[target['name']] = 'failed'
+                    append_journal(journal_path, {**record, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+                    log(f"[{target['name']}] failed: {e} (see {os.path.join(base_dir, LOGS_DIR, target['name'] + '.log')})")
+                    continue
+                seconds = round(time.time() - info['started_at'], 1)
+                statuses[target['name']] = 'done'
+                append_journal(journal_path, {**record, 'status': 'done', 'seconds': seconds,
+                                              'stages': info['stages']})
+                instrumentation.record('target', info['started_at'], seconds, 'batch', pid=info['pid'],
+                                       target=target['name'])
+                log(f"[{target['name']}] done in {seconds:.1f} s "
+                    f"({sum(1 for s in statuses.values() if s != 'skipped')}/{len(pending)})")
+    finally:
+        # On an interrupt, queued targets are never started; the journal lets a rerun pick them up
+        for target, executor in running.values():
+            executor.shutdown(wait=True)
+    return statuses
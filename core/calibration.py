@@ -0,0 +1,119 @@
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import expit
+
+CALIBRATION_METHODS = ('sigmoid', 'isotonic')
+
+def decision_scores(model, X):
+    """
+    One score per row that grows with the positive class: the decision
+    function where the model has one (LR, SVC), else the positive-class
+    probability.
+    """
+    if hasattr(model, 'decision_function'):
+        return np.asarray(model.decision_function(X), dtype=np.float64)
+    return np.asarray(model.predict_proba(X)[:, 1], dtype=np.float64)
+
+def _fit_sigmoid(scores, y):
+    """
+    Platt scaling: (a, b) of P(positive | score) = expit(a * score + b).
+
+    As in libsvm, the 0/1 targets are smoothed by the class counts, so a
+    perfectly separated set does not push the probabilities to exactly 0 and 1.
+    """
+    n_pos = np.count_nonzero(y)
+    n_neg = len(y) - n_pos
+    target = np.where(y, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+
+    def loss(params):
+        z = params[0] * scores + params[1]
+        # -log(expit(z)) is logaddexp(0, -z), stable for large |z|
+        value = np.sum(target * np.logaddexp(0, -z) + (1 - target) * np.logaddexp(0, z))
+        residual = expit(z) - target
+        return value, np.array([residual @ scores, residual.sum()])
+
+    # Platt's starting point: a flat curve at the (smoothed) class prior
+    start = np.array([0.0, np.log((n_pos + 1.0) / (n_neg + 1.0))])
+    return minimize(loss, start, jac=True, method='L-BFGS-B').x
+
+def fit_calibrator(scores, y, method='sigmoid'):
+    """
+    Fit a map from decision scores to positive-class probabilities.
+
+    Args:
+        scores (numpy.ndarray): Held-out scores (see decision_scores).
+        y (numpy.ndarray): Whether each row is positive.
+        method (str): 'sigmoid' (Platt scaling) or 'isotonic'.
+
+    Returns:
+        The calibrator: (a, b) for 'sigmoid', a fitted IsotonicRegression for 'isotonic'.
+    """
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"Unknown calibration method '{method}'. Choose from {list(CALIBRATION_METHODS)}")
+    scores = np.asarray(scores, dtype=np.float64)
+    y = np.asarray(y, dtype=bool)
+    if method == 'sigmoid':
+        return tuple(float(value) for value in _fit_sigmoid(scores, y))
+    from sklearn.isotonic import IsotonicRegression
+
+    return IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip').fit(scores, y.astype(np.float64))
+
+class CalibratedModel:
+    """
+    A fitted binary classifier with calibrated probabilities.
+
+    predict is the estimator's own; predict_proba maps its decision scores
+    through a calibrator fitted on held-out scores, so the wrapper can
+    stand in for the estimator at predict time.
+    """
+
+    def __init__(self, estimator, method, calibrator):
+        self.estimator = estimator
+        self.method = method
+        self.calibrator = calibrator
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    @property
+    def n_features_in_(self):
+        return self.estimator.n_features_in_
+
+    @property
+    def feature_names_in_(self):
+        return self.estimator.feature_names_in_
+
+    def predict(self, X):
+        return self.estimator.predict(X)
+
+    def positive_proba(self, scores):
+        """Calibrated positive-class probabilities of the estimator's decision scores."""
+        if self.method == 'sigmoid':
+            a, b = self.calibrator
+            return expit(a * scores + b)
+        return self.calibrator.predict(scores)
+
+    def predict_proba(self, X):
+        positive = self.positive_proba(decision_scores(self.estimator, X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def __repr__(self):
+        return f"CalibratedModel({self.estimator!r}, method='{self.method}')"
+
+def calibrate(estimator, scores, y, method='sigmoid'):
+    """
+    Wrap a fitted estimator with a calibrator fitted on its held-out scores.
+
+    Args:
+        estimator: The classifier, refitted on the whole training set.
+        scores (numpy.ndarray): Out-of-fold decision scores of the same
+            hyperparameters (see decision_scores), one per training row.
+        y (numpy.ndarray): Labels of those rows.
+        method (str): 'sigmoid' or 'isotonic'.
+
+    Returns:
+        CalibratedModel
+    """
+    positive = np.asarray(y) == estimator.classes_[1]
+    return CalibratedModel(estimator, method, fit_calibrator(scores, positive, method))
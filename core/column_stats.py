@@ -0,0 +1,139 @@
+import numpy as np
+
+class ColumnStats:
+    """
+    Per-column count, zero count, mean, variance, minimum and maximum, accumulated chunk by chunk.
+
+    Each chunk's mean and sum of squared deviations (M2) are computed with
+    numpy and folded into the running totals with the parallel form of
+    Welford's update (Chan et al.), which is numerically stable and lets
+    statistics of separate shards be merged exactly as if the rows had been
+    seen in one pass. Accumulation is always in float64.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        n_columns = len(self.columns)
+        self.count = 0
+        self.zero_count = np.zeros(n_columns, dtype=np.int64)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def _combine(self, count, zero_count, mean, m2, minimum, maximum):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+        self.zero_count += zero_count
+        np.minimum(self.min, minimum, out=self.min)
+        np.maximum(self.max, maximum, out=self.max)
+
+    def update(self, chunk):
+        """
+        Add a chunk of rows.
+
+        Args:
+            chunk (array-like): 2-D block with one column per entry of self.columns.
+                NaNs must already be replaced (pre_treatment fills them with 0).
+
+        Returns:
+            ColumnStats: self.
+        """
+        values = np.asarray(chunk, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Expected a 2-D chunk with {len(self.columns)} columns, got shape {values.shape}")
+        if len(values) == 0:
+            return self
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        self._combine(len(values), (values == 0).sum(axis=0), mean, m2, values.min(axis=0), values.max(axis=0))
+        return self
+
+    def merge(self, other):
+        """
+        Fold in the statistics of another shard (same columns, in the same order).
+
+        Returns:
+            ColumnStats: self.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics of different columns")
+        self._combine(other.count, other.zero_count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def variance(self, ddof=1):
+        """Per-column variance (sample variance by default, as pandas' DataFrame.var)."""
+        if self.count <= ddof:
+            return np.full(len(self.columns), np.nan)
+        return self.m2 / (self.count - ddof)
+
+    def zero_fraction(self):
+        return self.zero_count / self.count if self.count else np.zeros(len(self.columns))
+
+    def keep_mask(self, max_zero_fraction=0.5, min_variance=0.01):
+        """
+        Columns passing pre_treatment's filters.
+
+        Args:
+            max_zero_fraction (float): Drop columns with a larger fraction of zeros.
+            min_variance (float): Drop columns with a smaller variance.
+
+        Returns:
+            numpy.ndarray: Boolean mask over self.columns.
+        """
+        keep_zeros = self.zero_count <= self.count * max_zero_fraction
+        with np.errstate(invalid='ignore'):
+            keep_variance = self.variance() >= min_variance
+        return keep_zeros & keep_variance
+
+class CoMoments:
+    """
+    Running column means and co-moment matrix sum((x - mean)(x - mean)^T), mergeable like ColumnStats.
+
+    Pearson correlations follow from the co-moments without a second pass
+    over the data; they are unchanged by per-column affine scaling such as
+    MinMax, so they can be accumulated on the raw values.
+    """
+
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoments = np.zeros((n_columns, n_columns))
+
+    def _combine(self, count, mean, comoments):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoments += comoments + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def update(self, chunk):
+        values = np.asarray(chunk, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        mean = values.mean(axis=0)
+        centred = values - mean
+        self._combine(len(values), mean, centred.T @ centred)
+        return self
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.comoments)
+        return self
+
+    def correlation(self, columns=None):
+        """
+        Pearson correlation matrix (of a subset of column positions, optionally).
+
+        Constant columns get NaN correlations, as with pandas.
+        """
+        comoments = self.comoments if columns is None else self.comoments[np.ix_(columns, columns)]
+        norms = np.sqrt(np.diag(comoments))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return comoments / np.outer(norms, norms)
@@ -0,0 +1,108 @@
+import numpy as np
+
+def _per_model(values, model_names, default):
+    """Expand an optional {model_name: value} dict into one value per model."""
+    if not values:
+        return np.full(len(model_names), default, dtype=float)
+    unknown = set(values) - set(model_names)
+    if unknown:
+        raise ValueError(f"Unknown model name(s): {', '.join(sorted(unknown))}. "
+                         f"Available: {', '.join(model_names)}")
+    return np.array([values.get(name, default) for name in model_names], dtype=float)
+
+def vote_thresholds(model_names, threshold=0.5, model_thresholds=None):
+    """Probability above which each model votes active (threshold unless overridden)."""
+    return _per_model(model_thresholds, list(model_names), threshold)
+
+def mask_codes(above):
+    """
+    Pack a boolean (n_compounds x n_models) vote matrix into one code per row.
+
+    Bit j of a row's code is set when model j voted active. With up to 64
+    models each code is a single uint64; wider matrices are packed into bytes
+    and compared row-wise.
+
+    Args:
+        above (numpy.ndarray): Boolean vote matrix.
+
+    Returns:
+        tuple: (unique_codes, inverse)
+            - unique_codes: Packed bytes (n_unique x n_bytes) of each distinct vote pattern
+            - inverse: Index into unique_codes for every row
+    """
+    packed = np.packbits(above, axis=1, bitorder='little')
+    if above.shape[1] <= 64:
+        padded = np.zeros((packed.shape[0], 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        codes = padded.view('<u8').ravel()
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        unique_packed = unique_codes.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :packed.shape[1]]
+        return unique_packed, inverse.ravel()
+    unique_packed, inverse = np.unique(packed, axis=0, return_inverse=True)
+    return unique_packed, inverse.ravel()
+
+def mask_values(above):
+    """
+    Vote bitfield of every row: bit j is set when model j voted active.
+
+    The integer type is the smallest unsigned one with a bit per model
+    (uint8 up to 8 models, ..., uint64 up to 64).
+
+    Args:
+        above (numpy.ndarray): Boolean (n_compounds x n_models) vote matrix.
+
+    Returns:
+        numpy.ndarray: One unsigned integer per row.
+    """
+    n_models = above.shape[1]
+    if n_models > 64:
+        raise ValueError(f"A vote bitfield holds at most 64 models, got {n_models}")
+    width = next(n_bytes for n_bytes in (1, 2, 4, 8) if 8 * n_bytes >= n_models)
+    packed = np.packbits(above, axis=1, bitorder='little')
+    padded = np.zeros((above.shape[0], width), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view(f'<u{width}').ravel()
+
+def consensus(prob_matrix, model_names, threshold=0.5, model_thresholds=None, weights=None, labels='names'):
+    """
+    Vectorized consensus over a (n_compounds x n_models) probability matrix.
+
+    Args:
+        prob_matrix (numpy.ndarray): Probability of being active, one column per model.
+        model_names (list): Model name for each column of prob_matrix.
+        threshold (float): A model votes active when its probability is strictly above it.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model vote weights (missing models weigh 1).
+        labels (str): 'names' for the consensus_Model column, 'mask' for the
+            compact consensus_mask column instead.
+
+    Returns:
+        dict: Output columns, in order:
+            - consensus: Number of models voting active
+            - consensus_Model: Comma-separated names of the models voting active
+              (consensus_mask with labels='mask': bit j set when model j voted active)
+            - consensus_weighted: Weighted vote sum (only when weights are given)
+    """
+    prob_matrix = np.asarray(prob_matrix, dtype=float)
+    model_names = list(model_names)
+    above = prob_matrix > vote_thresholds(model_names, threshold, model_thresholds)
+
+    columns = {'consensus': above.sum(axis=1)}
+
+    if labels == 'mask':
+        columns['consensus_mask'] = mask_values(above)
+        if weights is not None:
+            columns['consensus_weighted'] = above @ _per_model(weights, model_names, 1.0)
+        return columns
+
+    # Build the name list once per distinct vote pattern instead of once per row
+    unique_packed, inverse = mask_codes(above)
+    unique_above = np.unpackbits(unique_packed, axis=1, count=len(model_names), bitorder='little').astype(bool)
+    names = np.array(model_names, dtype=object)
+    labels = np.array([', '.join(names[row]) for row in unique_above], dtype=object)
+    columns['consensus_Model'] = labels[inverse]
+
+    if weights is not None:
+        columns['consensus_weighted'] = above @ _per_model(weights, model_names, 1.0)
+
+    return columns
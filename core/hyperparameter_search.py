@@ -0,0 +1,386 @@
+import os
+import math
+import time
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from core import calibration, instrumentation
+
+SEARCH_STRATEGIES = ('grid', 'random', 'halving')
+
+# Per-process state shared by every task a worker runs. It is filled once by
+# _init_worker so the training matrix is not pickled into each task.
+_worker_state = {}
+
+
+def _init_worker(estimators, X, y, folds, limit_threads):
+    _worker_state.clear()
+    _worker_state.update(estimators=estimators, X=X, y=y, folds=folds, fold_arrays={})
+    if limit_threads:
+        # One process per core already; keep OpenMP/BLAS (XGBoost, numpy)
+        # from spawning their own thread pools on top of that.
+        from threadpoolctl import threadpool_limits
+        _worker_state['thread_limits'] = threadpool_limits(1)
+
+
+def _fold_arrays(fold):
+    """
+    Contiguous (X_train, y_train, X_test, y_test) of one fold.
+
+    Each fold is gathered once per process and reused by every candidate of
+    every family, instead of fancy-indexing X for each fit.
+    """
+    cache = _worker_state['fold_arrays']
+    if fold not in cache:
+        X, y = _worker_state['X'], _worker_state['y']
+        train, test = _worker_state['folds'][fold]
+        cache[fold] = (X[train], y[train], X[test], y[test])
+    return cache[fold]
+
+
+def _fit_and_score(name, params, fold, n_samples, keep_scores=False):
+    """
+    Fit one candidate on one CV fold.
+
+    Returns (score, fit_time, wall-clock start, pid, held-out scores); the
+    held-out decision scores (see calibration.decision_scores) are only
+    computed with keep_scores, for families that are calibrated.
+    """
+    X_train, y_train, X_test, y_test = _fold_arrays(fold)
+    if n_samples is not None and n_samples < len(X_train):
+        # Halving rounds: a prefix of the (pre-shuffled) training rows, still contiguous
+        X_train, y_train = X_train[:n_samples], y_train[:n_samples]
+
+    estimator = clone(_worker_state['estimators'][name]).set_params(**params)
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        estimator.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+        score = accuracy_score(y_test, estimator.predict(X_test))
+        held_out = calibration.decision_scores(estimator, X_test) if keep_scores else None
+    except Exception as e:
+        # Same policy as GridSearchCV(error_score=np.nan)
+        fit_time = time.perf_counter() - start
+        warnings.warn(f"{name} fit failed for {params} on fold {fold}: {e}")
+        score = np.nan
+        held_out = None
+    return score, fit_time, started_at, os.getpid(), held_out
+
+
+def _refit(name, params, columns):
+    """Refit the selected candidate on the full training set; returns (estimator, fit_time, start, pid)."""
+    X = pd.DataFrame(_worker_state['X'], columns=columns)
+    estimator = clone(_worker_state['estimators'][name]).set_params(**params)
+    started_at = time.time()
+    start = time.perf_counter()
+    estimator.fit(X, _worker_state['y'])
+    return estimator, time.perf_counter() - start, started_at, os.getpid()
+
+
+class _InlineExecutor:
+    """Executor stand-in that runs tasks immediately in this process."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self):
+        _worker_state.clear()
+
+
+class _FamilySearch:
+    """Scheduling state for the candidates of one model family."""
+
+    def __init__(self, name, candidates, n_folds, n_train, strategy,
+                 max_fits=None, time_budget=None, factor=3, min_resources=20, early_stop=False,
+                 keep_scores=False):
+        self.name = name
+        self.early_stop = early_stop
+        self.keep_scores = keep_scores
+        self.candidates = candidates
+        self.n_folds = n_folds
+        self.max_fits = max_fits
+        self.time_budget = time_budget
+        self.factor = factor
+
+        # Successive halving starts every candidate on a small slice of each
+        # fold's training rows and grows the slice by `factor` per round.
+        if strategy == 'halving' and len(candidates) > 1:
+            n_rounds = int(math.ceil(math.log(len(candidates), factor))) + 1
+            self.resources = [
+                max(min_resources, int(n_train / factor ** (n_rounds - 1 - r)))
+                for r in range(n_rounds)
+            ]
+        else:
+            self.resources = [None]
+
+        self.round = 0
+        self.queue = deque()
+        self.scores = {}
+        self.round_scores = []
+        self.outstanding = 0
+        self.fits = 0
+        self.fit_time = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self.stopped_by_budget = False
+        self.stopped_early = 0
+        self._enqueue(range(len(candidates)))
+
+    def _enqueue(self, candidate_ids):
+        self.scores = {}
+        self.held_out = {}
+        self.best_mean = -np.inf
+        for cand in candidate_ids:
+            for fold in range(self.n_folds):
+                self.queue.append((cand, fold))
+
+    def _budget_exhausted(self):
+        if self.max_fits is not None and self.fits + self.outstanding + self.n_folds > self.max_fits:
+            return True
+        if self.time_budget is not None and self.fit_time >= self.time_budget:
+            return True
+        return False
+
+    def next_task(self):
+        if not self.queue:
+            return None
+        cand, fold = self.queue[0]
+        # Budgets are checked per candidate so every evaluated candidate
+        # gets all of its folds; the first candidate always runs.
+        if fold == 0 and (self.scores or self.round_scores) and self._budget_exhausted():
+            self.queue.clear()
+            self.stopped_by_budget = True
+            if not self.outstanding:
+                self._end_round()
+            return None
+        self.queue.popleft()
+        self.outstanding += 1
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        return self.name, self.candidates[cand], cand, fold, self.resources[self.round]
+
+    def record(self, cand, fold, score, fit_time, held_out=None):
+        self.outstanding -= 1
+        self.fits += 1
+        self.fit_time += fit_time
+        if held_out is not None:
+            self.held_out[cand, fold] = held_out
+        # Keyed by fold: fits finish in any order, but the mean sums them in fold order
+        scores = self.scores.setdefault(cand, {})
+        scores[fold] = score
+        if len(scores) == self.n_folds:
+            self.best_mean = max(self.best_mean, _mean(scores))
+        elif self.early_stop and self.round + 1 == len(self.resources):
+            self._stop_if_dominated(cand, scores)
+        if not self.queue and not self.outstanding:
+            self._end_round()
+
+    def _stop_if_dominated(self, cand, scores):
+        # Even with perfect accuracy on its remaining folds, the candidate's
+        # mean could not reach the best complete one: skip those folds. Only
+        # done in the last round, since halving ranks all complete candidates.
+        upper_bound = _mean({fold: scores.get(fold, 1.0) for fold in range(self.n_folds)})
+        if upper_bound < self.best_mean and any(task[0] == cand for task in self.queue):
+            self.queue = deque(task for task in self.queue if task[0] != cand)
+            self.stopped_early += 1
+
+    def _end_round(self):
+        complete = {c: s for c, s in self.scores.items() if len(s) == self.n_folds}
+        if complete:
+            self.round_scores.append(complete)
+        if self.stopped_by_budget or self.round + 1 >= len(self.resources) or len(complete) <= 1:
+            self.finished_at = time.perf_counter()
+            return
+        self.round += 1
+        ranked = sorted(complete, key=lambda c: (-_mean(complete[c]), c))
+        self._enqueue(sorted(ranked[:max(1, int(math.ceil(len(ranked) / self.factor)))]))
+
+    def best(self):
+        """Return (candidate id, params, mean_score) of the best fully evaluated candidate."""
+        last = self.round_scores[-1]
+        # Ties go to the first candidate, as in GridSearchCV
+        best = min(last, key=lambda c: (-_mean(last[c]), c))
+        return best, self.candidates[best], _mean(last[best])
+
+    def held_out_scores(self, cand, folds):
+        """Out-of-fold decision scores of a candidate, with the training rows they belong to."""
+        if any((cand, fold) not in self.held_out for fold in range(self.n_folds)):
+            return None, None
+        rows = np.concatenate([test for _, test in folds])
+        return rows, np.concatenate([self.held_out[cand, fold] for fold in range(self.n_folds)])
+
+
+def _mean(scores):
+    """Mean of a candidate's {fold: score}, summed in fold order (-inf when a fold failed)."""
+    mean = float(np.mean([scores[fold] for fold in sorted(scores)]))
+    return -np.inf if np.isnan(mean) else mean
+
+
+def _candidates(params, strategy, n_iter, random_state):
+    grid = list(ParameterGrid(params))
+    if strategy == 'random' and n_iter < len(grid):
+        return list(ParameterSampler(params, n_iter=n_iter, random_state=random_state))
+    return grid
+
+
+def effective_n_jobs(n_jobs):
+    """Translate an n_jobs value (None, -1, k) into a worker count."""
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def search(models_params, X, y, cv, strategy='grid', n_jobs=None, n_iter=10,
+           max_fits=None, time_budget=None, random_state=42, early_stop=False, calibration_methods=None):
+    """
+    Hyperparameter search for several model families over one shared pool.
+
+    Every (model, params, fold) fit is an independent task; tasks from all
+    families are interleaved on the same process pool so short families do not
+    leave cores idle while RF/XGB/SVM are still running.
+
+    Args:
+        models_params (dict): name -> (estimator, param_grid), as used by GridSearchCV.
+        X (pandas.DataFrame): Training features.
+        y (pandas.Series): Training labels.
+        cv: A CV splitter (e.g. StratifiedKFold); splits are computed once.
+        strategy (str): 'grid' (exhaustive), 'random' (n_iter sampled candidates)
+            or 'halving' (successive halving on the number of training rows).
+        n_jobs (int): Number of worker processes (None = 1, -1 = all cores).
+        n_iter (int): Candidates per family for the 'random' strategy.
+        max_fits (int): Optional per-family cap on the number of fits.
+        time_budget (float): Optional per-family cap on summed fit seconds.
+        random_state (int): Seed for candidate sampling and halving subsets.
+        early_stop (bool): Stop evaluating a candidate once its mean accuracy can
+            no longer reach the best complete candidate's, even with perfect
+            remaining folds. The selected candidates are unchanged.
+        calibration_methods (dict): name -> 'sigmoid' or 'isotonic' for the families
+            whose refitted estimator is wrapped in a calibration.CalibratedModel.
+            The calibrator is fitted on the held-out decision scores the
+            selected candidate already produced on the CV folds, so it costs
+            no extra fits.
+
+    Returns:
+        tuple: (best_models, best_scores, timings)
+            - best_models: Dictionary of refitted best estimators (calibrated ones wrapped)
+            - best_scores: Dictionary of mean CV accuracy of the best candidate
+            - timings: Dictionary of per-family fits, fit seconds and wall seconds
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{strategy}'. Choose from {SEARCH_STRATEGIES}")
+    calibration_methods = calibration_methods or {}
+    unknown = set(calibration_methods) - set(models_params)
+    if unknown:
+        raise ValueError(f"Cannot calibrate unknown model(s): {', '.join(sorted(unknown))}")
+
+    X_arr = np.asarray(X)
+    y_arr = np.asarray(y)
+    folds = list(cv.split(X_arr, y_arr))
+    if strategy == 'halving':
+        # Halving rounds use a prefix of each fold's training rows, so shuffle
+        # them once to make every prefix a random subsample.
+        rng = np.random.RandomState(random_state)
+        folds = [(rng.permutation(train), test) for train, test in folds]
+
+    families = {
+        name: _FamilySearch(
+            name, _candidates(params, strategy, n_iter, random_state), len(folds),
+            min(len(train) for train, _ in folds), strategy,
+            max_fits=max_fits, time_budget=time_budget, early_stop=early_stop,
+            keep_scores=name in calibration_methods,
+        )
+        for name, (model, params) in models_params.items()
+    }
+    estimators = {name: model for name, (model, params) in models_params.items()}
+
+    n_workers = effective_n_jobs(n_jobs)
+    initargs = (estimators, X_arr, y_arr, folds, n_workers > 1)
+    if n_workers > 1:
+        executor = ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=initargs)
+    else:
+        _init_worker(*initargs)
+        executor = _InlineExecutor()
+
+    try:
+        outstanding = {}
+        max_in_flight = 2 * n_workers
+        while True:
+            # Round-robin across families so every family makes progress
+            submitted = True
+            while submitted and len(outstanding) < max_in_flight:
+                submitted = False
+                for family in families.values():
+                    if len(outstanding) >= max_in_flight:
+                        break
+                    task = family.next_task()
+                    if task is None:
+                        continue
+                    name, params, cand, fold, n_samples = task
+                    future = executor.submit(_fit_and_score, name, params, fold, n_samples, family.keep_scores)
+                    outstanding[future] = (family, cand, fold)
+                    submitted = True
+
+            if not outstanding:
+                break
+            done, _ = wait(list(outstanding), return_when=FIRST_COMPLETED)
+            for future in done:
+                family, cand, fold = outstanding.pop(future)
+                score, fit_time, started_at, pid, held_out = future.result()
+                instrumentation.record('cv_fit', started_at, fit_time, 'fit', pid=pid, model=family.name,
+                                       candidate=cand, fold=fold, round=family.round, score=score)
+                family.record(cand, fold, score, fit_time, held_out)
+
+        # Refit the winners on the whole training set, also in parallel
+        columns = list(X.columns) if hasattr(X, 'columns') else None
+        refits = {}
+        best_scores = {}
+        best_candidates = {}
+        for name, family in families.items():
+            best_candidates[name], params, best_scores[name] = family.best()
+            refits[name] = executor.submit(_refit, name, params, columns)
+
+        best_models = {}
+        timings = {}
+        for name, family in families.items():
+            best_models[name], refit_time, started_at, pid = refits[name].result()
+            instrumentation.record('refit', started_at, refit_time, 'fit', pid=pid, model=name,
+                                   rows=len(y_arr), columns=X_arr.shape[1])
+            if name in calibration_methods:
+                rows, held_out = family.held_out_scores(best_candidates[name], folds)
+                if held_out is None:
+                    raise ValueError(f"{name}: the selected candidate has no held-out scores to calibrate on")
+                with instrumentation.span('calibrate', 'fit', model=name, method=calibration_methods[name],
+                                          rows=len(rows)):
+                    best_models[name] = calibration.calibrate(best_models[name], held_out, y_arr[rows],
+                                                              calibration_methods[name])
+            timings[name] = {
+                'fits': family.fits,
+                'candidates': len(family.candidates),
+                'fit_seconds': round(family.fit_time + refit_time, 3),
+                'wall_seconds': round(family.finished_at - family.started_at + refit_time, 3),
+                'stopped_by_budget': family.stopped_by_budget,
+                'stopped_early': family.stopped_early,
+            }
+    finally:
+        executor.shutdown()
+
+    for name, timing in timings.items():
+        budget_note = ' (budget reached)' if timing['stopped_by_budget'] else ''
+        if timing['stopped_early']:
+            budget_note += f" ({timing['stopped_early']} candidates stopped early)"
+        print(f"{name}: {timing['fits']} fits, {timing['fit_seconds']:.1f}s fit time, "
+              f"{timing['wall_seconds']:.1f}s wall{budget_note}")
+
+    return best_models, best_scores, timings
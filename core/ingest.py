@@ -0,0 +1,141 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from core import instrumentation
+
+# Columns removed by prepare_files anyway; they are never parsed
+DATAWARRIOR_DROP_COLUMNS = ['Structure of smiles [idcode]', 'smiles']
+GOLD_DROP_COLUMNS = ['Index', 'Rescore.Rmsd', 'Version']
+
+DATAWARRIOR_NAME_COLUMN = 'name'
+GOLD_NAME_COLUMN = 'Entry'
+
+def default_engine():
+    """CSV parser engine: pyarrow (multi-threaded) when installed, else pandas' C parser."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    return 'pyarrow'
+
+def _keep_column(column, drop_columns):
+    # DataWarrior writes a trailing tab, which pandas reads as an empty 'Unnamed: N' column
+    return column not in drop_columns and not column.startswith('Unnamed:')
+
+def schema(path, sep, name_column, drop_columns, descriptor_dtype=np.float32):
+    """
+    Column selection and dtype map of an export, built from its header line.
+
+    Args:
+        path (str): File to inspect.
+        sep (str): Field separator.
+        name_column (str): Column holding compound identifiers (read as categorical).
+        drop_columns (list): Columns that are not parsed at all.
+        descriptor_dtype: dtype of every other column.
+
+    Returns:
+        tuple: (usecols, dtype) for pandas.read_csv.
+    """
+    header = pd.read_csv(path, sep=sep, nrows=0).columns
+    if name_column not in header:
+        raise ValueError(f"{path} has no '{name_column}' column")
+    usecols = [column for column in header if _keep_column(column, drop_columns)]
+    dtype = {column: descriptor_dtype for column in usecols}
+    dtype[name_column] = 'category'
+    return usecols, dtype
+
+def _read_typed(path, sep, name_column, drop_columns, descriptor_dtype, engine):
+    usecols, dtype = schema(path, sep, name_column, drop_columns, descriptor_dtype)
+    engine = engine or default_engine()
+    try:
+        return pd.read_csv(path, sep=sep, usecols=usecols, dtype=dtype, engine=engine)
+    except ValueError:
+        # A descriptor with text in it: parse it loosely, text becomes NaN as in pre_treatment
+        df = pd.read_csv(path, sep=sep, usecols=usecols, dtype={name_column: 'category'}, engine=engine)
+        descriptors = [column for column in usecols if column != name_column]
+        df[descriptors] = df[descriptors].apply(pd.to_numeric, errors='coerce').astype(descriptor_dtype)
+        return df
+
+def normalize_names(names, entry_field=None):
+    """
+    Clean compound identifiers: drop the 'Resultados/' folder and '.pdb' suffix, strip and upper-case.
+
+    The string operations run once per distinct name (the categories), not once per row.
+
+    Args:
+        names (pandas.Series): Categorical (or string) identifiers.
+        entry_field (int): For GOLD 'Entry' values, the '|'-separated field holding the file name.
+
+    Returns:
+        pandas.Series: Normalised names, same index.
+    """
+    names = names.astype('category')
+    unique = pd.Series(names.cat.categories, dtype=object)
+    if entry_field is not None:
+        unique = unique.str.split('|').str[entry_field]
+    unique = unique.str.replace('Resultados/', '', regex=False)
+    unique = unique.str.replace('.pdb', '', regex=False)
+    unique = unique.str.strip().str.upper()
+
+    codes = names.cat.codes.to_numpy()
+    values = np.append(unique.to_numpy(dtype=object), np.nan)[codes]  # code -1 (missing) -> NaN
+    return pd.Series(values, index=names.index, name='name')
+
+def _cached(kind, path, params, reader, cache):
+    with instrumentation.span(kind, 'io', file=os.path.basename(path)) as span:
+        if cache is None:
+            df = reader()
+        else:
+            key = cache.key(kind, sys.modules[__name__], [cache.file_digest(path)], params)
+            hit = cache.get(key)
+            span.set(cached=hit is not None)
+            if hit is not None:
+                df = hit[0]
+            else:
+                df = reader()
+                cache.put(key, kind, df)
+        span.set(rows=df.shape[0], columns=df.shape[1])
+    return df
+
+def read_datawarrior(path, descriptor_dtype=np.float32, engine=None, cache=None):
+    """
+    Read a DataWarrior tab-separated export.
+
+    Args:
+        path (str): The .txt export.
+        descriptor_dtype: dtype of the descriptor columns (float32 halves memory).
+        engine (str): pandas.read_csv engine (default: see default_engine).
+        cache (core.stage_cache.StageCache): If given, the parsed frame is stored
+            there and later reads of the same file content load the binary copy.
+
+    Returns:
+        pandas.DataFrame: 'name' (normalised) followed by the descriptor columns.
+    """
+    def reader():
+        df = _read_typed(path, '\t', DATAWARRIOR_NAME_COLUMN, DATAWARRIOR_DROP_COLUMNS, descriptor_dtype, engine)
+        df[DATAWARRIOR_NAME_COLUMN] = normalize_names(df[DATAWARRIOR_NAME_COLUMN])
+        return df
+
+    return _cached('ingest_datawarrior', path, {'descriptor_dtype': np.dtype(descriptor_dtype).name}, reader, cache)
+
+def read_gold(path, descriptor_dtype=np.float32, engine=None, cache=None):
+    """
+    Read a GOLD consolidated CSV.
+
+    Args:
+        path (str): The consolidated .csv.
+        descriptor_dtype: dtype of the score columns.
+        engine (str): pandas.read_csv engine (default: see default_engine).
+        cache (core.stage_cache.StageCache): Optional binary copy cache, as in read_datawarrior.
+
+    Returns:
+        pandas.DataFrame: 'name' (normalised from 'Entry') followed by the score columns.
+    """
+    def reader():
+        df = _read_typed(path, ',', GOLD_NAME_COLUMN, GOLD_DROP_COLUMNS, descriptor_dtype, engine)
+        df[GOLD_NAME_COLUMN] = normalize_names(df[GOLD_NAME_COLUMN], entry_field=1)
+        return df.rename(columns={GOLD_NAME_COLUMN: 'name'})
+
+    return _cached('ingest_gold', path, {'descriptor_dtype': np.dtype(descriptor_dtype).name}, reader, cache)
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import time
+import uuid
+import platform
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in KiB elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+class Span:
+    """Attributes of an open span; set() adds counts (rows, columns, ...) while it runs."""
+
+    __slots__ = ('name', 'category', 'attrs', 'span_id', 'parent_id')
+
+    def __init__(self, name, category, attrs, span_id=None, parent_id=None):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.span_id = span_id
+        self.parent_id = parent_id
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+class Tracer:
+    """
+    Timing spans written to a trace file.
+
+    Each span records its name, category (stage, io, fit, predict, ...),
+    wall-clock start, duration, the process' peak RSS when it closed, its
+    parent span and free-form attributes such as row and column counts.
+    Two output formats:
+        - 'jsonl': one JSON object per line, flushed as spans close, starting
+          with a 'run' record (run id, command line, host). Traces of many
+          runs can be concatenated and aggregated line by line.
+        - 'chrome': the Chrome trace event format ('X' complete events),
+          written on close; open it in chrome://tracing or Perfetto.
+    A tracer without a path is disabled and its spans cost next to nothing.
+    """
+
+    def __init__(self, path=None, fmt='jsonl', run_info=None):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}'. Choose from {TRACE_FORMATS}")
+        self.path = path
+        self.fmt = fmt
+        self.enabled = path is not None
+        self.run_id = uuid.uuid4().hex[:16]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+        self._events = []
+        self._file = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if fmt == 'jsonl':
+                self._file = open(path, 'a')
+                self._write({'type': 'run', 'run_id': self.run_id, 'pid': os.getpid(),
+                             'start': time.time(), 'argv': sys.argv, 'host': platform.node(),
+                             **(run_info or {})})
+
+    def _write(self, record):
+        with self._lock:
+            if self.fmt == 'jsonl':
+                self._file.write(json.dumps(record, default=str) + '\n')
+                self._file.flush()
+            else:
+                self._events.append(record)
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _new_id(self):
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def record(self, name, start, duration, category='span', pid=None, parent_id=None, **attrs):
+        """
+        Record a span measured elsewhere (e.g. a CV fit timed in a worker process).
+
+        Args:
+            name (str): Span name.
+            start (float): Wall-clock start (time.time()).
+            duration (float): Duration in seconds.
+            category (str): Span category.
+            pid (int): Process the work ran in (default: this one).
+            parent_id (int): Enclosing span (default: the innermost open span of this thread).
+            **attrs: Extra attributes.
+        """
+        if not self.enabled:
+            return
+        if parent_id is None:
+            stack = self._stack()
+            parent_id = stack[-1].span_id if stack else None
+        self._emit(name, category, start, duration, attrs, self._new_id(), parent_id, pid or os.getpid(),
+                   rss=None)
+
+    def _emit(self, name, category, start, duration, attrs, span_id, parent_id, pid, rss):
+        if self.fmt == 'jsonl':
+            self._write({'type': 'span', 'run_id': self.run_id, 'id': span_id, 'parent': parent_id,
+                         'name': name, 'cat': category, 'pid': pid, 'tid': threading.get_ident(),
+                         'start': start, 'duration_s': duration, 'peak_rss_mb': rss, 'attrs': attrs})
+        else:
+            args = dict(attrs, peak_rss_mb=rss) if rss is not None else dict(attrs)
+            self._write({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': threading.get_ident(),
+                         'ts': start * 1e6, 'dur': duration * 1e6, 'args': args})
+
+    @contextmanager
+    def span(self, name, category='span', **attrs):
+        """
+        Time the enclosed block.
+
+        Yields:
+            Span: Call .set(rows=..., columns=...) to attach counts.
+        """
+        if not self.enabled:
+            yield Span(name, category, attrs)
+            return
+        stack = self._stack()
+        span = Span(name, category, attrs, self._new_id(), stack[-1].span_id if stack else None)
+        stack.append(span)
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs['error'] = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            self._emit(name, category, start_wall, duration, span.attrs, span.span_id, span.parent_id,
+                       os.getpid(), peak_rss_mb())
+
+    def close(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.fmt == 'jsonl':
+                self._file.close()
+            else:
+                with open(self.path, 'w') as file:
+                    json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms',
+                               'otherData': {'run_id': self.run_id, 'argv': sys.argv}}, file, default=str)
+        self.enabled = False
+
+# The process-wide tracer; disabled until configure() is called (cli --trace)
+_tracer = Tracer()
+
+def configure(path=None, fmt='jsonl', run_info=None):
+    """Replace the process-wide tracer (closing the previous one) and return it."""
+    global _tracer
+    _tracer.close()
+    _tracer = Tracer(path, fmt, run_info)
+    return _tracer
+
+def get_tracer():
+    return _tracer
+
+def span(name, category='span', **attrs):
+    """Span of the process-wide tracer (see Tracer.span)."""
+    return _tracer.span(name, category, **attrs)
+
+def record(name, start, duration, category='span', **attrs):
+    """Externally measured span of the process-wide tracer (see Tracer.record)."""
+    _tracer.record(name, start, duration, category, **attrs)
+
+@contextmanager
+def profiled(path=None):
+    """
+    Run the enclosed block under cProfile and dump the stats to path.
+
+    The .prof file can be read with pstats, snakeviz or converted for
+    flamegraph tools. Sampling profilers such as py-spy need no hook: attach
+    to the printed pid (py-spy record --pid ...) or run the CLI under them.
+    """
+    if path is None:
+        yield None
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
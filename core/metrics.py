@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+# Output columns of the metrics table: (column, metric, scale, rounding).
+# The sklearn scores (kappa, MCC, AUC) used to be Python floats, rounded with
+# the builtin round; the others numpy floats, rounded with numpy's.
+METRIC_COLUMNS = [
+    ('Revocação', 'recall', 100, 'numpy'),
+    ('Precisão', 'precision', 100, 'numpy'),
+    ('Sensibilidade', 'recall', 100, 'numpy'),
+    ('Especificidade', 'specificity', 100, 'numpy'),
+    ('Acurácia', 'accuracy', 100, 'numpy'),
+    ('Erro', 'error', 100, 'numpy'),
+    ('Medida F', 'f_measure', 1, 'numpy'),
+    ('Kappa de Cohen', 'kappa', 1, 'python'),
+    ('MCC', 'mcc', 1, 'python'),
+    ('AUC ROC', 'auc', 1, 'python'),
+]
+
+def _round(values, rounding, decimals=2):
+    if rounding == 'python':
+        return np.array([round(float(value), decimals) for value in np.ravel(values)]).reshape(np.shape(values))
+    return np.round(values, decimals)
+
+def _ratio(numerator, denominator, undefined=0.0):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), undefined)
+
+def confusion_counts(y_true, y_pred):
+    """
+    Binary confusion matrix entries along the last axis.
+
+    Args:
+        y_true (numpy.ndarray): 0/1 labels, broadcastable against y_pred.
+        y_pred (numpy.ndarray): 0/1 predictions (... x n_samples).
+
+    Returns:
+        tuple: (tp, fp, tn, fn), each with y_pred's leading shape.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_pred = np.asarray(y_pred).astype(bool)
+    tp = np.count_nonzero(y_true & y_pred, axis=-1)
+    fp = np.count_nonzero(~y_true & y_pred, axis=-1)
+    tn = np.count_nonzero(~y_true & ~y_pred, axis=-1)
+    fn = np.count_nonzero(y_true & ~y_pred, axis=-1)
+    return tp, fp, tn, fn
+
+def roc_auc(y_true, y_score):
+    """
+    ROC AUC along the last axis, from the ranks of the scores (Mann-Whitney U).
+
+    Tied scores get their average rank, which gives the same value as
+    sklearn's roc_auc_score. Rows without both classes get NaN.
+
+    Args:
+        y_true (numpy.ndarray): 0/1 labels, broadcastable against y_score.
+        y_score (numpy.ndarray): Scores (... x n_samples).
+
+    Returns:
+        numpy.ndarray: AUC per row of y_score.
+    """
+    y_score = np.asarray(y_score, dtype=float)
+    positive = np.broadcast_to(np.asarray(y_true).astype(bool), y_score.shape)
+    ranks = rankdata(y_score, axis=-1)
+    n_pos = np.count_nonzero(positive, axis=-1)
+    n_neg = positive.shape[-1] - n_pos
+    u = np.where(positive, ranks, 0).sum(axis=-1) - n_pos * (n_pos + 1) / 2
+    return _ratio(u, n_pos * n_neg, undefined=np.nan)
+
+def binary_metrics(y_true, y_pred, y_prob):
+    """
+    Every metric of the metrics table, vectorized over leading axes.
+
+    y_pred and y_prob may stack several models and/or resamples
+    (e.g. n_models x n_samples); each row is scored against y_true.
+    Undefined ratios are 0, as in the original per-model evaluation;
+    undefined kappa, MCC and AUC follow sklearn (NaN, 0 and NaN).
+
+    Args:
+        y_true (numpy.ndarray): 0/1 labels, broadcastable against y_pred.
+        y_pred (numpy.ndarray): 0/1 predictions.
+        y_prob (numpy.ndarray): Positive-class probabilities, same shape as y_pred.
+
+    Returns:
+        dict: Metric name -> numpy.ndarray of y_pred's leading shape. Fractions, not %.
+    """
+    tp, fp, tn, fn = confusion_counts(y_true, y_pred)
+    tp, fp, tn, fn = (np.asarray(count, dtype=float) for count in (tp, fp, tn, fn))
+    n = tp + fp + tn + fn
+
+    accuracy = (tp + tn) / n
+    recall = _ratio(tp, tp + fn)
+    specificity = _ratio(tn, tn + fp)
+    precision = _ratio(tp, tp + fp)
+
+    # Kappa and MCC are evaluated in the same order of operations as sklearn's
+    # cohen_kappa_score and matthews_corrcoef, so they round the same way.
+    # Cohen's kappa: 1 - observed / chance disagreement
+    expected_disagreement = (tn + fn) * (fn + tp) / n + (fp + tp) * (tn + fp) / n
+    kappa = 1 - _ratio(fp + fn, expected_disagreement, undefined=np.nan)
+
+    # Matthews correlation coefficient from the true/predicted class totals
+    cov_ytyp = (tn + tp) * n - ((tn + fp) * (tn + fn) + (fn + tp) * (fp + tp))
+    cov_ypyp = n ** 2 - ((tn + fn) ** 2 + (fp + tp) ** 2)
+    cov_ytyt = n ** 2 - ((tn + fp) ** 2 + (fn + tp) ** 2)
+    mcc = _ratio(cov_ytyp, np.sqrt(cov_ypyp * cov_ytyt))
+
+    return {
+        'accuracy': accuracy,
+        'error': 1 - accuracy,
+        'recall': recall,
+        'specificity': specificity,
+        'precision': precision,
+        # Harmonic mean of sensitivity and specificity (as in 4_smote_ml_v2.py)
+        'f_measure': _ratio(2 * recall * specificity, recall + specificity),
+        'kappa': kappa,
+        'mcc': mcc,
+        'auc': roc_auc(y_true, y_prob),
+    }
+
+def bootstrap_intervals(y_true, y_pred, y_prob, n_boot=1000, confidence=0.95, random_state=42, batch_size=200):
+    """
+    Percentile bootstrap confidence intervals of every metric.
+
+    The same resampled rows are used for every model, and resamples are
+    scored in batches of batch_size with one vectorized binary_metrics call.
+
+    Args:
+        y_true (numpy.ndarray): 0/1 labels (n_samples).
+        y_pred (numpy.ndarray): Predictions (n_models x n_samples).
+        y_prob (numpy.ndarray): Probabilities (n_models x n_samples).
+        n_boot (int): Number of bootstrap resamples.
+        confidence (float): Coverage of the intervals.
+        random_state (int): Seed of the resampling.
+        batch_size (int): Resamples scored per batch (bounds memory).
+
+    Returns:
+        dict: Metric name -> (low, high) arrays of length n_models.
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.atleast_2d(y_pred)
+    y_prob = np.atleast_2d(y_prob)
+    rng = np.random.default_rng(random_state)
+    n_samples = len(y_true)
+
+    samples = {}
+    for start in range(0, n_boot, batch_size):
+        rows = rng.integers(0, n_samples, size=(min(batch_size, n_boot - start), n_samples))
+        # (n_models x batch x n_samples)
+        batch = binary_metrics(y_true[rows], y_pred[:, rows], y_prob[:, rows])
+        for name, values in batch.items():
+            samples.setdefault(name, []).append(values)
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for name, values in samples.items():
+        values = np.concatenate(values, axis=1)
+        # Resamples with a single class have no AUC/kappa
+        intervals[name] = tuple(np.nanquantile(values, [alpha, 1 - alpha], axis=1))
+    return intervals
+
+def metrics_table(model_names, splits, n_boot=0, confidence=0.95, random_state=42):
+    """
+    The metrics table written by create-model, for several models and data splits.
+
+    Args:
+        model_names (list): Model names, in output order.
+        splits (list): (split_name, y_true, y_pred, y_prob) tuples; y_pred and
+            y_prob are (n_models x n_samples), one row per model name.
+        n_boot (int): When > 0, add '<column> IC inf' / '<column> IC sup'
+            bootstrap interval columns.
+        confidence (float): Coverage of the bootstrap intervals.
+        random_state (int): Seed of the bootstrap resampling.
+
+    Returns:
+        pandas.DataFrame: One row per (model, split), models outer, with the
+            columns Modelo, Banco and METRIC_COLUMNS (rounded as before).
+    """
+    blocks = []
+    for split_name, y_true, y_pred, y_prob in splits:
+        values = binary_metrics(np.asarray(y_true), np.asarray(y_pred), np.asarray(y_prob))
+        block = {'Modelo': list(model_names), 'Banco': split_name}
+        for column, name, scale, rounding in METRIC_COLUMNS:
+            block[column] = _round(values[name] * scale, rounding)
+        if n_boot:
+            intervals = bootstrap_intervals(y_true, y_pred, y_prob, n_boot, confidence, random_state)
+            for column, name, scale, _ in METRIC_COLUMNS:
+                low, high = intervals[name]
+                block[f'{column} IC inf'] = np.round(low * scale, 2)
+                block[f'{column} IC sup'] = np.round(high * scale, 2)
+        blocks.append(pd.DataFrame(block))
+
+    # Interleave splits per model: model 1 train, model 1 test, model 2 train, ...
+    table = pd.concat(blocks, keys=range(len(blocks)), names=['split', 'model'])
+    order = table.index.to_frame(index=False).sort_values(['model', 'split'], kind='stable').index
+    return table.iloc[order].reset_index(drop=True)
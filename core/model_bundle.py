@@ -0,0 +1,235 @@
+import os
+import json
+import hashlib
+import platform
+import shutil
+import tempfile
+import warnings
+from datetime import datetime
+
+BUNDLE_SUFFIX = '.bundle'
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+def bundle_path(models_dir, prefix):
+    """Directory of the bundle for prefix inside models_dir."""
+    return os.path.join(models_dir, f"{prefix}{BUNDLE_SUFFIX}")
+
+def find_bundles(models_dir):
+    """
+    List the model bundles in a directory.
+
+    Args:
+        models_dir (str): Directory containing model files.
+
+    Returns:
+        list: Bundle prefixes, sorted.
+    """
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(
+        entry[:-len(BUNDLE_SUFFIX)] for entry in os.listdir(models_dir)
+        if entry.endswith(BUNDLE_SUFFIX)
+        and os.path.isfile(os.path.join(models_dir, entry, MANIFEST_NAME))
+    )
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _package_versions():
+    from importlib.metadata import version, PackageNotFoundError
+    versions = {'python': platform.python_version()}
+    for package in ['scikit-learn', 'xgboost', 'numpy', 'pandas']:
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            pass
+    return versions
+
+def save_bundle(models_dir, prefix, models, feature_names, artifacts=None, config=None):
+    """
+    Write models and their preprocessing artifacts as a single versioned bundle.
+
+    The bundle is a directory holding a JSON manifest and one uncompressed
+    joblib payload per object. Uncompressed payloads keep numpy arrays (SVM
+    support vectors, tree node arrays) at aligned offsets so they can be
+    memory-mapped instead of copied when loaded.
+
+    The bundle is written into a temporary directory next to it and then
+    renamed into place, so readers see either the previous bundle or the new
+    one, never a mix, and files of the previous bundle are not left behind.
+    Payloads of a previous bundle that are still memory-mapped stay valid.
+
+    Args:
+        models_dir (str): Directory to create the bundle in.
+        prefix (str): Bundle name (the create-model output prefix).
+        models (dict): Model name -> fitted classifier.
+        feature_names (list): Feature columns expected by the models, in order.
+        artifacts (dict): Other objects to store, e.g. {'scaler': scaler}.
+        config (dict): JSON-serialisable run information.
+
+    Returns:
+        str: Path of the bundle directory.
+    """
+    import joblib
+
+    path = bundle_path(models_dir, prefix)
+    os.makedirs(models_dir, exist_ok=True)
+    # Not named *.bundle, so find_bundles ignores it while it is written
+    tmp_dir = tempfile.mkdtemp(prefix=f".{prefix}{BUNDLE_SUFFIX}.", dir=models_dir)
+
+    def dump(obj, name, kind):
+        file_name = f"{kind}_{name}.joblib"
+        file_path = os.path.join(tmp_dir, file_name)
+        joblib.dump(obj, file_path)
+        return {
+            'file': file_name,
+            'class': f"{type(obj).__module__}.{type(obj).__name__}",
+            'bytes': os.path.getsize(file_path),
+            'sha256': _sha256(file_path),
+        }
+
+    try:
+        manifest = {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'prefix': prefix,
+            'created_at': datetime.now().strftime("%Y%m%d_%H%M%S"),
+            'feature_names': [str(name) for name in feature_names],
+            'models': {name: dump(model, name, 'model') for name, model in models.items()},
+            'artifacts': {name: dump(obj, name, 'artifact') for name, obj in (artifacts or {}).items()},
+            'versions': _package_versions(),
+            'config': config or {},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.chmod(tmp_dir, 0o755)
+
+        # A directory cannot be renamed over a non-empty one: move the previous bundle aside first
+        previous = None
+        if os.path.exists(path):
+            previous = f"{tmp_dir}.previous"
+            os.rename(path, previous)
+        os.rename(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+    return path
+
+class ModelBundle:
+    """
+    Lazily loaded model bundle.
+
+    Opening a bundle only reads its manifest; each model or artifact is loaded
+    (memory-mapped) the first time it is requested, after checking its
+    payload against the manifest's sha256 checksum (unless verify is False).
+    """
+
+    def __init__(self, path, mmap_mode='c', verify=True):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.verify = verify
+        with open(os.path.join(path, MANIFEST_NAME)) as file:
+            self.manifest = json.load(file)
+        if self.manifest.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Bundle {path} has format version {self.manifest['format_version']}, "
+                             f"this version of the tool reads up to {BUNDLE_FORMAT_VERSION}")
+        self._cache = {}
+        self._checked_versions = False
+
+    @property
+    def prefix(self):
+        return self.manifest['prefix']
+
+    @property
+    def model_names(self):
+        return list(self.manifest['models'])
+
+    @property
+    def feature_names(self):
+        return list(self.manifest['feature_names'])
+
+    def _check_versions(self):
+        if self._checked_versions:
+            return
+        self._checked_versions = True
+        saved = self.manifest.get('versions', {})
+        current = _package_versions()
+        for package in ['scikit-learn', 'xgboost']:
+            if package in saved and package in current and saved[package] != current[package]:
+                warnings.warn(f"Bundle '{self.prefix}' was saved with {package} {saved[package]}, "
+                              f"running {current[package]}")
+
+    def _load(self, entry):
+        import joblib
+        from sklearn.exceptions import InconsistentVersionWarning
+
+        file_path = os.path.join(self.path, entry['file'])
+        if file_path not in self._cache:
+            if self.verify and _sha256(file_path) != entry['sha256']:
+                raise ValueError(f"Checksum mismatch for {file_path}: the bundle payload changed after it "
+                                 f"was saved")
+            self._check_versions()
+            with warnings.catch_warnings():
+                # Version differences are reported once by _check_versions
+                warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+                self._cache[file_path] = joblib.load(file_path, mmap_mode=self.mmap_mode)
+        return self._cache[file_path]
+
+    def load_model(self, name):
+        if name not in self.manifest['models']:
+            raise ValueError(f"Model '{name}' not in bundle '{self.prefix}'. "
+                             f"Available: {', '.join(self.model_names)}")
+        return self._load(self.manifest['models'][name])
+
+    def load_models(self, names=None):
+        """
+        Load the requested models (all by default), in bundle order.
+
+        Args:
+            names (list): Optional subset of model names.
+
+        Returns:
+            dict: Model name -> model object.
+        """
+        if names is None:
+            names = self.model_names
+        else:
+            unknown = set(names) - set(self.model_names)
+            if unknown:
+                raise ValueError(f"Model(s) {', '.join(sorted(unknown))} not in bundle '{self.prefix}'. "
+                                 f"Available: {', '.join(self.model_names)}")
+            names = [name for name in self.model_names if name in names]
+        return {name: self.load_model(name) for name in names}
+
+    def has_artifact(self, name):
+        return name in self.manifest.get('artifacts', {})
+
+    def load_artifact(self, name):
+        if not self.has_artifact(name):
+            raise ValueError(f"Artifact '{name}' not in bundle '{self.prefix}'")
+        return self._load(self.manifest['artifacts'][name])
+
+def open_bundle(models_dir, prefix, mmap_mode='c', verify=True):
+    """
+    Open the bundle for prefix without loading any model.
+
+    Args:
+        models_dir (str): Directory containing model bundles.
+        prefix (str): Bundle name.
+        mmap_mode (str): joblib mmap_mode for payloads ('c' maps copy-on-write, None copies into memory).
+        verify (bool): Check payload checksums when they are loaded.
+
+    Returns:
+        ModelBundle: The opened bundle.
+    """
+    path = bundle_path(models_dir, prefix)
+    if not os.path.isfile(os.path.join(path, MANIFEST_NAME)):
+        raise ValueError(f"No model bundle '{prefix}' found in {models_dir}")
+    return ModelBundle(path, mmap_mode=mmap_mode, verify=verify)
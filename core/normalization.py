@@ -1,14 +1,65 @@
 import os
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
+from core.storage import as_frame
 
-def process(input_file):
+def correlated_columns(data, cutoff=0.5, dtype=np.float64, block_size=None):
+    """
+    Find the columns to drop because they correlate with an earlier column.
+    
+    Column i is dropped when |corr(i, j)| > cutoff for any column j < i,
+    which is the rule of the original lower-triangle loop. The Pearson
+    correlation is computed as blocks of Z.T @ Z on standardised columns, so
+    only a (block_size x p) slice of the p x p matrix exists at any time.
+    Constant columns have an undefined correlation and are never dropped,
+    as with pandas.
+    
+    Args:
+        data (numpy.ndarray): Feature matrix (n_samples x p).
+        cutoff (float): Absolute correlation above which a column is dropped.
+        dtype: Computation dtype (np.float32 halves memory and time).
+        block_size (int): Rows of the correlation matrix computed at once
+            (default: all of them for p <= 2048, else 1024).
+    
+    Returns:
+        numpy.ndarray: Boolean mask over the p columns, True for columns to drop.
+    """
+    Z = np.array(data, dtype=dtype)
+    n, p = Z.shape
+    if block_size is None:
+        block_size = p if p <= 2048 else 1024
+    
+    # Standardise in place: centred columns scaled to unit norm, so that the
+    # dot product of two columns is their correlation
+    Z -= Z.mean(axis=0)
+    norms = np.sqrt(np.einsum('ij,ij->j', Z, Z))
+    constant = norms == 0
+    norms[constant] = 1
+    Z /= norms
+    
+    drop = np.zeros(p, dtype=bool)
+    for start in range(0, p, block_size):
+        stop = min(start + block_size, p)
+        # Rows start..stop of the correlation matrix, columns 0..stop
+        block = np.abs(Z[:, start:stop].T @ Z[:, :stop])
+        # Keep only the strict lower triangle (j < i)
+        block[np.arange(stop)[None, :] >= np.arange(start, stop)[:, None]] = 0
+        drop[start:stop] = (block > cutoff).any(axis=1)
+    drop[constant] = False
+    
+    return drop
+
+def process(data, corr_cutoff=0.5, corr_dtype=np.float64, corr_block_size=None):
     """
     Normalize data and remove correlated features.
     This is based on 3_tratamento_normaliz.py.
     
     Args:
-        input_file (str): Path to the input CSV file.
+        data (pandas.DataFrame or str): Output of pre_treatment, or a path to it as CSV.
+        corr_cutoff (float): Absolute correlation above which a later column is dropped.
+        corr_dtype: dtype of the correlation computation (np.float64 or np.float32).
+        corr_block_size (int): Rows of the correlation matrix computed at once.
     
     Returns:
         tuple: (processed_df, scaler)
@@ -16,35 +67,28 @@ def process(input_file):
             - scaler: The fitted MinMaxScaler for future use.
     """
     # Load the dataframe
-    df = pd.read_csv(input_file, delimiter=',')
+    df = as_frame(data)
     
-    # Extract name and activity columns
-    df_name = df.pop('name')
-    df_atividade = df.pop('atividade')
+    # Extract name and activity columns (without modifying the caller's frame)
+    df_name = df['name']
+    df_atividade = df['atividade']
+    df = df.drop(columns=['name', 'atividade'])
     
     # Initialize the MinMaxScaler
     scaler = MinMaxScaler()
     
     # Normalize the DataFrame
-    df_normalizado = pd.DataFrame(scaler.fit_transform(df), columns=df.columns)
-    
-    # Calculate correlation matrix
-    cor_matrix = df_normalizado.corr()
+    normalizado = scaler.fit_transform(df)
+    df_normalizado = pd.DataFrame(normalizado, columns=df.columns)
     
-    # Remove highly correlated columns (correlation > 0.5)
-    corte = 0.5
-    to_drop = set()
-    for i in range(len(cor_matrix.columns)):
-        for j in range(i):
-            if abs(cor_matrix.iloc[i, j]) > corte:
-                colname = cor_matrix.columns[i]
-                to_drop.add(colname)
+    # Remove highly correlated columns (correlation > corr_cutoff with an earlier column)
+    to_drop = df.columns[correlated_columns(normalizado, corr_cutoff, corr_dtype, corr_block_size)]
     
     # Create reduced dataframe
     df_reduced = df_normalizado.drop(columns=to_drop)
     
-    # Add back the activity column
-    df_reduced.loc[:, 'atividade'] = df_atividade
+    # Add back the activity column (by position, df_reduced has a fresh index)
+    df_reduced.loc[:, 'atividade'] = df_atividade.to_numpy()
     
     # For preserving columns of interest as described in the original script
     # This part would normally save minmax_scaler_interest.pkl but we'll return the scaler instead
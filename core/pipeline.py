@@ -0,0 +1,322 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core import column_stats, ingest, prepare_files, pre_treatment, normalization, train_models, model_bundle
+from core import instrumentation, transform as transform_module
+from core.instrumentation import peak_rss_mb
+from core.transform import PreprocessingTransform
+from core.storage import write_frame
+
+class StageReport:
+    """
+    Wall time and memory of each pipeline stage.
+
+    Memory comes from the process' peak RSS, a high-water mark that never
+    goes down: each stage records how much it raised that peak (0 when it
+    stayed under an earlier stage's peak) and the cumulative peak so far.
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, banner=None):
+        """Time a stage; yields its trace span (see core.instrumentation) for row/column counts."""
+        if banner:
+            self.log(banner)
+        peak_before = peak_rss_mb()
+        start = time.perf_counter()
+        with instrumentation.span(name, 'stage') as span:
+            yield span
+        peak = peak_rss_mb()
+        self.stages.append({
+            'stage': name,
+            'seconds': round(time.perf_counter() - start, 3),
+            'peak_rss_growth_mb': None if peak is None else round(peak - peak_before, 1),
+            'peak_rss_mb': None if peak is None else round(peak, 1),
+        })
+
+    def cached(self, name):
+        """Record a stage whose output came from the stage cache."""
+        self.stages.append({'stage': name, 'seconds': 0.0, 'peak_rss_growth_mb': None, 'peak_rss_mb': None,
+                            'cached': True})
+
+    def summary(self):
+        lines = [f"{'stage':<16}{'wall (s)':>10}{'peak RSS +MiB':>16}{'cumulative peak MiB':>22}"]
+        for entry in self.stages:
+            if entry.get('cached'):
+                lines.append(f"{entry['stage']:<16}{'cached':>10}{'-':>16}{'-':>22}")
+                continue
+            growth = '-' if entry['peak_rss_growth_mb'] is None else f"{entry['peak_rss_growth_mb']:.1f}"
+            peak = '-' if entry['peak_rss_mb'] is None else f"{entry['peak_rss_mb']:.1f}"
+            lines.append(f"{entry['stage']:<16}{entry['seconds']:>10.2f}{growth:>16}{peak:>22}")
+        return '\n'.join(lines)
+
+STAGES = ['prepare_files', 'pre_treatment', 'normalization']
+
+# With streaming_preprocessing, pre_treatment and normalization are one stage
+STREAMING_STAGES = ['prepare_files', 'preprocessing']
+
+def stream_preprocessing(df_final, max_zero_fraction=0.5, min_variance=0.01, corr_cutoff=0.5,
+                         chunk_rows=pre_treatment.DEFAULT_CHUNK_ROWS, descriptor_dtype=None):
+    """
+    pre_treatment and normalization in row chunks, with a streaming PreprocessingTransform fit.
+
+    The statistics are accumulated chunk by chunk and the reduced features
+    are produced chunk by chunk, so no full-size converted, scaled or
+    standardised copy of df_final is made. Given a CSV path, df_final is
+    read twice with a chunked reader (pre_treatment.read_chunks), once for
+    the fit and once for the transform, and never held in memory as a whole.
+    The kept columns and scaled values are those of the two stages; the
+    correlations come from accumulated co-moments, so a correlation within
+    rounding of corr_cutoff may be decided differently.
+
+    Args:
+        df_final (pandas.DataFrame or str): Output of prepare_files, or a path to it as CSV.
+        max_zero_fraction, min_variance, corr_cutoff: As for the two stages.
+        chunk_rows (int): Rows converted (or read) at a time.
+        descriptor_dtype: dtype the descriptors of a CSV are parsed as (default: inferred).
+
+    Returns:
+        tuple: (df_reduced, transform) - the normalization stage's output
+            frame and the fitted PreprocessingTransform.
+    """
+    if isinstance(df_final, pd.DataFrame):
+        def chunks():
+            return (df_final.iloc[start:start + chunk_rows] for start in range(0, len(df_final), chunk_rows))
+    else:
+        def chunks():
+            return pre_treatment.read_chunks(df_final, chunk_rows, descriptor_dtype=descriptor_dtype)
+
+    transform = PreprocessingTransform(max_zero_fraction, min_variance, corr_cutoff)
+    for chunk in chunks():
+        transform.partial_fit(chunk)
+    transform.finalize()
+    reduced, labels = [], []
+    for chunk in chunks():
+        reduced.append(transform.transform(chunk))
+        labels.append(chunk['atividade'].to_numpy())
+    df_reduced = pd.concat(reduced, ignore_index=True)
+    df_reduced['atividade'] = np.concatenate(labels)
+    return df_reduced, transform
+
+def run(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path,
+        descriptor_dtype=np.float32, join='inner', max_zero_fraction=0.5, min_variance=0.01, corr_cutoff=0.5, corr_dtype=np.float64, train_options=None,
+        keep_intermediates=None, cache=None, streaming_preprocessing=False, log=print):
+    """
+    Run the create-model stages in memory, passing DataFrames between them.
+
+    With a cache, the preprocessing stages are keyed by the input file
+    contents, their parameters and their code; the run starts after the
+    latest stage found in the cache, so a rerun that only changes training
+    options goes straight to training.
+
+    Args:
+        actives_dw_path (str): Actives DataWarrior export.
+        decoys_dw_path (str): Decoys DataWarrior export.
+        actives_cons_path (str): Actives GOLD consolidated CSV.
+        decoys_cons_path (str): Decoys GOLD consolidated CSV.
+        descriptor_dtype: dtype the input descriptors are parsed as.
+        join (str): 'inner' or 'left' join of DataWarrior and GOLD rows on the compound name.
+        max_zero_fraction (float): pre_treatment drops columns with more zeros than this fraction.
+        min_variance (float): pre_treatment drops columns with a lower variance.
+        corr_cutoff (float): Correlation cutoff of the normalization stage.
+        corr_dtype: dtype of the correlation computation.
+        train_options (dict): Keyword arguments for train_models.process.
+        keep_intermediates (str): Optional directory to dump each computed
+            stage output to (Feather if pyarrow is installed, pickle otherwise).
+        cache (core.stage_cache.StageCache): Optional stage cache (also used for
+            binary copies of the parsed input files).
+        streaming_preprocessing (bool): Run pre_treatment and normalization as
+            one chunked 'preprocessing' stage (see stream_preprocessing), for
+            inputs whose intermediate copies do not fit in memory: the
+            prepare_files output is written to a temporary CSV, released,
+            and read back one chunk at a time.
+        log (callable): Where to send progress messages.
+
+    Returns:
+        dict: models, metrics, data_splits, scaler, transform (PreprocessingTransform)
+            and the StageReport ('report').
+    """
+    report = StageReport(log)
+
+    def keep(df, name):
+        if keep_intermediates:
+            os.makedirs(keep_intermediates, exist_ok=True)
+            write_frame(df, os.path.join(keep_intermediates, name))
+
+    stages = STREAMING_STAGES if streaming_preprocessing else STAGES
+
+    # Chain the cache keys: each stage's key includes the key of its input
+    keys = {}
+    hit_stage, hit = None, None
+    if cache is not None:
+        input_hashes = [cache.file_digest(path) for path in
+                        (actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path)]
+        keys['prepare_files'] = cache.key('prepare_files', [prepare_files, ingest], input_hashes,
+                                          {'descriptor_dtype': np.dtype(descriptor_dtype).name, 'join': join})
+        keys['preprocessing'] = cache.key(
+            'preprocessing', [transform_module, pre_treatment, column_stats], [keys['prepare_files']],
+            {'max_zero_fraction': max_zero_fraction, 'min_variance': min_variance, 'corr_cutoff': corr_cutoff}
+        )
+        keys['pre_treatment'] = cache.key(
+            'pre_treatment', [pre_treatment, column_stats], [keys['prepare_files']],
+            {'max_zero_fraction': max_zero_fraction, 'min_variance': min_variance}
+        )
+        keys['normalization'] = cache.key(
+            'normalization', normalization, [keys['pre_treatment']],
+            {'corr_cutoff': corr_cutoff, 'corr_dtype': np.dtype(corr_dtype).name}
+        )
+        for stage in reversed(stages):
+            hit = cache.get(keys[stage])
+            if hit is not None:
+                hit_stage = stage
+                break
+
+    def store(stage, df, artifacts=None):
+        if cache is not None:
+            cache.put(keys[stage], stage, df, artifacts)
+
+    df_final = df_var_final = df_reduced = scaler = transform = None
+    if hit_stage == 'prepare_files':
+        df_final = hit[0]
+    elif hit_stage == 'pre_treatment':
+        df_var_final = hit[0]
+    elif hit_stage == 'normalization':
+        df_reduced, scaler = hit[0], hit[1]['scaler']
+    elif hit_stage == 'preprocessing':
+        df_reduced, transform = hit[0], hit[1]['transform']
+        scaler = transform.scaler_
+    done = stages.index(hit_stage) + 1 if hit_stage else 0
+    for stage in stages[:done]:
+        report.cached(stage)
+    if hit_stage:
+        log(f"Using cached {hit_stage} output, skipping {done} stage(s)")
+
+    # Step 1: Prepare files
+    if done < 1:
+        with report.stage('prepare_files', "Step 1: Preparing files...") as span:
+            df_final = prepare_files.process(actives_dw_path, decoys_dw_path, actives_cons_path, decoys_cons_path,
+                                             descriptor_dtype=descriptor_dtype, cache=cache, how=join)
+            span.set(rows=df_final.shape[0], columns=df_final.shape[1])
+            store('prepare_files', df_final)
+            keep(df_final, 'df_final')
+
+    # Steps 2 and 3 in row chunks
+    if streaming_preprocessing and done < 2:
+        with report.stage('preprocessing', "Steps 2-3: Pre-treating and normalizing data in row chunks...") as span:
+            columns_in = df_final.shape[1]
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # Spill the merged descriptors and release them; they are read back one chunk at a time
+                prepared_path = os.path.join(tmp_dir, 'df_final.csv')
+                df_final.to_csv(prepared_path, index=False)
+                del df_final
+                df_reduced, transform = stream_preprocessing(prepared_path, max_zero_fraction, min_variance,
+                                                             corr_cutoff, descriptor_dtype=descriptor_dtype)
+            scaler = transform.scaler_
+            span.set(rows=df_reduced.shape[0], columns_in=columns_in, columns=df_reduced.shape[1])
+            store('preprocessing', df_reduced, {'transform': transform})
+            keep(df_reduced, 'df_reduced')
+
+    # Step 2: Pre-treatment
+    if not streaming_preprocessing and done < 2:
+        with report.stage('pre_treatment', "Step 2: Pre-treating data...") as span:
+            df_var_final = pre_treatment.process(df_final, max_zero_fraction=max_zero_fraction,
+                                                 min_variance=min_variance)
+            span.set(rows=df_var_final.shape[0], columns_in=df_final.shape[1], columns=df_var_final.shape[1])
+            del df_final
+            store('pre_treatment', df_var_final)
+            keep(df_var_final, 'df_var_final')
+
+    # Step 3: Normalization
+    if not streaming_preprocessing and done < 3:
+        with report.stage('normalization', "Step 3: Normalizing data...") as span:
+            df_reduced, scaler = normalization.process(df_var_final, corr_cutoff=corr_cutoff, corr_dtype=corr_dtype)
+            span.set(rows=df_reduced.shape[0], columns_in=df_var_final.shape[1], columns=df_reduced.shape[1])
+            del df_var_final
+            store('normalization', df_reduced, {'scaler': scaler})
+            keep(df_reduced, 'df_reduced')
+
+    # The fitted preprocessing, so predict can replay it on raw descriptors
+    if transform is None:
+        transform = PreprocessingTransform.from_stages(
+            scaler, [col for col in df_reduced.columns if col != 'atividade'],
+            max_zero_fraction=max_zero_fraction, min_variance=min_variance, corr_cutoff=corr_cutoff
+        )
+    
+    # Step 4: Train models
+    with report.stage('train_models', "Step 4: Training models...") as span:
+        models, metrics, data_splits = train_models.process(df_reduced, **(train_options or {}))
+        span.set(rows=df_reduced.shape[0], columns=df_reduced.shape[1], models=len(models))
+
+    return {
+        'models': models,
+        'metrics': metrics,
+        'data_splits': data_splits,
+        'scaler': scaler,
+        'transform': transform,
+        'report': report,
+    }
+
+def save_outputs(result, output_prefix, base_dir, config_info=None):
+    """
+    Save a pipeline result under base_dir/{models,metrics,data}.
+
+    Args:
+        result (dict): Return value of run.
+        output_prefix (str): Prefix for output files.
+        base_dir (str): Directory holding the models/, metrics/ and data/ folders.
+        config_info (dict): Run information stored in the bundle manifest.
+    """
+    models_dir = os.path.join(base_dir, 'models')
+    metrics_dir = os.path.join(base_dir, 'metrics')
+    data_dir = os.path.join(base_dir, 'data')
+    data_splits = result['data_splits']
+
+    # Save models, preprocessing and run info as a single bundle
+    config_info = dict(config_info or {})
+    config_info.setdefault('created_at', datetime.now().strftime("%Y%m%d_%H%M%S"))
+    config_info.setdefault('output_prefix', output_prefix)
+    model_bundle.save_bundle(
+        models_dir, output_prefix, result['models'],
+        feature_names=list(data_splits['X_train'].columns),
+        artifacts={'scaler': result['scaler'], 'preprocessing': result['transform']},
+        config=config_info
+    )
+
+    # Save metrics
+    result['metrics'].to_csv(os.path.join(metrics_dir, f"{output_prefix}_metrics.csv"), index=False)
+
+    # Save data splits
+    np.savez(os.path.join(data_dir, f"{output_prefix}_train_test_data.npz"),
+             X_train=data_splits['X_train'],
+             X_test=data_splits['X_test'],
+             y_train=data_splits['y_train'],
+             y_test=data_splits['y_test'],
+             train_real=data_splits['train_real'])
+
+def load_data_splits(path, feature_names=None):
+    """
+    Load the train/test splits saved by save_outputs.
+
+    Args:
+        path (str): A data/{prefix}_train_test_data.npz file.
+        feature_names (list): Column names for X_train/X_test (the npz only keeps values).
+
+    Returns:
+        dict: X_train, X_test (DataFrames), y_train, y_test and train_real
+        (arrays). train_real is None for splits saved before it was recorded.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        splits = {name: data[name] for name in ['X_train', 'X_test', 'y_train', 'y_test']}
+        splits['train_real'] = data['train_real'] if 'train_real' in data.files else None
+    for name in ['X_train', 'X_test']:
+        splits[name] = pd.DataFrame(splits[name], columns=feature_names)
+    return splits
@@ -1,42 +1,100 @@
 import os
 import pandas as pd
+from core.column_stats import ColumnStats
+from core.storage import as_frame
 
-def process(input_file):
+DEFAULT_CHUNK_ROWS = 65536
+
+def numeric_block(chunk):
+    """Descriptor block as numbers: text that does not parse and NaN become 0."""
+    texto = [col for col in chunk.columns if not pd.api.types.is_numeric_dtype(chunk[col])]
+    if texto:
+        chunk = chunk.copy()
+        chunk[texto] = chunk[texto].apply(pd.to_numeric, errors='coerce')
+    return chunk.fillna(0)
+
+def _is_csv(data):
+    return not isinstance(data, pd.DataFrame) and os.path.splitext(str(data))[1] not in ('.feather', '.pkl')
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_ROWS, usecols=None, descriptor_dtype=None):
     """
-    Preprocess dataframe by removing columns with many zeros and low variance.
-    This is based on 2_pre_tratamento.py.
+    Read a prepare_files CSV ('name', descriptors, 'atividade') one chunk of rows at a time.
     
     Args:
-        input_file (str): Path to the input CSV file.
-        
+        path (str): CSV file.
+        chunk_size (int): Rows per chunk; only one chunk is held in memory.
+        usecols (list): Optional subset of columns to read.
+        descriptor_dtype: Optional dtype the descriptor columns are parsed as
+            (otherwise pandas infers it chunk by chunk).
+    
     Returns:
-        pandas.DataFrame: The processed dataframe.
+        pandas.io.parsers.TextFileReader: Iterator over the chunks.
+    """
+    dtype = None
+    if descriptor_dtype is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        dtype = {col: descriptor_dtype for col in header
+                 if col not in ('name', 'atividade') and (usecols is None or col in usecols)}
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunk_size)
+
+def column_stats(chunks, columns):
     """
-    # Load the dataframe
-    df = pd.read_csv(input_file, delimiter=',')
+    Accumulate ColumnStats over an iterable of descriptor blocks.
     
-    # Extract name and activity columns
-    df_name = df.pop('name')
-    df_atividade = df.pop('atividade')
+    Args:
+        chunks (iterable): DataFrames holding (at least) the given columns.
+        columns (list): Descriptor columns to accumulate.
     
-    # Convert all remaining columns to numeric
-    df = df.apply(pd.to_numeric, errors='coerce')
+    Returns:
+        ColumnStats: Statistics of all rows. Stats of separate shards can be
+            combined afterwards with ColumnStats.merge.
+    """
+    stats = ColumnStats(columns)
+    for chunk in chunks:
+        stats.update(numeric_block(chunk[columns]).to_numpy())
+    return stats
+
+def process(data, max_zero_fraction=0.5, min_variance=0.01, chunk_size=DEFAULT_CHUNK_ROWS):
+    """
+    Preprocess dataframe by removing columns with many zeros and low variance.
+    This is based on 2_pre_tratamento.py.
     
-    # Fill any NaN values with 0
-    df = df.fillna(0)
+    Zero counts and variances are accumulated over row chunks, so no
+    full-size boolean or converted copy of the matrix is made. A CSV path is
+    read chunk by chunk for the statistics (see read_chunks), then only the
+    kept columns are loaded.
     
-    # Remove columns with more than 50% zeros
-    threshold = len(df) * 0.5
-    df_filtered = df.loc[:, (df == 0).sum(axis=0) <= threshold]
+    Args:
+        data (pandas.DataFrame or str): Output of prepare_files, or a path to it as CSV.
+        max_zero_fraction (float): Drop columns with more than this fraction of zeros.
+        min_variance (float): Drop columns with a variance below this value.
+        chunk_size (int): Rows per chunk when accumulating the statistics.
+        
+    Returns:
+        pandas.DataFrame: The processed dataframe.
+    """
+    if _is_csv(data):
+        # Zero counts and variances straight from the reader: the whole file is never loaded
+        descritores = [col for col in pd.read_csv(data, nrows=0).columns if col not in ('name', 'atividade')]
+        stats = column_stats(read_chunks(data, chunk_size, usecols=descritores), descritores)
+    else:
+        # Load the dataframe
+        df = as_frame(data)
+        descritores = [col for col in df.columns if col not in ('name', 'atividade')]
+        
+        # Zero counts and variances in one chunked pass (NaN counts as 0)
+        chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+        stats = column_stats(chunks, descritores)
     
-    # Remove columns with low variance
-    variances = df_filtered.var()
-    variance_threshold = 0.01
-    columns_to_keep = variances[variances >= variance_threshold].index
-    df_var = df_filtered[columns_to_keep]
+    # Remove columns with too many zeros or low variance
+    keep = stats.keep_mask(max_zero_fraction, min_variance)
+    columns_to_keep = [col for col, manter in zip(descritores, keep) if manter]
+    if _is_csv(data):
+        df = pd.read_csv(data, usecols=['name'] + columns_to_keep + ['atividade'])
+    df_var = numeric_block(df[columns_to_keep])
     
     # Add back the name and activity columns
-    df_var.insert(0, 'name', df_name)
-    df_var.loc[:, 'atividade'] = df_atividade
+    df_var.insert(0, 'name', df['name'])
+    df_var.loc[:, 'atividade'] = df['atividade']
     
-    return df_var 
\ No newline at end of file
+    return df_var
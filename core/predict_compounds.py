@@ -1,11 +1,47 @@
+import contextlib
 import os
+import numpy as np
 import pandas as pd
 import pickle
 import re
+import shutil
+import sys
+import tempfile
+import time
 import warnings
-from sklearn.exceptions import InconsistentVersionWarning
+from concurrent.futures import ProcessPoolExecutor
+from core import instrumentation, model_bundle
+from core.consensus import consensus, vote_thresholds
 
-def process(input_file, model_prefix, models_dir):
+MODEL_TYPES = ['LR', 'NB', 'DT', 'RF', 'SVM', 'XGB']
+
+_CHUNK_ALIGNMENT = 64
+
+# Rows per chunk when --top-k/--min-consensus stream an input without --chunk-size
+DEFAULT_CHUNK_SIZE = 65536
+
+OUTPUT_FORMATS = ['csv', 'parquet']
+
+# Models the cascade scores only on rows that can still reach --min-consensus, in
+# this order (cheapest first; SVC(probability=True) is the slowest). Every other
+# model (LR, NB, DT, ...) is scored on all rows first. These models score each
+# row independently of the others, so scoring a subset gives the same values.
+CASCADE_MODELS = ['RandomForestClassifier', 'XGBClassifier', 'SVC']
+
+# Legacy pickles are named {prefix}_{MODEL}_model.pkl
+_LEGACY_MODEL_FILE = re.compile(r'_([A-Za-z0-9]+)_model\.pkl$')
+
+@contextlib.contextmanager
+def _ignore_version_warnings():
+    # sklearn is only imported here, when a model is actually unpickled
+    from sklearn.exceptions import InconsistentVersionWarning
+    
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+        yield
+
+def process(input_file, model_prefix, models_dir, threshold=0.5, model_thresholds=None, weights=None,
+            workers=1, model_names=None):
     """
     Make predictions using trained models with a specific path.
     This is based on 5_prediction_ml.py.
@@ -14,91 +50,477 @@ def process(input_file, model_prefix, models_dir):
         input_file (str): Path to the input CSV file with compounds to predict.
         model_prefix (str): Prefix for model files to use.
         models_dir (str): Directory containing model files.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        workers (int): Number of scoring processes (1 = score in this process).
+        model_names (list): Optional subset of models to use (e.g. ['LR', 'RF']).
+    
+    Returns:
+        pandas.DataFrame: DataFrame with prediction results and consensus.
+    """
+    loaded_models = load_models(models_dir, model_prefix, model_names)
+    return process_with_models(input_file, loaded_models, threshold, model_thresholds, weights, workers)
+
+def process_all_models(input_file, models_dir, threshold=0.5, model_thresholds=None, weights=None,
+                       workers=1):
+    """
+    Make predictions using all available trained models in the models directory.
+    
+    Args:
+        input_file (str): Path to the input CSV file with compounds to predict.
+        models_dir (str): Directory containing model files.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        workers (int): Number of scoring processes (1 = score in this process).
     
     Returns:
         pandas.DataFrame: DataFrame with prediction results and consensus.
     """
+    loaded_models = load_models(models_dir)
+    return process_with_models(input_file, loaded_models, threshold, model_thresholds, weights,
+                               workers)
+
+def stream_all_models(input_file, models_dir, output_path, chunk_size,
+                      threshold=0.5, model_thresholds=None, weights=None, workers=1):
+    """
+    Streaming version of process_all_models for inputs larger than memory.
+    
+    The input is read chunk_size rows at a time and each scored chunk is
+    appended to output_path, so only one chunk is held in memory. The output
+    file is identical to process_all_models(...).to_csv(output_path, index=False).
+    
+    Args:
+        input_file (str): Path to the input CSV file with compounds to predict.
+        models_dir (str): Directory containing model files.
+        output_path (str): Path of the CSV file to write.
+        chunk_size (int): Number of rows read and scored at a time (rounded up to a multiple of 64).
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        workers (int): Number of scoring processes (1 = score in this process).
+    
+    Returns:
+        int: Number of compounds scored.
+    """
+    loaded_models = load_models(models_dir)
+    return stream_with_models(input_file, output_path, chunk_size, loaded_models,
+                              threshold, model_thresholds, weights, workers)
+
+def load_models(models_dir, prefix=None, model_names=None):
+    """
+    Load trained models for prediction.
+    
+    With a prefix, only that prefix's models are loaded: from its bundle
+    (models/{prefix}.bundle) when there is one, otherwise from the legacy
+    models/{prefix}_{model}_model.pkl files. Without a prefix, a single
+    model set of models_dir is loaded (see _load_all_models).
+    
+    Args:
+        models_dir (str): Directory containing model files.
+        prefix (str): Optional model prefix (create-model --output).
+        model_names (list): Optional subset of model names (e.g. ['LR', 'RF']).
+            Bundles only open the payloads of these models.
+    
+    Returns:
+        dict: Model name -> loaded model object.
+    """
+    if prefix is None:
+        return _load_all_models(models_dir, model_names)
+    
+    if prefix in model_bundle.find_bundles(models_dir):
+        bundle = model_bundle.open_bundle(models_dir, prefix)
+        loaded_models = bundle.load_models(model_names)
+        print(f"Loaded bundle {prefix}: {', '.join(loaded_models.keys())}")
+        return loaded_models
+    
     # Load models
     loaded_models = {}
-    for model_type in ['LR', 'NB', 'DT', 'RF', 'SVM', 'XGB']:
-        model_path = os.path.join(models_dir, f"{model_prefix}_{model_type}_model.pkl")
+    for model_type in model_names or MODEL_TYPES:
+        model_path = os.path.join(models_dir, f"{prefix}_{model_type}_model.pkl")
         if os.path.exists(model_path):
             # Suppress version warning when loading models
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+            with _ignore_version_warnings():
                 with open(model_path, 'rb') as file:
                     loaded_models[model_type] = pickle.load(file)
     
     if not loaded_models:
-        raise ValueError(f"No models found with prefix '{model_prefix}' in {models_dir}")
+        raise ValueError(f"No models found with prefix '{prefix}' in {models_dir}")
     
-    return _process_with_models(input_file, loaded_models)
+    return loaded_models
 
-def process_all_models(input_file, models_dir):
+def load_transform(models_dir, prefix):
     """
-    Make predictions using all available trained models in the models directory.
+    Load the preprocessing transform stored in a model bundle.
+    
+    Args:
+        models_dir (str): Directory containing model bundles.
+        prefix (str): Bundle name.
+    
+    Returns:
+        PreprocessingTransform: Maps raw descriptors to the bundle's model features.
+    """
+    if prefix not in model_bundle.find_bundles(models_dir):
+        raise ValueError(f"Raw input needs a model bundle; no bundle '{prefix}' in {models_dir}")
+    bundle = model_bundle.open_bundle(models_dir, prefix)
+    if not bundle.has_artifact('preprocessing'):
+        raise ValueError(f"Bundle '{prefix}' has no preprocessing transform; recreate it with create-model "
+                         f"or pass normalised input")
+    return bundle.load_artifact('preprocessing')
+
+def _legacy_set(model_file):
+    # {prefix}_{MODEL}_model.pkl belongs to prefix's set; any other pickle
+    # (e.g. LR_best_model.pkl) to the directory's unprefixed set ('')
+    match = _LEGACY_MODEL_FILE.search(model_file)
+    if match is not None and match.group(1) in MODEL_TYPES:
+        return model_file[:match.start()]
+    return ''
+
+def _load_all_models(models_dir, model_names=None):
+    """
+    Load one model set found in models_dir.
+    
+    A set is one bundle, or the legacy pickled classifiers sharing a
+    prefix. Sets are trained on different features, so they are never
+    scored (or voted) together. When models_dir holds more than one set,
+    the unprefixed legacy pickles (e.g. LR_best_model.pkl) are used when
+    there are any, otherwise the most recently written set, with a
+    warning naming the others.
     
     Args:
-        input_file (str): Path to the input CSV file with compounds to predict.
         models_dir (str): Directory containing model files.
+        model_names (list): Optional subset of model names to load.
     
     Returns:
-        pandas.DataFrame: DataFrame with prediction results and consensus.
+        dict: Model name -> loaded model object. Bundle models are named
+            {prefix}_{model}, legacy pickles by their file name.
     """
-    # Load all model files from the directory
-    loaded_models = {}
-    model_files = [f for f in os.listdir(models_dir) if f.endswith('.pkl')]
+    bundles = model_bundle.find_bundles(models_dir)
+    model_files = sorted(f for f in os.listdir(models_dir) if f.endswith('.pkl'))
     
-    if not model_files:
+    if not model_files and not bundles:
         raise ValueError(f"No model files found in {models_dir}")
     
-    # Load all model files
+    # Do not unpickle (and import the libraries of) models that were not asked for
+    if model_names is not None:
+        matches = {f: _LEGACY_MODEL_FILE.search(f) for f in model_files}
+        model_files = [f for f, match in matches.items() if match is None or match.group(1) in model_names]
+    
+    # Legacy pickles, grouped by set; files that are not classifiers (scalers, ...) are skipped
+    legacy_sets = {}
     for model_file in model_files:
         model_path = os.path.join(models_dir, model_file)
         try:
             # Suppress version warning when loading models
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+            with _ignore_version_warnings():
                 with open(model_path, 'rb') as file:
                     loaded_object = pickle.load(file)
                     # Check if the object has predict_proba method (is a classifier model)
                     if hasattr(loaded_object, 'predict_proba') and callable(getattr(loaded_object, 'predict_proba')):
-                        loaded_models[model_file] = loaded_object
-                        print(f"Loaded model: {model_file}")
+                        legacy_sets.setdefault(_legacy_set(model_file), {})[model_file] = loaded_object
                     else:
                         print(f"Skipped non-model file: {model_file}")
         except Exception as e:
             print(f"Error loading {model_file}: {str(e)}")
     
+    # Set label -> (written at, bundle prefix or None, legacy prefix or None)
+    model_sets = {}
+    for prefix in bundles:
+        manifest_path = os.path.join(model_bundle.bundle_path(models_dir, prefix), model_bundle.MANIFEST_NAME)
+        model_sets[f"bundle {prefix}"] = (os.path.getmtime(manifest_path), prefix, None)
+    for prefix, models in legacy_sets.items():
+        label = f"legacy {prefix}_*_model.pkl" if prefix else "unprefixed legacy pickles"
+        written_at = max(os.path.getmtime(os.path.join(models_dir, model_file)) for model_file in models)
+        model_sets[label] = (written_at, None, prefix)
+    if len(model_sets) > 1:
+        if '' in legacy_sets:
+            chosen = "unprefixed legacy pickles"
+        else:
+            chosen = max(model_sets, key=lambda label: model_sets[label][0])
+        others = [label for label in model_sets if label != chosen]
+        warnings.warn(f"{models_dir} holds {len(model_sets)} model sets, trained on different features; "
+                      f"using {chosen}, not {', '.join(others)} (choose one with --prefix)")
+        _, bundle_prefix, legacy_prefix = model_sets[chosen]
+        bundles = [bundle_prefix] if bundle_prefix is not None else []
+        legacy_sets = {legacy_prefix: legacy_sets[legacy_prefix]} if legacy_prefix is not None else {}
+    
+    loaded_models = {}
+    for prefix in bundles:
+        # Bundles: only the manifest is read until a model is requested
+        bundle = model_bundle.open_bundle(models_dir, prefix)
+        names = [name for name in bundle.model_names if model_names is None or name in model_names]
+        for name, model in bundle.load_models(names).items():
+            loaded_models[f"{prefix}_{name}"] = model
+        print(f"Loaded bundle {prefix}: {', '.join(names)}")
+    for models in legacy_sets.values():
+        for model_file, model in models.items():
+            loaded_models[model_file] = model
+            print(f"Loaded model: {model_file}")
+    
     if not loaded_models:
         raise ValueError(f"No valid models found in {models_dir}")
     
     print(f"Loaded {len(loaded_models)} models: {', '.join(loaded_models.keys())}")
     
-    return _process_with_models(input_file, loaded_models)
+    return loaded_models
 
-def _process_with_models(input_file, loaded_models):
+def process_with_models(input_file, loaded_models, threshold=0.5, model_thresholds=None, weights=None,
+                         workers=1, transform=None, compact=False, top_k=None, min_consensus=None,
+                         cascade=False):
     """
     Common processing function used by both process and process_all_models.
     
     Args:
         input_file (str): Path to the input CSV file with compounds to predict.
         loaded_models (dict): Dictionary of loaded model objects.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        workers (int): Number of scoring processes (1 = score in this process).
+        transform (PreprocessingTransform): Applied to the input first, for raw descriptor files.
+        compact (bool): float32 probabilities and a consensus_mask bitfield (see _score_frame).
+        top_k (int): Only return the top_k best ranked compounds, best first (see select_hits).
+        min_consensus (int): Only return compounds with at least this many active votes.
+        cascade (bool): Skip the expensive models for rows that cannot reach
+            min_consensus any more (see _cascade_proba).
     
     Returns:
         pandas.DataFrame: DataFrame with prediction results and consensus.
     """
+    cascade_stats = _cascade_start(cascade, min_consensus)
+    
     # Load data
-    new_compounds = pd.read_csv(input_file, delimiter=',')
+    with instrumentation.span('read_input', 'io', file=os.path.basename(input_file)) as span:
+        new_compounds = pd.read_csv(input_file, delimiter=',')
+        span.set(rows=new_compounds.shape[0], columns=new_compounds.shape[1])
+    
+    with _make_scorer(loaded_models, workers) as scorer:
+        df_pred = _score_frame(new_compounds, loaded_models, threshold, model_thresholds, weights, scorer,
+                               transform, compact, cascade_stats)
+    if cascade_stats is not None:
+        print_cascade_stats(cascade_stats)
+    hits = select_hits(df_pred, top_k, min_consensus)
+    return rank_hits(hits) if top_k is not None else hits
+
+def stream_with_models(input_file, output_path, chunk_size, loaded_models,
+                        threshold=0.5, model_thresholds=None, weights=None, workers=1, transform=None,
+                        compact=False, top_k=None, min_consensus=None, output_format='csv', cascade=False):
+    """
+    Score input_file chunk by chunk, appending each result to output_path.
+    
+    With top_k, only the best rows seen so far are kept between chunks and
+    written at the end, best first; with min_consensus, rows with fewer
+    active votes are dropped before writing. Rows that are not written are
+    discarded with their chunk.
+    
+    Args:
+        input_file (str): Path to the input CSV file with compounds to predict.
+        output_path (str): Path of the CSV file to write.
+        chunk_size (int): Number of rows read and scored at a time.
+        loaded_models (dict): Dictionary of loaded model objects.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        workers (int): Number of scoring processes (1 = score in this process).
+        transform (PreprocessingTransform): Applied to each chunk first, for raw descriptor files.
+        compact (bool): float32 probabilities and a consensus_mask bitfield (see _score_frame).
+        top_k (int): Only write the top_k best ranked compounds (see select_hits).
+        min_consensus (int): Only write compounds with at least this many active votes.
+        output_format (str): 'csv' or 'parquet' (needs pyarrow).
+        cascade (bool): Skip the expensive models for rows that cannot reach
+            min_consensus any more (see _cascade_proba).
+    
+    Returns:
+        int: Number of compounds scored.
+    """
+    # Keep chunk boundaries on multiples of 64 rows. BLAS kernels (used by LR)
+    # process rows in small blocks, and a row's last-bit rounding depends on
+    # its offset within the block, so this keeps results identical to a
+    # single in-memory pass.
+    chunk_size = -(-chunk_size // _CHUNK_ALIGNMENT) * _CHUNK_ALIGNMENT
+    
+    cascade_stats = _cascade_start(cascade, min_consensus)
+    start = time.perf_counter()
+    n_rows = 0
+    best = None
+    with _make_scorer(loaded_models, workers) as scorer, \
+            pd.read_csv(input_file, delimiter=',', chunksize=chunk_size) as reader, \
+            OutputWriter(output_path, output_format) as writer:
+        chunks = iter(reader)
+        chunk = next(chunks, None)
+        i = 0
+        while chunk is not None:
+            # A final piece shorter than the alignment would also be rounded
+            # differently: score it together with the chunk before it
+            next_chunk = next(chunks, None)
+            if next_chunk is not None and len(next_chunk) < _CHUNK_ALIGNMENT:
+                chunk = pd.concat([chunk, next_chunk])
+                next_chunk = None
+            
+            with instrumentation.span('chunk', 'predict', index=i, rows=len(chunk)):
+                df_pred = _score_frame(chunk, loaded_models, threshold, model_thresholds, weights, scorer,
+                                       transform, compact, cascade_stats)
+                df_pred = select_hits(df_pred, top_k, min_consensus)
+                if top_k is None:
+                    with instrumentation.span('write_output', 'io', rows=len(df_pred)):
+                        writer.write(df_pred)
+                else:
+                    # Bounded selection: the best top_k of (kept rows + this chunk's best top_k)
+                    best = df_pred if best is None else select_hits(pd.concat([best, df_pred]), top_k)
+            
+            n_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"Scored {n_rows} rows ({n_rows / elapsed:.0f} rows/sec)")
+            chunk = next_chunk
+            i += 1
+        
+        if best is not None:
+            with instrumentation.span('write_output', 'io', rows=len(best)):
+                writer.write(rank_hits(best))
+    
+    if cascade_stats is not None:
+        print_cascade_stats(cascade_stats)
+    return n_rows
+
+def _rank_order(df_pred):
+    """Row positions from best to worst: most (weighted) votes, then highest mean probability, then input order."""
+    votes = df_pred['consensus_weighted'] if 'consensus_weighted' in df_pred.columns else df_pred['consensus']
+    prob_columns = [col for col in df_pred.columns if col.startswith('ativd_pred_')]
+    mean_prob = df_pred[prob_columns].to_numpy(dtype=np.float64).mean(axis=1)
+    # lexsort sorts by the last key first
+    return np.lexsort((np.arange(len(df_pred)), -mean_prob, -votes.to_numpy(dtype=np.float64)))
+
+def select_hits(df_pred, top_k=None, min_consensus=None):
+    """
+    Rows of scored compounds worth writing, in their input order.
+    
+    Args:
+        df_pred (pandas.DataFrame): Output of _score_frame.
+        top_k (int): Keep only the top_k best ranked rows: most active votes
+            (consensus_weighted when present, else consensus), then highest
+            mean probability over the models, then earliest in the input.
+        min_consensus (int): Keep only rows with at least this many active votes.
+    
+    Returns:
+        pandas.DataFrame: The kept rows (df_pred itself when nothing is dropped).
+    """
+    if min_consensus is not None:
+        df_pred = df_pred[df_pred['consensus'].to_numpy() >= min_consensus]
+    if top_k is not None and len(df_pred) > top_k:
+        df_pred = df_pred.iloc[np.sort(_rank_order(df_pred)[:top_k])]
+    return df_pred
+
+def rank_hits(df_pred):
+    """Sort rows best first (the select_hits ranking)."""
+    return df_pred.iloc[_rank_order(df_pred)]
+
+class OutputWriter:
+    """
+    Writes scored rows to a CSV or Parquet file, one piece at a time.
+    
+    CSV pieces are appended under a single header. Parquet files get one
+    row group per piece and need pyarrow; later pieces are cast to the
+    schema of the first non-empty one. Empty pieces (e.g. a chunk without
+    hits) are not written, as their object columns have no type; if every
+    piece is empty, an empty table is written on close.
+    """
+    
+    def __init__(self, path, output_format='csv'):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'. Choose from {OUTPUT_FORMATS}")
+        if output_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.output_format = output_format
+        self.n_rows = 0
+        self._started = False
+        self._parquet = None
+        self._empty = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
+    def write(self, df):
+        if self.output_format == 'csv':
+            df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        elif len(df) == 0:
+            if self._empty is None:
+                self._empty = df
+            return
+        else:
+            import pyarrow.parquet as pq
+            
+            table = _arrow_table(df)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._started = True
+        self.n_rows += len(df)
+    
+    def close(self):
+        if self._parquet is None and self._empty is not None:
+            import pyarrow.parquet as pq
+            
+            pq.write_table(_arrow_table(self._empty), self.path)
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+        self._empty = None
+
+def _arrow_table(df):
+    import pyarrow as pa
+    
+    # Object columns without a value (NAME, consensus_Model of an empty
+    # piece) are inferred as null; they hold strings
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                        for field in table.schema], metadata=table.schema.metadata)
+    return table.cast(schema)
+
+def _score_frame(new_compounds, loaded_models, threshold=0.5, model_thresholds=None, weights=None,
+                 scorer=None, transform=None, compact=False, cascade_stats=None):
+    """
+    Score one DataFrame of compounds with every loaded model.
+    
+    Args:
+        new_compounds (pandas.DataFrame): Compounds to predict (a whole file or one chunk).
+        loaded_models (dict): Dictionary of loaded model objects.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        weights (dict): Optional per-model weights for a weighted consensus column.
+        scorer (ShardedScorer): Optional worker pool to spread the scoring over.
+        transform (PreprocessingTransform): Optional preprocessing from raw descriptors to model features.
+        compact (bool): Write probabilities as float32 and, instead of the consensus_Model
+            names, a consensus_mask bitfield (bit j: the j-th ativd_pred_* model voted active).
+            Votes are taken on the full-precision probabilities either way.
+        cascade_stats (dict): Cascade mode (see _cascade_start): only rows that
+            reach cascade_stats['min_consensus'] active votes are returned.
+    
+    Returns:
+        pandas.DataFrame: DataFrame with prediction results and consensus.
+    """
     # Extract NAME column
     if 'NAME' in new_compounds.columns:
         df_name = new_compounds['NAME']
     elif 'name' in new_compounds.columns:
         df_name = new_compounds['name']
     else:
-        # If no name column exists, create a default one
-        df_name = pd.Series([f"Compound_{i}" for i in range(len(new_compounds))])
+        # If no name column exists, create a default one (numbered by row, also across chunks)
+        df_name = pd.Series([f"Compound_{i}" for i in new_compounds.index], index=new_compounds.index)
+    
+    # Raw descriptors: replay the create-model preprocessing
+    if transform is not None:
+        with instrumentation.span('transform', 'transform', rows=len(new_compounds),
+                                  columns_in=new_compounds.shape[1]) as span:
+            new_compounds = transform.transform(new_compounds)
+            span.set(columns=new_compounds.shape[1])
     
     # Check for required columns
     model_ref = next(iter(loaded_models.values()))  # Get first model to check features
@@ -112,32 +534,231 @@ def _process_with_models(input_file, loaded_models):
     # Ensure columns match model expectations
     input_features = new_compounds[expected_columns]
     
-    # Make predictions with all models
-    for model_name, model in loaded_models.items():
-        # Calculate probability of being active
-        prob_active = model.predict_proba(input_features)[:, 1]
-        # Add predictions as a new column
-        new_compounds[f'ativd_pred_{model_name}'] = prob_active
+    # Make predictions with all models (cascade: only on the rows that can still become hits)
+    model_names = list(loaded_models.keys())
+    if cascade_stats is not None:
+        rows, probabilities = _cascade_proba(input_features, loaded_models, cascade_stats, threshold,
+                                             model_thresholds, scorer)
+        df_name = df_name.iloc[rows]
+    else:
+        probabilities = _predict_proba(input_features, loaded_models, model_names, scorer)
     
-    # Find prediction columns
-    pred_columns = [col for col in new_compounds.columns if col.startswith('ativd_pred_')]
+    # Create output with NAME column, predictions, and consensus. Each column
+    # keeps its model's dtype (XGBoost returns float32); the consensus works
+    # on one stacked (n_compounds x n_models) matrix.
+    df_pred = pd.DataFrame(df_name)
+    for model_name, prob_active in zip(model_names, probabilities):
+        df_pred[f'ativd_pred_{model_name}'] = prob_active.astype(np.float32) if compact else prob_active
+    prob_matrix = np.column_stack(probabilities)
+    with instrumentation.span('consensus', 'predict', rows=len(prob_matrix), models=len(model_names)):
+        columns = consensus(prob_matrix, model_names, threshold, model_thresholds, weights,
+                            labels='mask' if compact else 'names')
+        if compact:
+            columns['consensus'] = columns['consensus'].astype(np.min_scalar_type(len(model_names)))
+        for col, values in columns.items():
+            df_pred[col] = values
     
-    # Create consensus column (count of models predicting active)
-    new_compounds['consensus'] = (new_compounds[pred_columns] > 0.5).sum(axis=1)
+    return df_pred
+
+def _predict_proba(input_features, loaded_models, model_names, scorer=None):
+    """Probability of being active for each of model_names (a list of arrays)."""
+    if scorer is not None:
+        with instrumentation.span('predict_proba', 'predict', models=len(model_names), rows=len(input_features),
+                                  columns=input_features.shape[1], workers=scorer.workers):
+            return scorer.predict_proba(input_features, model_names)
+    if len(input_features) == 0:
+        # sklearn rejects empty inputs; an empty file scores to an empty output
+        return [np.empty(0) for _ in model_names]
+    probabilities = []
+    for model_name in model_names:
+        with instrumentation.span('predict_proba', 'predict', model=model_name, rows=len(input_features),
+                                  columns=input_features.shape[1]):
+            probabilities.append(loaded_models[model_name].predict_proba(input_features)[:, 1])
+    return probabilities
+
+def _model_class(model):
+    # Calibrated models (see calibration) are ranked by their estimator; compiled
+    # tree models (see tree_compiler) keep the class name of their source. Only
+    # CalibratedModel is unwrapped: sklearn ensembles have an 'estimator' too
+    # (their unfitted base tree). calibration is only checked for when it has
+    # been imported (by unpickling a calibrated model)
+    calibration = sys.modules.get('core.calibration')
+    if calibration is not None and isinstance(model, calibration.CalibratedModel):
+        model = model.estimator
+    return getattr(model, 'source', None) or type(model).__name__
+
+def _cascade_start(cascade, min_consensus):
+    """Empty cascade statistics for a run, or None when the cascade is off."""
+    if not cascade:
+        return None
+    if min_consensus is None:
+        raise ValueError("Cascade scoring needs min_consensus")
+    return {'min_consensus': min_consensus, 'rows': 0, 'hits': 0, 'scored': {}}
+
+def _cascade_proba(input_features, loaded_models, cascade_stats, threshold=0.5, model_thresholds=None,
+                   scorer=None):
+    """
+    Score only the rows that can still reach min_consensus active votes.
     
-    # Create consensus_Model column (list of models predicting active)
-    def models_above_05(row):
-        models = [col.replace('ativd_pred_', '') for col in pred_columns if row[col] > 0.5]
-        return ', '.join(models)
+    The models not in CASCADE_MODELS are scored on every row. The models
+    in CASCADE_MODELS follow one at a time, cheapest first. Before each
+    one, the rows are dropped that would miss min_consensus even if every
+    remaining model voted active. The kept rows get every model's exact
+    probability, so they score as without the cascade.
     
-    new_compounds['consensus_Model'] = new_compounds.apply(models_above_05, axis=1)
+    Args:
+        input_features (pandas.DataFrame): Features in the models' column order.
+        loaded_models (dict): Dictionary of loaded model objects.
+        cascade_stats (dict): Statistics of the run (see _cascade_start), updated in place.
+        threshold (float): Probability above which a model votes active.
+        model_thresholds (dict): Optional per-model overrides of threshold.
+        scorer (ShardedScorer): Optional worker pool to spread the scoring over.
     
-    # Prepare final output
-    df_name = pd.DataFrame(df_name)
+    Returns:
+        tuple: (rows, probabilities)
+            - rows: Positions of the rows with at least min_consensus active votes
+            - probabilities: One array per model, in loaded_models order, over those rows
+    """
+    model_names = list(loaded_models.keys())
+    thresholds = dict(zip(model_names, vote_thresholds(model_names, threshold, model_thresholds)))
+    rank = {name: CASCADE_MODELS.index(_model_class(model))
+            for name, model in loaded_models.items() if _model_class(model) in CASCADE_MODELS}
+    expensive = sorted(rank, key=rank.get)
+    cheap = [name for name in model_names if name not in rank]
+    min_consensus = cascade_stats['min_consensus']
+    n_rows = len(input_features)
+    scored = cascade_stats['scored']
     
-    # Create output with NAME column, predictions, and consensus
-    df_pred = df_name.copy()
-    for col in pred_columns + ['consensus', 'consensus_Model']:
-        df_pred[col] = new_compounds[col]
+    with instrumentation.span('cascade', 'predict', rows=n_rows, min_consensus=min_consensus) as span:
+        rows = np.arange(n_rows)
+        probabilities = dict(zip(cheap, _predict_proba(input_features, loaded_models, cheap, scorer)))
+        votes = np.zeros(n_rows, dtype=np.intp)
+        for name in cheap:
+            votes += probabilities[name] > thresholds[name]
+            scored[name] = scored.get(name, 0) + n_rows
+        
+        for i, name in enumerate(expensive + [None]):
+            # Rows that miss min_consensus even if all remaining models vote active
+            keep = votes + (len(expensive) - i) >= min_consensus
+            if not keep.all():
+                rows, votes = rows[keep], votes[keep]
+                probabilities = {done: proba[keep] for done, proba in probabilities.items()}
+            if name is None:
+                break
+            if len(rows):
+                proba = _predict_proba(input_features.iloc[rows], loaded_models, [name], scorer)[0]
+            else:
+                proba = np.empty(0)
+            probabilities[name] = proba
+            votes += proba > thresholds[name]
+            scored[name] = scored.get(name, 0) + len(rows)
+        span.set(hits=len(rows))
     
-    return df_pred 
\ No newline at end of file
+    cascade_stats['rows'] += n_rows
+    cascade_stats['hits'] += len(rows)
+    return rows, [probabilities[name] for name in model_names]
+
+def print_cascade_stats(cascade_stats):
+    """Report how many rows reached min_consensus and how much scoring the cascade skipped."""
+    n_rows = cascade_stats['rows']
+    scored = cascade_stats['scored']
+    total = n_rows * len(scored)
+    done = sum(scored.values())
+    print(f"Cascade: {cascade_stats['hits']} of {n_rows} rows reached {cascade_stats['min_consensus']} votes; "
+          f"scored {done} of {total} model-rows ({1 - done / max(total, 1):.1%} skipped)")
+    for name, count in scored.items():
+        if count < n_rows:
+            print(f"  {name}: {count} rows scored ({1 - count / max(n_rows, 1):.1%} skipped)")
+
+
+# Models held by each scoring worker, loaded once by _init_scoring_worker
+_worker_models = {}
+_worker_matrix = {}
+
+def _init_scoring_worker(loaded_models):
+    _worker_models.update(loaded_models)
+    # Parallelism comes from the process pool; keep each worker single-threaded
+    from threadpoolctl import threadpool_limits
+    _worker_matrix['thread_limits'] = threadpool_limits(1)
+
+def _score_block(model_name, matrix_path, columns, start, stop):
+    """Score rows [start, stop) of the shared feature matrix with one model."""
+    if _worker_matrix.get('path') != matrix_path:
+        # Memory-map the matrix once per chunk; blocks are views, never copies
+        _worker_matrix['path'] = matrix_path
+        _worker_matrix['X'] = np.load(matrix_path, mmap_mode='r')
+    block = pd.DataFrame(_worker_matrix['X'][start:stop], columns=columns)
+    return _worker_models[model_name].predict_proba(block)[:, 1]
+
+class ShardedScorer:
+    """
+    Process pool that scores (model, row block) work units in parallel.
+    
+    Each worker receives the models once, at start-up. The feature matrix of
+    every chunk is written once to a temporary .npy file which workers
+    memory-map read-only, so tasks only carry (model, start, stop).
+    """
+    
+    def __init__(self, loaded_models, workers):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            workers, initializer=_init_scoring_worker, initargs=(loaded_models,)
+        )
+        self.tmp_dir = tempfile.mkdtemp(prefix='mlcli_predict_')
+        self.n_calls = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        self.executor.shutdown()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def predict_proba(self, input_features, model_names):
+        """
+        Probability of being active for every model, in input row order.
+        
+        Args:
+            input_features (pandas.DataFrame): Features in the models' column order.
+            model_names (list): Names of the models to score with.
+        
+        Returns:
+            list: One probability array per model name.
+        """
+        n_rows = len(input_features)
+        if n_rows == 0:
+            return [np.empty(0) for _ in model_names]
+        self.n_calls += 1
+        matrix_path = os.path.join(self.tmp_dir, f'features_{self.n_calls}.npy')
+        np.save(matrix_path, np.ascontiguousarray(input_features.to_numpy(dtype=np.float64)))
+        
+        # About four blocks per worker and model, on 64-row boundaries
+        # (see _CHUNK_ALIGNMENT) so results match single-process scoring
+        block_size = -(-n_rows // (4 * self.workers))
+        block_size = max(_CHUNK_ALIGNMENT, -(-block_size // _CHUNK_ALIGNMENT) * _CHUNK_ALIGNMENT)
+        columns = list(input_features.columns)
+        # A short last block joins the one before it, for the same reason
+        starts = list(range(0, n_rows, block_size))
+        if len(starts) > 1 and n_rows - starts[-1] < _CHUNK_ALIGNMENT:
+            starts.pop()
+        stops = starts[1:] + [n_rows]
+        
+        futures = {
+            model_name: [
+                self.executor.submit(_score_block, model_name, matrix_path, columns, start, stop)
+                for start, stop in zip(starts, stops)
+            ]
+            for model_name in model_names
+        }
+        try:
+            return [np.concatenate([f.result() for f in futures[name]]) for name in model_names]
+        finally:
+            os.remove(matrix_path)
+
+def _make_scorer(loaded_models, workers):
+    if workers is not None and workers > 1:
+        return ShardedScorer(loaded_models, workers)
+    return contextlib.nullcontext()
@@ -1,93 +1,152 @@
 import os
+import numpy as np
 import pandas as pd
+from core import ingest
 
-def process():
+def process(actives_dw_path=None, decoys_dw_path=None, actives_cons_path=None, decoys_cons_path=None,
+            descriptor_dtype=np.float32, cache=None, how='inner'):
     """
     Process and combine datawarrior and GOLD files.
     This is based on 1_preparando_arquivo.py.
     
+    Args:
+        actives_dw_path (str): Actives DataWarrior export (default: ./actives_datawarrior.txt).
+        decoys_dw_path (str): Decoys DataWarrior export (default: ./decoys_datawarrior.txt).
+        actives_cons_path (str): Actives GOLD consolidated CSV (default: ./active_consolidated.csv).
+        decoys_cons_path (str): Decoys GOLD consolidated CSV (default: ./decoys_consolidated.csv).
+        descriptor_dtype: dtype the descriptor and score columns are parsed as.
+        cache (core.stage_cache.StageCache): Optional cache of the parsed input files.
+        how (str): 'inner' keeps compounds found in both exports; 'left' keeps every
+            DataWarrior compound and fills missing GOLD scores with 0 (see join_on_name).
+    
     Returns:
         pandas.DataFrame: The combined and processed dataframe.
     """
     # Get current directory
     caminho_diretorio = os.getcwd()
     
-    # Process actives from DataWarrior
+    # Process actives from DataWarrior (structure/smiles columns are not parsed).
+    # The typed reader yields one block per column; copy() consolidates them
+    # so the label column below does not make a fragmented frame
     nome_data = 'actives_datawarrior.txt'
-    caminho_data = os.path.join(caminho_diretorio, nome_data)
-    df_data = pd.read_csv(caminho_data, delimiter='\t', header=0)
-    
-    # Remove unwanted columns
-    colunas_remover = ['Structure of smiles [idcode]', 'smiles', 'Unnamed: 16']
-    df_clean = df_data.drop(columns=colunas_remover, errors='ignore')
+    caminho_data = actives_dw_path or os.path.join(caminho_diretorio, nome_data)
+    df_clean = ingest.read_datawarrior(caminho_data, descriptor_dtype, cache=cache).copy()
+    df_clean['atividade'] = 1
     
     # Process decoys from DataWarrior
     nome_dw_decoys = 'decoys_datawarrior.txt'
-    caminho_data = os.path.join(caminho_diretorio, nome_dw_decoys)
-    df_dw_decoys = pd.read_csv(caminho_data, delimiter='\t', header=0)
-    
-    # Remove unwanted columns
-    df_decoys_clean = df_dw_decoys.drop(columns=colunas_remover, errors='ignore')
+    caminho_data = decoys_dw_path or os.path.join(caminho_diretorio, nome_dw_decoys)
+    df_decoys_clean = ingest.read_datawarrior(caminho_data, descriptor_dtype, cache=cache).copy()
+    df_decoys_clean['atividade'] = 0
     
     # Combine actives and decoys
     df_dw_final = pd.concat([df_clean, df_decoys_clean], axis=0, join='outer')
-    df_dw_final = df_dw_final.fillna(0)
+    # (an outer concat of frames with different columns is column-by-column again)
+    df_dw_final = df_dw_final.fillna(0).copy()
     
-    # Process actives from GOLD
+    # Process actives from GOLD (Index, Rescore.Rmsd and Version are not parsed)
     nome_gold = 'active_consolidated.csv'
-    caminho_arquivo = os.path.join(caminho_diretorio, nome_gold)
-    df_cons = pd.read_csv(caminho_arquivo, delimiter=',', header=0)
+    caminho_arquivo = actives_cons_path or os.path.join(caminho_diretorio, nome_gold)
+    df_cons = ingest.read_gold(caminho_arquivo, descriptor_dtype, cache=cache).copy()
     df_cons['activity'] = 1
     
     # Process decoys from GOLD
     nome_gold_dec = 'decoys_consolidated.csv'
-    caminho_arquivo = os.path.join(caminho_diretorio, nome_gold_dec)
-    df_cons_dec = pd.read_csv(caminho_arquivo, delimiter=',', header=0)
+    caminho_arquivo = decoys_cons_path or os.path.join(caminho_diretorio, nome_gold_dec)
+    df_cons_dec = ingest.read_gold(caminho_arquivo, descriptor_dtype, cache=cache).copy()
     df_cons_dec['activity'] = 0
     
-    # Combine GOLD data
+    # Combine GOLD data (names were already normalised by the readers)
     df_gold_final = pd.concat([df_cons, df_cons_dec], axis=0, join='outer')
-    df_gold_final = df_gold_final.fillna(0)
-    
-    # Process DataWarrior name column
-    df_dw_final['name'] = df_dw_final['name'].str.replace('Resultados/', '', regex=False)
-    df_dw_final['name'] = df_dw_final['name'].str.replace('.pdb', '', regex=False)
-    df_dw_final["name"] = df_dw_final.iloc[:,0].str.strip().str.upper()
+    df_gold_final = df_gold_final.fillna(0).copy()
     
-    # Process GOLD name column
-    df_gold_final = df_gold_final.rename(columns={'Entry': 'name'})
-    df_gold_final['name'] = df_gold_final['name'].str.split('|').str[1]
-    df_gold_final['name'] = df_gold_final['name'].str.replace('Resultados/', '', regex=False)
-    df_gold_final['name'] = df_gold_final['name'].str.replace('.pdb', '', regex=False)
-    df_gold_final["name"] = df_gold_final.iloc[:,0].str.strip().str.upper()
+    # Join DataWarrior and GOLD rows on the compound name (rows may be in any order)
+    df_final, report = join_on_name(df_dw_final, df_gold_final, how=how)
+    print_join_report(report)
     
-    # Combine DataWarrior and GOLD data
-    df_concat = pd.concat([df_dw_final, df_gold_final], axis=1)
+    # The activity comes from the DataWarrior file of origin; GOLD must agree where both have the compound
+    activity_gold = df_final.pop('activity')
+    if how == 'left':
+        activity_gold = activity_gold.where(report['matched'], df_final['atividade'])
+    conflitos = df_final['atividade'].to_numpy() != activity_gold.to_numpy()
+    if conflitos.any():
+        raise ValueError(f"{conflitos.sum()} compounds are active in one export and decoy in the other. "
+                         f"First few: {list(df_final['name'][conflitos].head())}")
     
     # Move activity column to the end
-    activity_col = df_concat.pop('activity')
-    df_concat['activity'] = activity_col
-    
-    # Check for name discrepancies
-    colunas_name_iguais = df_concat['name'].iloc[:, 0] == df_concat['name'].iloc[:, 1]
-    
-    if colunas_name_iguais.all():
-        df_gold_final_sem_primeira_coluna = df_gold_final.iloc[:, 1:]
-        df_final = pd.concat([df_dw_final, df_gold_final_sem_primeira_coluna], axis=1)
-    else:
-        # If there are discrepancies, you can handle them or raise an error
-        discrepancias = df_concat[~colunas_name_iguais]
-        raise ValueError(f"Name discrepancies found between DataWarrior and GOLD files. First few: {discrepancias.head()}")
-    
-    # Assign activity
-    df_final['atividade'] = activity_col
+    df_final['atividade'] = df_final.pop('atividade')
     
     # Remove unnecessary columns
     remove_colunas = ["Index", "Rescore.Rmsd", "Version"]
     df_final = df_final.drop(columns=remove_colunas, errors='ignore')
     
-    # Remove activity column if it exists (we'll keep atividade)
-    if 'activity' in df_final.columns:
-        df_final.pop('activity')
+    return df_final
+
+def join_on_name(df_left, df_right, how='inner', on='name'):
+    """
+    Hash join of two frames on a key column, preserving the left frame's row order.
+    
+    The right frame's keys are put in a hash index once and every left key is
+    probed against it (linear time), so the two inputs can be in any order.
+    Duplicate right keys keep their first row.
+    
+    Args:
+        df_left (pandas.DataFrame): Probe side (DataWarrior descriptors).
+        df_right (pandas.DataFrame): Build side (GOLD scores).
+        how (str): 'inner' drops left rows without a match, 'left' keeps them with 0 in the right columns.
+        on (str): Key column; it appears once, from the left frame.
     
-    return df_final 
\ No newline at end of file
+    Returns:
+        tuple: (joined frame, report) - report holds 'matched' (bool array over the
+            output rows) and the lists 'unmatched_left', 'unmatched_right' and 'duplicate_right'.
+    """
+    if how not in ('inner', 'left'):
+        raise ValueError(f"how must be 'inner' or 'left', got '{how}'")
+    
+    # Build: hash index of the right keys
+    right_keys = pd.Index(df_right[on])
+    duplicated = right_keys.duplicated()
+    duplicate_right = list(pd.unique(right_keys[duplicated]))
+    if duplicated.any():
+        df_right = df_right[~duplicated]
+        right_keys = right_keys[~duplicated]
+    
+    # Probe: position of each left key in the right frame (-1 when missing)
+    posicoes = right_keys.get_indexer(df_left[on])
+    matched = posicoes >= 0
+    probed = np.zeros(len(right_keys), dtype=bool)
+    probed[posicoes[matched]] = True
+    
+    report = {
+        'unmatched_left': list(df_left[on][~matched]),
+        'unmatched_right': list(right_keys[~probed]),
+        'duplicate_right': duplicate_right,
+    }
+    
+    right_values = df_right.drop(columns=[on])
+    if how == 'inner':
+        left_part = df_left[matched]
+        right_part = right_values.iloc[posicoes[matched]]
+        matched = matched[matched]
+    else:
+        left_part = df_left
+        right_part = right_values.reindex(range(len(df_left))) if right_values.empty else \
+            right_values.iloc[np.where(matched, posicoes, 0)].reset_index(drop=True)
+        # Missing scores count as 0, as in the outer concatenations above
+        right_part.loc[~matched] = 0
+    
+    joined = pd.concat([left_part.reset_index(drop=True), right_part.reset_index(drop=True)], axis=1)
+    report['matched'] = matched
+    return joined, report
+
+def print_join_report(report, limit=5):
+    """Print how many names could not be matched, with a few examples."""
+    n_matched = int(report['matched'].sum())
+    print(f"Matched {n_matched} of {n_matched + len(report['unmatched_left'])} DataWarrior compounds with GOLD scores")
+    for key, text in [('unmatched_left', 'DataWarrior compounds without GOLD scores'),
+                      ('unmatched_right', 'GOLD compounds without DataWarrior descriptors'),
+                      ('duplicate_right', 'duplicated GOLD names (first row kept)')]:
+        names = report[key]
+        if names:
+            exemplos = ', '.join(str(name) for name in names[:limit])
+            print(f"  {len(names)} {text}: {exemplos}{', ...' if len(names) > limit else ''}")
@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+# Minority classes larger than this use approximate neighbour search with neighbors='auto'
+APPROX_NEIGHBORS_MIN_ROWS = 20000
+
+def _class_counts(y):
+    classes, counts = np.unique(y, return_counts=True)
+    return dict(zip(classes.tolist(), counts.tolist()))
+
+def _as_output(values, y_values, X, y):
+    """Wrap resampled arrays like the inputs (DataFrame/Series with their names, or arrays)."""
+    if isinstance(X, pd.DataFrame):
+        values = pd.DataFrame(values, columns=X.columns, copy=False)
+    if isinstance(y, pd.Series):
+        y_values = pd.Series(y_values, name=y.name, dtype=y.dtype)
+    return values, y_values
+
+def exact_neighbors(X, k):
+    """Indices of the k nearest neighbours of every row of X (itself excluded), as imblearn's SMOTE finds them."""
+    from sklearn.neighbors import NearestNeighbors
+
+    return NearestNeighbors(n_neighbors=k + 1).fit(X).kneighbors(X, return_distance=False)[:, 1:]
+
+def _merge_candidates(best_idx, best_dist, cand_idx, cand_dist, k):
+    """Keep the k nearest distinct candidates per row (merged with the current best)."""
+    cand_idx = np.concatenate([best_idx, cand_idx], axis=1)
+    cand_dist = np.concatenate([best_dist, cand_dist], axis=1)
+    by_index = np.argsort(cand_idx, axis=1, kind='stable')
+    cand_idx = np.take_along_axis(cand_idx, by_index, axis=1)
+    cand_dist = np.take_along_axis(cand_dist, by_index, axis=1)
+    repeated = np.zeros(cand_idx.shape, dtype=bool)
+    repeated[:, 1:] = cand_idx[:, 1:] == cand_idx[:, :-1]
+    cand_dist[repeated | (cand_idx < 0)] = np.inf
+    keep = np.argpartition(cand_dist, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(cand_idx, keep, axis=1), np.take_along_axis(cand_dist, keep, axis=1)
+
+def _projection_leaves(X, leaf_size, rng):
+    """Split the rows in halves at the median of random projections until every part fits leaf_size."""
+    leaves, parts = [], [np.arange(len(X))]
+    while parts:
+        part = parts.pop()
+        if len(part) <= leaf_size:
+            leaves.append(part)
+            continue
+        projection = X[part] @ rng.standard_normal(X.shape[1]).astype(X.dtype)
+        order = np.argsort(projection, kind='stable')
+        half = len(part) // 2
+        parts.extend([part[order[:half]], part[order[half:]]])
+    return leaves
+
+def approximate_neighbors(X, k, n_trees=4, leaf_size=256, n_refine=2, batch_size=4096, random_state=42):
+    """
+    Approximate k nearest neighbours of every row of X (itself excluded).
+
+    Candidates come from random projection trees: the rows are split in
+    halves along random directions until each leaf has at most leaf_size
+    rows, and exact distances are computed within a leaf. The best
+    candidates of n_trees trees are then refined n_refine times with the
+    neighbours of each row's neighbours. Cost and memory grow with
+    rows x (leaf_size + k^2) instead of rows squared.
+
+    Args:
+        X (numpy.ndarray): (n_rows x n_features) values.
+        k (int): Neighbours per row.
+        n_trees (int): Random projection trees.
+        leaf_size (int): Maximum rows per leaf.
+        n_refine (int): Neighbour-of-neighbour refinement rounds.
+        batch_size (int): Rows refined at a time (bounds memory).
+        random_state (int): Seed of the projections.
+
+    Returns:
+        numpy.ndarray: (n_rows x k) neighbour indices, nearest first.
+    """
+    n_rows = len(X)
+    leaf_size = max(leaf_size, 2 * (k + 1))
+    rng = np.random.RandomState(random_state)
+    sq_norms = np.einsum('ij,ij->i', X, X).astype(np.float64)
+    best_idx = np.full((n_rows, k), -1, dtype=np.intp)
+    best_dist = np.full((n_rows, k), np.inf)
+
+    for _ in range(n_trees):
+        for leaf in _projection_leaves(X, leaf_size, rng):
+            values = X[leaf]
+            dist = sq_norms[leaf][:, None] + sq_norms[leaf][None, :] - 2.0 * (values @ values.T)
+            np.fill_diagonal(dist, np.inf)
+            best_idx[leaf], best_dist[leaf] = _merge_candidates(
+                best_idx[leaf], best_dist[leaf], np.broadcast_to(leaf, dist.shape), dist, k)
+
+    for _ in range(n_refine):
+        neighbors = best_idx.copy()
+        for start in range(0, n_rows, batch_size):
+            rows = np.arange(start, min(start + batch_size, n_rows))
+            cand_idx = neighbors[neighbors[rows]].reshape(len(rows), -1)
+            diffs = X[cand_idx] - X[rows][:, None, :]
+            cand_dist = np.einsum('ijk,ijk->ij', diffs, diffs).astype(np.float64)
+            cand_dist[cand_idx == rows[:, None]] = np.inf
+            best_idx[rows], best_dist[rows] = _merge_candidates(best_idx[rows], best_dist[rows], cand_idx,
+                                                                cand_dist, k)
+
+    nearest_first = np.argsort(best_dist, axis=1, kind='stable')
+    return np.take_along_axis(best_idx, nearest_first, axis=1)
+
+def smote(X, y, dtype=None, k_neighbors=5, neighbors='auto', chunk_size=10000, random_state=42, n_new=None):
+    """
+    Oversample every smaller class up to the largest one with SMOTE.
+
+    With the input dtype and exact neighbours this gives the same rows as
+    imblearn's SMOTE(random_state=42): the original rows in their order,
+    then the synthetic ones. The output matrix is allocated once and the
+    synthetic rows are generated into it chunk_size rows at a time, so no
+    full-size temporaries are created.
+
+    Args:
+        X (pandas.DataFrame or numpy.ndarray): Features.
+        y (pandas.Series or numpy.ndarray): Class labels.
+        dtype: dtype of the resampled features (None = the input's; float32 halves float64's memory).
+        k_neighbors (int): Neighbours a synthetic row may be interpolated towards.
+        neighbors (str): 'exact', 'approximate' (see approximate_neighbors) or
+            'auto' (approximate above APPROX_NEIGHBORS_MIN_ROWS rows per class).
+        chunk_size (int): Synthetic rows generated per step.
+        random_state (int): Seed of the sampling.
+        n_new (dict): Synthetic rows to generate per class, instead of
+            enough to match the largest class.
+
+    Returns:
+        tuple: (X_resampled, y_resampled), of the same types as X and y.
+    """
+    values = np.asarray(X, dtype=dtype)
+    y_values = np.asarray(y)
+    counts = _class_counts(y_values)
+    n_target = max(counts.values())
+    # Classes in sorted order, as imblearn samples them
+    if n_new is None:
+        new_rows = {label: n_target - count for label, count in counts.items() if count < n_target}
+    else:
+        new_rows = {label: n_new[label] for label in counts if n_new.get(label, 0) > 0}
+
+    out = np.empty((len(values) + sum(new_rows.values()), values.shape[1]), dtype=values.dtype)
+    out[:len(values)] = values
+    y_out = np.empty(len(out), dtype=y_values.dtype)
+    y_out[:len(values)] = y_values
+
+    position = len(values)
+    for label, n_new in new_rows.items():
+        X_class = values[y_values == label]
+        if len(X_class) <= k_neighbors:
+            raise ValueError(f"SMOTE needs more than {k_neighbors} samples of class {label}, got {len(X_class)}")
+        approximate = neighbors == 'approximate' or (neighbors == 'auto' and len(X_class) > APPROX_NEIGHBORS_MIN_ROWS)
+        nns = approximate_neighbors(X_class, k_neighbors) if approximate else exact_neighbors(X_class, k_neighbors)
+
+        # Same random draws as imblearn: all neighbour picks, then all steps
+        rng = np.random.RandomState(random_state)
+        picks = rng.randint(low=0, high=nns.size, size=n_new)
+        steps = rng.uniform(size=n_new)[:, np.newaxis]
+        rows, cols = np.divmod(picks, nns.shape[1])
+
+        for start in range(0, n_new, chunk_size):
+            stop = min(start + chunk_size, n_new)
+            base = X_class[rows[start:stop]]
+            diffs = X_class[nns[rows[start:stop], cols[start:stop]]] - base
+            out[position + start:position + stop] = base + steps[start:stop] * diffs
+        y_out[position:position + n_new] = label
+        position += n_new
+
+    return _as_output(out, y_out, X, y)
+
+def undersample(X, y, dtype=None, ratio=1.0, random_state=42):
+    """
+    Randomly drop rows of the larger classes (decoys) down to ratio x the smallest class.
+
+    Kept rows stay in their original order.
+
+    Args:
+        X (pandas.DataFrame or numpy.ndarray): Features.
+        y (pandas.Series or numpy.ndarray): Class labels.
+        dtype: dtype of the resampled features (None = the input's).
+        ratio (float): Rows kept per class, relative to the smallest class.
+        random_state (int): Seed of the sampling.
+
+    Returns:
+        tuple: (X_resampled, y_resampled), of the same types as X and y.
+    """
+    y_values = np.asarray(y)
+    counts = _class_counts(y_values)
+    n_keep = int(round(min(counts.values()) * ratio))
+    rng = np.random.RandomState(random_state)
+    keep = []
+    for label, count in counts.items():
+        rows = np.flatnonzero(y_values == label)
+        keep.append(rows if count <= n_keep else rng.choice(rows, size=n_keep, replace=False))
+    keep = np.sort(np.concatenate(keep))
+    return _as_output(np.asarray(X, dtype=dtype)[keep], y_values[keep], X, y)
+
+def unchanged(X, y, dtype=None):
+    """No resampling (for 'class_weight' and 'none'); only the dtype of the features may change."""
+    if dtype is None:
+        return X, y
+    if isinstance(X, pd.DataFrame):
+        return X.astype(dtype, copy=False), y
+    return np.asarray(X, dtype=dtype), y
+
+# strategy -> function(X, y, dtype, **options) returning (X_resampled, y_resampled)
+RESAMPLING_STRATEGIES = {
+    'smote': smote,
+    'undersample': undersample,
+    'class_weight': unchanged,
+    'none': unchanged,
+}
+
+def resample(X, y, strategy='smote', dtype=None, **options):
+    """
+    Balance a training set with one of RESAMPLING_STRATEGIES.
+
+    'class_weight' keeps the rows as they are; the imbalance is handled
+    by the models instead (see balance_estimator).
+
+    Args:
+        X (pandas.DataFrame): Features.
+        y (pandas.Series): Class labels.
+        strategy (str): 'smote', 'undersample', 'class_weight' or 'none'.
+        dtype: dtype of the resampled features (None = the input's).
+        **options: Options of the strategy function.
+
+    Returns:
+        tuple: (X_resampled, y_resampled)
+    """
+    if strategy not in RESAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown resampling strategy '{strategy}'. Choose from {list(RESAMPLING_STRATEGIES)}")
+    return RESAMPLING_STRATEGIES[strategy](X, y, dtype=dtype, **options)
+
+def balance_estimator(estimator, y):
+    """
+    Weight the classes of an unfitted estimator inversely to their frequency in y.
+
+    Uses class_weight='balanced' where the estimator has it, scale_pos_weight
+    (negatives / positives) for XGBoost and uniform priors for naive Bayes.
+    Other estimators are returned unchanged.
+    """
+    params = estimator.get_params()
+    counts = _class_counts(np.asarray(y))
+    if 'class_weight' in params:
+        estimator.set_params(class_weight='balanced')
+    elif 'scale_pos_weight' in params and len(counts) == 2:
+        negatives, positives = counts.values()
+        estimator.set_params(scale_pos_weight=negatives / positives)
+    elif 'priors' in params:
+        estimator.set_params(priors=[1 / len(counts)] * len(counts))
+    return estimator
@@ -0,0 +1,368 @@
+import os
+import json
+import glob
+import queue
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from core import model_bundle, predict_compounds, tree_compiler
+
+class ModelCache:
+    """
+    LRU cache of loaded model sets, keyed by prefix and modification time.
+
+    Re-running create-model for a prefix changes its mtime, so the next
+    request loads the new models instead of serving stale ones. With
+    compiled_trees, the DT/RF/XGB models of a set are compiled once when
+    it is loaded (see tree_compiler).
+    """
+
+    def __init__(self, models_dir, max_entries=4, compiled_trees=False):
+        self.models_dir = models_dir
+        self.max_entries = max_entries
+        self.compiled_trees = compiled_trees
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _mtime(self, prefix):
+        path = os.path.join(model_bundle.bundle_path(self.models_dir, prefix), model_bundle.MANIFEST_NAME)
+        if os.path.exists(path):
+            return os.path.getmtime(path)
+        legacy = glob.glob(os.path.join(glob.escape(self.models_dir), f"{glob.escape(prefix)}_*_model.pkl"))
+        if not legacy:
+            raise ValueError(f"No models found with prefix '{prefix}' in {self.models_dir}")
+        return max(os.path.getmtime(path) for path in legacy)
+
+    def get(self, prefix, model_names=None):
+        """Return {model name: model} for prefix, loading it on a miss."""
+        key = (prefix, self._mtime(prefix), tuple(model_names) if model_names else None)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            loaded_models = predict_compounds.load_models(self.models_dir, prefix, model_names)
+            if self.compiled_trees:
+                loaded_models = tree_compiler.compile_models(loaded_models)
+            # Older versions of the same prefix will never be asked for again
+            for old_key in [k for k in self._entries if k[0] == prefix and k[1] != key[1]]:
+                del self._entries[old_key]
+            self._entries[key] = loaded_models
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return loaded_models
+
+    def keys(self):
+        with self._lock:
+            return [{'prefix': k[0], 'mtime': k[1], 'models': list(k[2]) if k[2] else None}
+                    for k in self._entries]
+
+class ServerStats:
+    """Request, row, batch and latency counters for the /stats endpoint."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.batch_rows = 0
+        self.scoring_seconds = 0.0
+        self._latencies = deque(maxlen=window)
+
+    def record_batch(self, n_requests, n_rows, seconds):
+        with self._lock:
+            self.batches += 1
+            self.batch_rows += n_rows
+            self.scoring_seconds += seconds
+
+    def record_request(self, n_rows, latency, ok=True):
+        with self._lock:
+            self.requests += 1
+            if ok:
+                self.rows += n_rows
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.time() - self.started_at
+            latencies = sorted(self._latencies)
+
+            def percentile(q):
+                if not latencies:
+                    return None
+                return round(1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+
+            return {
+                'uptime_seconds': round(uptime, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'rows': self.rows,
+                'batches': self.batches,
+                'mean_batch_rows': round(self.batch_rows / self.batches, 2) if self.batches else 0,
+                'rows_per_second': round(self.rows / uptime, 2) if uptime > 0 else 0,
+                'scoring_rows_per_second': round(self.batch_rows / self.scoring_seconds, 2) if self.scoring_seconds else 0,
+                'latency_ms_p50': percentile(0.50),
+                'latency_ms_p95': percentile(0.95),
+                'latency_ms_max': round(1000 * latencies[-1], 3) if latencies else None,
+            }
+
+class MicroBatcher:
+    """
+    Combine concurrent small scoring requests into larger predict_proba calls.
+
+    Requests are queued; a single scoring thread takes the first waiting
+    request, keeps collecting for up to max_wait_ms (or until max_batch_rows
+    rows are waiting), then scores requests that share the same models and
+    consensus settings as one frame and splits the result back.
+
+    A request that cannot be scored only fails itself: requests missing
+    feature columns are rejected before the frames are joined, and when a
+    joined frame fails (e.g. text in a feature column) its requests are
+    scored one by one.
+    """
+
+    def __init__(self, cache, stats, max_batch_rows=4096, max_wait_ms=5.0):
+        self.cache = cache
+        self.stats = stats
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, prefix, model_names=None, threshold=0.5, model_thresholds=None, weights=None):
+        """Queue one request; returns a Future resolving to its result DataFrame."""
+        future = Future()
+        key = (
+            prefix,
+            tuple(model_names) if model_names else None,
+            threshold,
+            tuple(sorted((model_thresholds or {}).items())),
+            tuple(sorted(weights.items())) if weights is not None else None,
+            # The output name column follows the input's, so frames only join with the same one
+            'NAME' if 'NAME' in frame.columns else 'name',
+        )
+        self._queue.put((key, frame, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        n_rows = len(first[1])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            n_rows += len(item[1])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            groups = OrderedDict()
+            for key, frame, future in batch:
+                groups.setdefault(key, []).append((frame, future))
+            for key, items in groups.items():
+                self._score_group(key, items)
+
+    def _score_group(self, key, items):
+        prefix, model_names, threshold, model_thresholds, weights, _ = key
+        try:
+            loaded_models = self.cache.get(prefix, list(model_names) if model_names else None)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        settings = (threshold, dict(model_thresholds), dict(weights) if weights is not None else None)
+
+        # Requests missing feature columns fail on their own, before the frames are joined
+        expected_columns = next(iter(loaded_models.values())).feature_names_in_
+        valid = []
+        for frame, future in items:
+            missing = [col for col in expected_columns if col not in frame.columns]
+            if missing:
+                future.set_exception(ValueError(f"Required column '{missing[0]}' not found in input data"))
+            else:
+                valid.append((frame, future))
+        if not valid:
+            return
+
+        try:
+            self._score(valid, loaded_models, settings)
+        except Exception as e:
+            if len(valid) == 1:
+                valid[0][1].set_exception(e)
+                return
+            # One of the requests has values that cannot be scored: score each
+            # alone, so only that one gets the error
+            for item in valid:
+                try:
+                    self._score([item], loaded_models, settings)
+                except Exception as e:
+                    item[1].set_exception(e)
+
+    def _score(self, items, loaded_models, settings):
+        start = time.perf_counter()
+        frame = pd.concat([f for f, _ in items], ignore_index=True) if len(items) > 1 else items[0][0]
+        df_pred = predict_compounds._score_frame(frame, loaded_models, *settings)
+        self.stats.record_batch(len(items), len(frame), time.perf_counter() - start)
+
+        offset = 0
+        for f, future in items:
+            future.set_result(df_pred.iloc[offset:offset + len(f)].reset_index(drop=True))
+            offset += len(f)
+
+def _check_request(request):
+    """Raise ValueError for a /predict request body with missing or mistyped fields."""
+    if not isinstance(request, dict):
+        raise ValueError("Request body must be a JSON object")
+    if 'prefix' not in request:
+        raise ValueError("Request needs a 'prefix'")
+    if not isinstance(request['prefix'], str):
+        raise ValueError("'prefix' must be a string")
+    models = request.get('models')
+    if models is not None and (not isinstance(models, list) or not all(isinstance(m, str) for m in models)):
+        raise ValueError("'models' must be a list of model names")
+    for field in ('model_thresholds', 'weights'):
+        value = request.get(field)
+        if value is not None and (not isinstance(value, dict) or not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in value.values())):
+            raise ValueError(f"'{field}' must map model names to numbers")
+
+def _make_handler(server_state):
+    cache, batcher, stats = server_state['cache'], server_state['batcher'], server_state['stats']
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        """JSON endpoints: POST /predict, GET /stats, GET /health, GET /models."""
+
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate the cost of small requests
+            pass
+
+        def _send(self, status, body):
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif self.path == '/stats':
+                self._send(200, {**stats.snapshot(), 'cache': {
+                    'hits': cache.hits, 'misses': cache.misses, 'entries': cache.keys()}})
+            elif self.path == '/models':
+                self._send(200, {'bundles': model_bundle.find_bundles(cache.models_dir)})
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': f"Unknown path {self.path}"})
+                return
+            start = time.perf_counter()
+            n_rows = 0
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                _check_request(request)
+                if 'columns' in request:
+                    frame = pd.DataFrame(request.get('data', []), columns=request['columns'])
+                else:
+                    frame = pd.DataFrame(request.get('rows', []))
+                n_rows = len(frame)
+                if n_rows == 0:
+                    raise ValueError("Request has no rows")
+                if 'NAME' not in frame.columns and 'name' not in frame.columns:
+                    # Number rows per request, not per micro-batch
+                    frame.insert(0, 'NAME', [f"Compound_{i}" for i in range(n_rows)])
+                future = batcher.submit(
+                    frame, request['prefix'], request.get('models'),
+                    float(request.get('threshold', 0.5)), request.get('model_thresholds'),
+                    request.get('weights')
+                )
+                df_pred = future.result()
+            except Exception as e:
+                stats.record_request(n_rows, time.perf_counter() - start, ok=False)
+                self._send(400, {'error': str(e)})
+                return
+            body = df_pred.to_json(orient='split', index=False).encode()
+            stats.record_request(n_rows, time.perf_counter() - start)
+            self._send(200, body)
+
+    return PredictionHandler
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('unix', 0)
+
+def make_server(models_dir, host='127.0.0.1', port=8765, socket_path=None,
+                cache_size=4, max_batch_rows=4096, max_wait_ms=5.0, compiled_trees=False):
+    """
+    Build (but do not start) a prediction server.
+
+    Args:
+        models_dir (str): Directory containing model bundles.
+        host (str): Interface to listen on (TCP mode).
+        port (int): TCP port; 0 picks a free port.
+        socket_path (str): Listen on this Unix socket instead of TCP.
+        cache_size (int): Number of model sets kept loaded.
+        max_batch_rows (int): Stop collecting a micro-batch once this many rows wait.
+        max_wait_ms (float): Longest time a request waits for others to join its batch.
+        compiled_trees (bool): Score DT/RF/XGB with their compiled form (tree_compiler).
+
+    Returns:
+        tuple: (server, batcher) - call server.serve_forever(), then
+            server.server_close() and batcher.close() to stop.
+    """
+    stats = ServerStats()
+    cache = ModelCache(models_dir, max_entries=cache_size, compiled_trees=compiled_trees)
+    batcher = MicroBatcher(cache, stats, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+    handler = _make_handler({'cache': cache, 'batcher': batcher, 'stats': stats})
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+    return server, batcher
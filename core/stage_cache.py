@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import tempfile
+
+from core.storage import write_frame, read_frame
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+META_NAME = 'meta.json'
+FILE_HASHES_NAME = 'file_hashes.json'
+
+def default_cache_dir():
+    """Cache directory: $MLCLI_CACHE_DIR, or ~/.cache/mlcli."""
+    return os.environ.get('MLCLI_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'mlcli')
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def code_version(modules):
+    """Hash of the source of a stage's module(s), so editing a stage invalidates its entries."""
+    if not isinstance(modules, (list, tuple)):
+        modules = [modules]
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(inspect.getsourcefile(module), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def _library_versions():
+    from importlib.metadata import version, PackageNotFoundError
+    versions = {}
+    for package in ['pandas', 'numpy', 'scikit-learn']:
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            pass
+    return versions
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+class StageCache:
+    """
+    Content-addressed on-disk cache of pipeline stage outputs.
+
+    An entry's key hashes the stage name, its parameters, the source of the
+    stage module, the pandas/numpy/scikit-learn versions and the keys (or file
+    hashes) of its inputs, so a key changes whenever anything that could change
+    the output does. Each entry is a directory holding the output frame
+    (see core.storage), optional joblib artifacts and a small JSON metadata
+    file whose mtime records the last use. When the cache grows past
+    max_bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._libraries = None
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def file_digest(self, path):
+        """
+        SHA-256 of a file's content.
+
+        Hashes are remembered per (path, size, mtime) so unchanged inputs are
+        not read again on the next run.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        index_path = os.path.join(self.cache_dir, FILE_HASHES_NAME)
+        try:
+            with open(index_path) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            index = {}
+
+        entry = index.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(index, file)
+        os.replace(tmp_path, index_path)
+        return index[path]['sha256']
+
+    def key(self, stage, module, inputs, params=None):
+        """
+        Cache key of a stage run.
+
+        Args:
+            stage (str): Stage name.
+            module: Module implementing the stage, or a list of modules (their source is hashed).
+            inputs (list): Keys of upstream stages and/or input file hashes.
+            params (dict): JSON-serialisable stage parameters.
+
+        Returns:
+            str: Hex digest.
+        """
+        if self._libraries is None:
+            self._libraries = _library_versions()
+        return _digest(stage, code_version(module), self._libraries, list(inputs), params or {})
+
+    def get(self, key):
+        """
+        Load a cached stage output.
+
+        Returns:
+            tuple: (frame, artifacts dict), or None on a miss.
+        """
+        import joblib
+
+        path = self._entry_path(key)
+        meta_path = os.path.join(path, META_NAME)
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+            frame = read_frame(os.path.join(path, meta['frame']))
+            artifacts = {name: joblib.load(os.path.join(path, file_name))
+                         for name, file_name in meta['artifacts'].items()}
+        except (OSError, ValueError, KeyError):
+            return None
+        # Mark as recently used
+        os.utime(meta_path)
+        return frame, artifacts
+
+    def put(self, key, stage, frame, artifacts=None):
+        """Store a stage output, then evict old entries if the cache is too large."""
+        import joblib
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            frame_file = os.path.basename(write_frame(frame, os.path.join(tmp_path, 'frame')))
+            artifact_files = {}
+            for name, obj in (artifacts or {}).items():
+                artifact_files[name] = f"artifact_{name}.joblib"
+                joblib.dump(obj, os.path.join(tmp_path, artifact_files[name]))
+            with open(os.path.join(tmp_path, META_NAME), 'w') as file:
+                json.dump({'stage': stage, 'created_at': time.time(), 'frame': frame_file,
+                           'artifacts': artifact_files, 'shape': list(frame.shape)}, file)
+            # Entries appear atomically; a concurrent run storing the same key wins the race harmlessly
+            try:
+                os.rename(tmp_path, self._entry_path(key))
+            except OSError:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        self.evict()
+
+    def entries(self):
+        """
+        List cache entries, least recently used first.
+
+        Returns:
+            list: Dicts with key, stage, shape, bytes and last_used (epoch seconds).
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self.cache_dir, key, META_NAME)
+            if key.startswith('.') or not os.path.isfile(meta_path):
+                continue
+            try:
+                with open(meta_path) as file:
+                    meta = json.load(file)
+            except (OSError, ValueError):
+                continue
+            entries.append({
+                'key': key,
+                'stage': meta.get('stage'),
+                'shape': meta.get('shape'),
+                'bytes': _dir_size(os.path.join(self.cache_dir, key)),
+                'last_used': os.path.getmtime(meta_path),
+            })
+        return sorted(entries, key=lambda entry: entry['last_used'])
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(entry['bytes'] for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_path(entry['key']), ignore_errors=True)
+            total -= entry['bytes']
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove every entry (and the file hash index). Returns the number of entries removed."""
+        entries = self.entries()
+        for entry in entries:
+            shutil.rmtree(self._entry_path(entry['key']), ignore_errors=True)
+        # Leftovers of interrupted writes
+        for name in os.listdir(self.cache_dir) if os.path.isdir(self.cache_dir) else []:
+            if name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+        index_path = os.path.join(self.cache_dir, FILE_HASHES_NAME)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        return len(entries)
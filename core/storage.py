@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def frame_extension():
+    """File extension used by write_frame: Feather when pyarrow is installed, else pickle."""
+    return '.feather' if _has_pyarrow() else '.pkl'
+
+def write_frame(df, path_without_ext):
+    """
+    Write a DataFrame in a fast binary format.
+    
+    Feather (columnar, needs pyarrow) is used when available, otherwise
+    pandas' pickle format. Both round-trip dtypes exactly and skip the
+    float parsing of a CSV.
+    
+    Args:
+        df (pandas.DataFrame): Frame to write.
+        path_without_ext (str): Destination path; the extension is added.
+    
+    Returns:
+        str: Path of the written file.
+    """
+    path = path_without_ext + frame_extension()
+    if path.endswith('.feather'):
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_pickle(path)
+    return path
+
+def read_frame(path):
+    """Read a DataFrame written by write_frame."""
+    if path.endswith('.feather'):
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+def as_frame(data):
+    """Return data as a DataFrame, reading it first if it is a path (CSV or write_frame output)."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    if os.path.splitext(str(data))[1] in ('.feather', '.pkl'):
+        return read_frame(data)
+    return pd.read_csv(data, delimiter=',')
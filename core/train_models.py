@@ -1,47 +1,114 @@
 import os
+import sys
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.naive_bayes import GaussianNB
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
-from xgboost import XGBClassifier
-from sklearn.metrics import (
-    classification_report, confusion_matrix, roc_auc_score,
-    matthews_corrcoef, cohen_kappa_score, accuracy_score
-)
-from imblearn.over_sampling import SMOTE
+from scipy.special import expit, logsumexp
+from core import calibration, hyperparameter_search, instrumentation, metrics, resampling
+from core.storage import as_frame
 
-def process(input_file):
+def predict_with_proba(model, X):
+    """
+    Class labels and positive-class probabilities of a binary model.
+
+    Where the label is a function of the scores predict_proba already needs,
+    it is derived from them instead of running the model a second time; the
+    result is identical to (model.predict(X), model.predict_proba(X)[:, 1]).
+    Calibrated models (see core.calibration) score their estimator once and
+    map the same scores through the calibrator.
+
+    Args:
+        model: Fitted classifier with classes_.
+        X (pandas.DataFrame or numpy.ndarray): Feature rows.
+
+    Returns:
+        tuple: (y_pred, y_prob) numpy arrays.
+    """
+    if isinstance(model, calibration.CalibratedModel):
+        estimator = model.estimator
+        if isinstance(estimator, (LogisticRegression, SVC)) and len(estimator.classes_) == 2:
+            # Binary predict is decision > 0 for both
+            decision = calibration.decision_scores(estimator, X)
+            return estimator.classes_.take((decision > 0).astype(np.intp)), model.positive_proba(decision)
+        y_pred, y_prob = predict_with_proba(estimator, X)
+        return y_pred, model.positive_proba(np.asarray(y_prob, dtype=np.float64))
+    if isinstance(model, LogisticRegression) and len(model.classes_) == 2:
+        # predict is decision > 0, predict_proba is expit(decision)
+        decision = model.decision_function(X)
+        return model.classes_.take((decision > 0).astype(np.intp)), expit(decision)
+    if isinstance(model, GaussianNB):
+        jll = model.predict_joint_log_proba(X)
+        proba = np.exp(jll - logsumexp(jll, axis=1)[:, np.newaxis])
+        return model.classes_.take(np.argmax(jll, axis=1)), proba[:, 1]
+    if isinstance(model, (DecisionTreeClassifier, RandomForestClassifier)):
+        proba = model.predict_proba(X)
+        return model.classes_.take(np.argmax(proba, axis=1)), proba[:, 1]
+    # xgboost is only imported to train; a loaded XGB model has imported it already
+    xgboost = sys.modules.get('xgboost')
+    if xgboost is not None and isinstance(model, xgboost.XGBClassifier):
+        proba = model.predict_proba(X)[:, 1]
+        return model.classes_.take((proba > 0.5).astype(np.intp)), proba
+    return model.predict(X), model.predict_proba(X)[:, 1]
+
+def process(data, search_strategy='grid', n_jobs=None, n_iter=10,
+            max_fits=None, time_budget=None, early_stop=False, n_boot=0,
+            resampling_strategy='smote', resampling_dtype=None, calibration_method='sigmoid',
+            calibrated_models=('SVM',)):
     """
     Train and evaluate multiple ML models on the processed data.
     This is based on 4_smote_ml_v2.py.
     
     Args:
-        input_file (str): Path to the input CSV file.
+        data (pandas.DataFrame or str): Output of normalization, or a path to it as CSV.
+        search_strategy (str): 'grid', 'random' or 'halving' hyperparameter search.
+        n_jobs (int): Worker processes shared by all model families (-1 = all cores).
+        n_iter (int): Candidates per model family for the 'random' strategy.
+        max_fits (int): Optional per-family limit on the number of CV fits.
+        time_budget (float): Optional per-family limit on fit time in seconds.
+        early_stop (bool): Skip the remaining CV folds of candidates that can no longer be selected.
+        n_boot (int): Bootstrap resamples for metric confidence intervals (0 = none).
+        resampling_strategy (str): How the classes are balanced: 'smote', 'undersample',
+            'class_weight' or 'none' (see core.resampling).
+        resampling_dtype: dtype of the resampled features (None = the input's).
+        calibration_method (str): 'sigmoid' (Platt) or 'isotonic' (see core.calibration).
+        calibrated_models (list): Model families whose probabilities are calibrated on
+            their held-out CV scores. SVM always is: it is searched without libsvm's
+            internal Platt cross-validation, on its decision function.
     
     Returns:
         tuple: (models, metrics_df, data_splits)
             - models: Dictionary of trained models
             - metrics_df: DataFrame of model performance metrics
-            - data_splits: Dictionary containing X_train, X_test, y_train, y_test
+            - data_splits: Dictionary containing X_train, X_test, y_train, y_test,
+              and train_real (False for the synthetic rows of X_train)
     """
+    # Training-only dependencies (evaluate does not need them)
+    from xgboost import XGBClassifier
+    
     # Load the dataframe
-    df = pd.read_csv(input_file, delimiter=',')
+    df = as_frame(data)
     
     # Separate features and target
     X = df.drop('atividade', axis=1)
     y = df['atividade']
     
-    # Apply SMOTE to balance classes
-    smote = SMOTE(random_state=42)
-    X_resampled, y_resampled = smote.fit_resample(X, y)
+    # Balance classes (SMOTE by default)
+    with instrumentation.span('resample', 'transform', strategy=resampling_strategy,
+                              rows_in=len(X), columns=X.shape[1]) as span:
+        X_resampled, y_resampled = resampling.resample(X, y, resampling_strategy, dtype=resampling_dtype)
+        span.set(rows=len(X_resampled))
+    
+    # Every strategy keeps real rows first (SMOTE appends its synthetic ones)
+    real = np.arange(len(X_resampled)) < min(len(X), len(X_resampled))
     
     # Split into train and test sets
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_resampled, y_resampled, test_size=0.2, random_state=42
+    X_train, X_test, y_train, y_test, train_real, _ = train_test_split(
+        X_resampled, y_resampled, real, test_size=0.2, random_state=42
     )
     
     # Define models and their parameters for optimization
@@ -50,22 +117,29 @@ def process(input_file):
         'NB': (GaussianNB(), {'var_smoothing': [1e-2, 1e-5, 1e-9, 1e-15]}),
         'DT': (DecisionTreeClassifier(), {'max_depth': [3, 5, 10], 'min_samples_split': [2, 5, 10]}),
         'RF': (RandomForestClassifier(), {'n_estimators': [50, 100, 200], 'max_depth': [None, 10, 20]}),
-        'SVM': (SVC(probability=True), {'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf']}),
+        'SVM': (SVC(), {'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf']}),
         'XGB': (XGBClassifier(eval_metric='logloss'), {'n_estimators': [50, 100, 200], 'learning_rate': [0.01, 0.1, 0.2]})
     }
+    if resampling_strategy == 'class_weight':
+        for model, params in models_params.values():
+            resampling.balance_estimator(model, y_train)
+    if calibration_method not in calibration.CALIBRATION_METHODS:
+        raise ValueError(f"Unknown calibration method '{calibration_method}'. "
+                         f"Choose from {list(calibration.CALIBRATION_METHODS)}")
+    calibration_methods = {name: calibration_method for name in models_params
+                           if name == 'SVM' or name in calibrated_models}
     
     # K-Fold Cross Validation
     kfold = StratifiedKFold(n_splits=10, shuffle=True, random_state=42)
-    best_models = {}
-    scores = {}
     
-    # Train models
-    for name, (model, params) in models_params.items():
-        grid_search = GridSearchCV(model, params, cv=kfold, scoring='accuracy')
-        grid_search.fit(X_train, y_train)
-        best_models[name] = grid_search.best_estimator_
-        best_score = grid_search.best_score_
-        scores[name] = best_score
+    # Train models (all families share one pool of CV fit tasks)
+    with instrumentation.span('hyperparameter_search', 'fit', strategy=search_strategy, rows=len(X_train)):
+        best_models, scores, timings = hyperparameter_search.search(
+            models_params, X_train, y_train, kfold,
+            strategy=search_strategy, n_jobs=n_jobs, n_iter=n_iter,
+            max_fits=max_fits, time_budget=time_budget, early_stop=early_stop,
+            calibration_methods=calibration_methods
+        )
     
     # Create results DataFrame
     results_df = pd.DataFrame({
@@ -74,70 +148,44 @@ def process(input_file):
         'Accuracy': [scores[name] for name in scores.keys()]
     })
     
-    # Dictionary for metrics
-    metrics_dict = {
-        'Modelo': [],
-        'Banco': [],
-        'Revocação': [],
-        'Precisão': [],
-        'Sensibilidade': [],
-        'Especificidade': [],
-        'Acurácia': [],
-        'Erro': [],
-        'Medida F': [],
-        'Kappa de Cohen': [],
-        'MCC': [],
-        'AUC ROC': []
-    }
-    
-    # Evaluate models
-    for name, model in best_models.items():
-        y_pred_train = model.predict(X_train)
-        y_prob_train = model.predict_proba(X_train)[:,1]
-        
-        y_pred_test = model.predict(X_test)
-        y_prob_test = model.predict_proba(X_test)[:,1]
-        
-        for (y_true, y_pred, y_prob, banco) in [
-            (y_train, y_pred_train, y_prob_train, "Treinamento"), 
-            (y_test, y_pred_test, y_prob_test, "Teste")
-        ]:
-            cm = confusion_matrix(y_true, y_pred)
-            
-            acc = (cm[0,0] + cm[1,1]) / sum(sum(cm))
-            err = 1 - acc
-            sensitivity = cm[1,1] / (cm[1,0] + cm[1,1]) if (cm[1,0] + cm[1,1]) > 0 else 0
-            specificity = cm[0,0] / (cm[0,0] + cm[0,1]) if (cm[0,0] + cm[0,1]) > 0 else 0
-            f1 = 2 * ((sensitivity * specificity) / (sensitivity + specificity)) if (sensitivity + specificity) > 0 else 0
-            auc = roc_auc_score(y_true, y_prob)
-            mcc = matthews_corrcoef(y_true, y_pred)
-            kappa = cohen_kappa_score(y_true, y_pred)
-            
-            precision = cm[1,1] / (cm[1,1] + cm[0,1]) if (cm[1,1] + cm[0,1]) > 0 else 0
-            
-            # Store metrics
-            metrics_dict['Modelo'].append(name)
-            metrics_dict['Banco'].append(banco)
-            metrics_dict['Revocação'].append(round(sensitivity * 100, 2))
-            metrics_dict['Precisão'].append(round(precision * 100, 2))
-            metrics_dict['Sensibilidade'].append(round(sensitivity * 100, 2))
-            metrics_dict['Especificidade'].append(round(specificity * 100, 2))
-            metrics_dict['Acurácia'].append(round(acc * 100, 2))
-            metrics_dict['Erro'].append(round(err * 100, 2))
-            metrics_dict['Medida F'].append(round(f1, 2))
-            metrics_dict['Kappa de Cohen'].append(round(kappa, 2))
-            metrics_dict['MCC'].append(round(mcc, 2))
-            metrics_dict['AUC ROC'].append(round(auc, 2))
-    
-    # Convert metrics to DataFrame
-    metrics_df = pd.DataFrame(metrics_dict)
-    
-    # Prepare return values
+    # Evaluate
     data_splits = {
         'X_train': X_train,
         'X_test': X_test,
         'y_train': y_train,
-        'y_test': y_test
+        'y_test': y_test,
+        'train_real': train_real
     }
+    metrics_df = evaluate(best_models, data_splits, n_boot=n_boot)
+    
+    return best_models, metrics_df, data_splits 
+
+def evaluate(models, data_splits, n_boot=0, confidence=0.95):
+    """
+    Metrics table of several models on the train and test splits.
     
-    return best_models, metrics_df, data_splits 
\ No newline at end of file
+    Every model is scored once per split; the metrics of all models are then
+    computed together from the stacked (n_models x n_samples) predictions.
+    
+    Args:
+        models (dict): Model name -> fitted classifier.
+        data_splits (dict): X_train, X_test, y_train and y_test.
+        n_boot (int): Bootstrap resamples for confidence intervals (0 = none).
+        confidence (float): Coverage of the bootstrap intervals.
+    
+    Returns:
+        pandas.DataFrame: The metrics table (see core.metrics.metrics_table).
+    """
+    model_names = list(models.keys())
+    splits = []
+    for (X, y, banco) in [(data_splits['X_train'], data_splits['y_train'], "Treinamento"),
+                          (data_splits['X_test'], data_splits['y_test'], "Teste")]:
+        predictions = []
+        for name in model_names:
+            with instrumentation.span('predict', 'predict', model=name, split=banco, rows=len(X)):
+                predictions.append(predict_with_proba(models[name], X))
+        y_pred = np.stack([y_pred for y_pred, _ in predictions])
+        y_prob = np.stack([y_prob for _, y_prob in predictions])
+        splits.append((banco, np.asarray(y), y_pred, y_prob))
+    with instrumentation.span('metrics', 'evaluate', models=len(model_names), n_boot=n_boot):
+        return metrics.metrics_table(model_names, splits, n_boot=n_boot, confidence=confidence)
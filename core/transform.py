@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from core.column_stats import ColumnStats, CoMoments
+from core.pre_treatment import numeric_block
+
+NON_DESCRIPTOR_COLUMNS = ('name', 'NAME', 'atividade')
+
+class PreprocessingTransform:
+    """
+    The fitted create-model preprocessing: zero/variance filter -> MinMax -> correlation drop.
+
+    Stored in model bundles (artifact 'preprocessing') so predict can score
+    raw descriptor files: transform maps raw DataWarrior + GOLD columns to
+    exactly the normalised feature columns the models were trained on.
+
+    It can be fitted three ways:
+        - from_stages: from the outputs of the pre_treatment and normalization
+          stages (what create-model does; no extra pass over the data);
+        - fit: on a DataFrame;
+        - partial_fit: one chunk at a time. Per-column statistics and the
+          co-moment matrix are accumulated (see core.column_stats), so a
+          descriptor file larger than memory can be fitted in one pass;
+          the filter, scaler and correlation drop are derived once, by
+          finalize. Correlations are taken from the co-moments of the raw
+          values, which equal those of the MinMax-scaled values.
+          create-model --streaming-preprocessing fits this way.
+    """
+
+    def __init__(self, max_zero_fraction=0.5, min_variance=0.01, corr_cutoff=0.5):
+        self.max_zero_fraction = max_zero_fraction
+        self.min_variance = min_variance
+        self.corr_cutoff = corr_cutoff
+        self._stats = None
+        self._comoments = None
+        self._pending = False
+
+    @classmethod
+    def from_stages(cls, scaler, output_columns, max_zero_fraction=0.5, min_variance=0.01, corr_cutoff=0.5):
+        """
+        Build the transform from fitted stages.
+
+        Args:
+            scaler (MinMaxScaler): normalization's scaler, fitted on the columns kept by pre_treatment.
+            output_columns (list): Feature columns left after the correlation drop.
+            max_zero_fraction, min_variance, corr_cutoff: Parameters the stages ran with.
+
+        Returns:
+            PreprocessingTransform: Fitted transform.
+        """
+        transform = cls(max_zero_fraction, min_variance, corr_cutoff)
+        transform.input_columns_ = [str(col) for col in scaler.feature_names_in_]
+        transform.scaler_ = scaler
+        transform.output_columns_ = [str(col) for col in output_columns]
+        transform.n_samples_seen_ = int(scaler.n_samples_seen_)
+        return transform
+
+    def fit(self, df):
+        """Fit on a DataFrame of raw descriptors (name/activity columns are ignored)."""
+        self._stats = None
+        self._comoments = None
+        return self.partial_fit(df).finalize()
+
+    def partial_fit(self, chunk):
+        """
+        Add a chunk of raw descriptor rows to the running statistics.
+
+        Only the accumulators are updated; the fitted attributes are derived
+        from them once, by finalize (called by transform when needed).
+        Every chunk must have the same descriptor columns as the first one.
+        """
+        columns = [col for col in chunk.columns if col not in NON_DESCRIPTOR_COLUMNS]
+        if self._stats is None:
+            self._stats = ColumnStats(columns)
+            self._comoments = CoMoments(len(columns))
+        elif columns != self._stats.columns:
+            raise ValueError("partial_fit chunks must have the same columns as the first chunk")
+
+        block = numeric_block(chunk[columns])
+        # Scaler attributes are computed in the input dtype, as when fitting on all rows
+        self._dtype = np.result_type(*block.dtypes) if columns else np.float64
+        values = block.to_numpy(dtype=np.float64)
+        self._stats.update(values)
+        self._comoments.update(values)
+        self._pending = True
+        return self
+
+    def finalize(self):
+        """Derive the column filter, scaler and correlation drop from the rows seen by partial_fit."""
+        # (transforms stored before finalize existed have no _pending)
+        if not getattr(self, '_pending', False):
+            return self
+        stats = self._stats
+        kept = np.flatnonzero(stats.keep_mask(self.max_zero_fraction, self.min_variance))
+        self.input_columns_ = [stats.columns[i] for i in kept]
+
+        # MinMax from the accumulated extremes: fitting on the two rows (min, max)
+        # gives the same data_min_/data_max_/scale_ as fitting on all rows
+        scaler = MinMaxScaler()
+        extremes = np.array([stats.min[kept], stats.max[kept]], dtype=self._dtype)
+        scaler.fit(pd.DataFrame(extremes, columns=self.input_columns_))
+        scaler.n_samples_seen_ = stats.count
+        self.scaler_ = scaler
+
+        # Same rule as normalization.correlated_columns: drop a column when
+        # |corr| > cutoff with any earlier column; constant columns are kept
+        corr = np.abs(self._comoments.correlation(kept))
+        corr = np.nan_to_num(corr, nan=0.0)
+        drop = (np.tril(corr, k=-1) > self.corr_cutoff).any(axis=1)
+        self.output_columns_ = [col for col, dropped in zip(self.input_columns_, drop) if not dropped]
+        self.n_samples_seen_ = stats.count
+        self._pending = False
+        return self
+
+    def transform(self, df):
+        """
+        Map raw descriptors to the model features.
+
+        Args:
+            df (pandas.DataFrame): Raw descriptor columns (extra columns are ignored).
+
+        Returns:
+            pandas.DataFrame: The output_columns_, normalised, with df's index.
+        """
+        self.finalize()
+        missing = [col for col in self.input_columns_ if col not in df.columns]
+        if missing:
+            raise ValueError(f"{len(missing)} descriptor columns missing from the input, "
+                             f"e.g. {', '.join(missing[:5])}")
+        values = numeric_block(df[self.input_columns_])
+        scaled = pd.DataFrame(self.scaler_.transform(values), columns=self.input_columns_, index=df.index)
+        return scaled[self.output_columns_]
+
+    def get_params(self):
+        return {
+            'max_zero_fraction': self.max_zero_fraction,
+            'min_variance': self.min_variance,
+            'corr_cutoff': self.corr_cutoff,
+        }
+
+    def __getstate__(self):
+        # Accumulators are only needed while fitting; keep the stored artifact small
+        self.finalize()
+        state = dict(self.__dict__)
+        state['_stats'] = None
+        state['_comoments'] = None
+        return state
@@ -0,0 +1,361 @@
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Largest (trees x rows) node buffer walked at once (kept cache sized)
+_BLOCK_CELLS = 1 << 16
+
+# Largest walk (rows x summed tree depths) predict_proba does itself, per kind. Beyond it the
+# native traversal of the original model is faster (measured single-threaded crossovers:
+# about 850k steps for a 50-tree forest, 300k for 50 XGBoost trees), so larger inputs are
+# handed to the original, which gives the same probabilities.
+MAX_WALK_STEPS = {
+    'average': 1 << 19,
+    'logistic': 1 << 17,
+}
+
+def _sklearn_normalizes_leaves():
+    """Before scikit-learn 1.4, tree leaves hold class counts that predict_proba normalizes."""
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    return (major, minor) < (1, 4)
+
+def _threshold_le(threshold, strict=False):
+    """
+    float32 threshold t32 with (x <= t32) == (x <= threshold), or (x < threshold) if strict, for float32 x.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    t32 = threshold.astype(np.float32)
+    # Round down where float32 rounding went up (or where the comparison must be strict)
+    down = (t32.astype(np.float64) >= threshold) if strict else (t32.astype(np.float64) > threshold)
+    t32[down] = np.nextafter(t32[down], np.float32(-np.inf))
+    return t32
+
+class CompiledTrees:
+    """
+    A tree ensemble flattened into contiguous arrays.
+
+    Nodes of all trees are stored structure-of-arrays style: split feature,
+    float32 threshold (go left when x <= threshold), left child as an
+    absolute node offset (the right child is the next node), whether missing
+    values go left, and leaf values. Leaves point to themselves, so every
+    row can take the same number of steps. predict_proba walks all trees at
+    once, one level at a time, over blocks of rows, then combines the leaf
+    values in tree order:
+        - 'average' (scikit-learn DecisionTree/RandomForest): class fractions
+          summed over the trees in float64 and divided by the number of trees.
+        - 'logistic' (XGBoost binary:logistic): float32 margins summed from
+          the base margin, then XGBoost's float32 sigmoid.
+
+    It can stand in for the original model at predict time: it has
+    classes_, feature_names_in_, predict_proba and predict. Inputs larger
+    than MAX_WALK_STEPS are scored by the original model when it is kept.
+    """
+
+    def __init__(self, kind, feature, threshold, left, missing_left, value, roots, depth,
+                 classes, feature_names_in=None, base_margin=0.0, source=None, original=None):
+        self.kind = kind
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.value = np.ascontiguousarray(value)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.depths = np.ascontiguousarray(depth, dtype=np.intp)
+        # Trees are walked deepest first, so each level only steps the trees still deep enough
+        self._walk_order = np.argsort(-self.depths, kind='stable')
+        self._walk_position = np.argsort(self._walk_order)
+        self.classes_ = np.asarray(classes)
+        self.n_classes_ = len(self.classes_)
+        if feature_names_in is not None:
+            self.feature_names_in_ = np.asarray(feature_names_in, dtype=object)
+        self.base_margin = np.float32(base_margin)
+        self.source = source
+        self.original = original
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def depth(self):
+        return int(self.depths.max()) if len(self.depths) else 0
+
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns') and hasattr(self, 'feature_names_in_'):
+            if not X.columns.equals(pd.Index(self.feature_names_in_)):
+                X = X[list(self.feature_names_in_)]
+            X = X.to_numpy(dtype=np.float32)
+        # The originals compare float32 features as well
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def leaves(self, X):
+        """Leaf node reached in every tree, (n_trees x n_rows) in tree order, for a float32 matrix."""
+        n_rows = len(X)
+        # Feature-major, so that feature * n_rows + row indexes a value
+        values = np.ascontiguousarray(X.T).ravel()
+        offsets = self.feature * n_rows
+        depths = self.depths[self._walk_order]
+        check_missing = np.isnan(values).any()
+        # Tree-major: the trees still walking at a level are a prefix of the buffers
+        node = np.repeat(self.roots[self._walk_order], n_rows)
+        rows = np.tile(np.arange(n_rows), self.n_trees)
+        index = np.empty_like(node)
+        x = np.empty(len(node), dtype=np.float32)
+        threshold = np.empty(len(node), dtype=np.float32)
+        go_right = np.empty(len(node), dtype=bool)
+        for level in range(self.depth):
+            # Trees no deeper than this level have reached their leaves
+            n_active = int(np.count_nonzero(depths > level)) * n_rows
+            active = node[:n_active]
+            np.take(offsets, active, out=index[:n_active], mode='clip')
+            np.add(index[:n_active], rows[:n_active], out=index[:n_active])
+            np.take(values, index[:n_active], out=x[:n_active], mode='clip')
+            np.take(self.threshold, active, out=threshold[:n_active], mode='clip')
+            np.greater(x[:n_active], threshold[:n_active], out=go_right[:n_active])
+            if check_missing:
+                # NaN compares False (left); it goes right unless the node sends missing values left
+                go_right[:n_active] |= np.isnan(x[:n_active]) & ~self.missing_left.take(active)
+            np.take(self.left, active, out=index[:n_active], mode='clip')
+            np.add(index[:n_active], go_right[:n_active], out=active)
+        return node.reshape(self.n_trees, n_rows)[self._walk_position]
+
+    def predict_proba(self, X):
+        """Class probabilities, (n_rows x n_classes), bit-identical to the original model's."""
+        if self.original is not None and len(X) * int(self.depths.sum()) > MAX_WALK_STEPS[self.kind]:
+            return self.original.predict_proba(X)
+        return self.walk_proba(X)
+
+    def walk_proba(self, X):
+        """Class probabilities from the compiled walk, whatever the input size."""
+        X = self._as_matrix(X)
+        block_rows = max(64, _BLOCK_CELLS // max(self.n_trees, 1))
+        out = []
+        for start in range(0, len(X), block_rows):
+            leaves = self.leaves(X[start:start + block_rows])
+            if self.kind == 'average':
+                proba = np.zeros((leaves.shape[1], self.n_classes_), dtype=np.float64)
+                for tree_leaves in leaves:
+                    proba += self.value.take(tree_leaves, axis=0)
+                proba /= self.n_trees
+            else:
+                margin = np.full(leaves.shape[1], self.base_margin, dtype=np.float32)
+                for tree_leaves in leaves:
+                    margin += self.value.take(tree_leaves)
+                positive = _sigmoid(margin)
+                proba = np.column_stack([np.float32(1) - positive, positive])
+            out.append(proba)
+        if not out:
+            return np.empty((0, self.n_classes_), dtype=np.float64 if self.kind == 'average' else np.float32)
+        return np.concatenate(out)
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        if self.kind == 'average':
+            return self.classes_.take(np.argmax(proba, axis=1))
+        return self.classes_.take((proba[:, 1] > 0.5).astype(np.intp))
+
+    def __repr__(self):
+        return f"CompiledTrees({self.source}, {self.n_trees} trees, {self.n_nodes} nodes, depth {self.depth})"
+
+def _libm(function, x):
+    """A float32 libm function (expf, logf): rounding the float64 result matches glibc's correctly rounded one."""
+    return function(np.asarray(x, dtype=np.float64)).astype(np.float32)
+
+def _sigmoid(margin):
+    """XGBoost's float32 sigmoid: 1 / (expf(min(-x, 88.7)) + 1 + 1e-16)."""
+    denominator = _libm(np.exp, np.minimum(-margin, np.float32(88.7)))
+    denominator += np.float32(1)
+    denominator += np.float32(1e-16)
+    return np.float32(1) / denominator
+
+def _concatenate(trees):
+    """
+    Join per-tree node arrays, renumbering each tree breadth first so that
+    a node's right child directly follows its left child; left children
+    become absolute offsets and leaves point to themselves.
+    """
+    joined = {key: [] for key in ('feature', 'threshold', 'left', 'missing_left', 'value')}
+    roots = []
+    offset = 0
+    for tree in trees:
+        children = tree['children']
+        order = [0]
+        for node in order:
+            if children[node, 0] >= 0:
+                order.extend(children[node])
+        order = np.asarray(order)
+        position = np.empty(len(children), dtype=np.intp)
+        position[order] = np.arange(len(order)) + offset
+        is_leaf = children[order, 0] < 0
+        joined['left'].append(np.where(is_leaf, position[order], position[children[order, 0]]))
+        for key in ('feature', 'threshold', 'missing_left', 'value'):
+            joined[key].append(tree[key][order])
+        roots.append(offset)
+        offset += len(order)
+    arrays = {key: np.concatenate(parts) for key, parts in joined.items()}
+    arrays['roots'] = roots
+    arrays['depth'] = [tree['depth'] for tree in trees]
+    return arrays
+
+def _sklearn_tree(tree, normalize):
+    """Node arrays of a fitted sklearn Tree (tree_ attribute)."""
+    is_leaf = tree.children_left < 0
+    value = tree.value[:, 0, :].astype(np.float64)
+    if normalize:
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value = value / normalizer
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+    return {
+        'feature': np.where(is_leaf, 0, tree.feature),
+        # Leaves: every row "goes left", to the leaf itself
+        'threshold': np.where(is_leaf, np.float32(np.inf), _threshold_le(tree.threshold)),
+        'children': np.column_stack([tree.children_left, tree.children_right]),
+        # Leaves keep missing values "left" too
+        'missing_left': np.asarray(missing_left, dtype=bool) | is_leaf,
+        'value': value,
+        'depth': tree.max_depth,
+    }
+
+def compile_sklearn(model):
+    """Compile a fitted DecisionTreeClassifier or RandomForestClassifier (single output)."""
+    estimators = getattr(model, 'estimators_', [model])
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output tree models can be compiled")
+    normalize = _sklearn_normalizes_leaves()
+    arrays = _concatenate([_sklearn_tree(estimator.tree_, normalize) for estimator in estimators])
+    return CompiledTrees('average', classes=model.classes_, feature_names_in=getattr(model, 'feature_names_in_', None),
+                         source=type(model).__name__, original=model, **arrays)
+
+def compile_xgboost(model):
+    """Compile a fitted binary:logistic XGBClassifier (gbtree booster, numerical splits)."""
+    booster = model.get_booster()
+    # Floats of the JSON dump round-trip exactly as float32
+    learner = json.loads(booster.save_raw('json'), parse_float=np.float32)['learner']
+    objective = learner['objective']['name']
+    gradient_booster = learner['gradient_booster']
+    if objective != 'binary:logistic' or gradient_booster['name'] != 'gbtree':
+        raise ValueError(f"Only gbtree binary:logistic models can be compiled, got "
+                         f"{gradient_booster['name']} {objective}")
+    if getattr(model, 'best_iteration', None) is not None:
+        raise ValueError("Models with early stopping (best_iteration) cannot be compiled")
+
+    trees = []
+    for tree in gradient_booster['model']['trees']:
+        if any(tree['split_type']):
+            raise ValueError("Categorical splits cannot be compiled")
+        left = np.asarray(tree['left_children'], dtype=np.intp)
+        is_leaf = left < 0
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        parents = np.asarray(tree['parents'], dtype=np.int64)
+        depth = np.zeros(len(left), dtype=np.intp)
+        # Parents come before their children in XGBoost's node order
+        for node in range(1, len(left)):
+            depth[node] = depth[parents[node]] + 1
+        trees.append({
+            'feature': np.where(is_leaf, 0, tree['split_indices']),
+            # XGBoost goes left when x < split_condition
+            'threshold': np.where(is_leaf, np.float32(np.inf), _threshold_le(conditions, strict=True)),
+            'children': np.column_stack([left, tree['right_children']]),
+            'missing_left': np.asarray(tree['default_left'], dtype=bool) | is_leaf,
+            # A leaf's split_condition is its value
+            'value': np.where(is_leaf, conditions, np.float32(0)),
+            'depth': int(depth.max()),
+        })
+
+    base_score = np.float32(str(learner['learner_model_param']['base_score']).strip('[]'))
+    # XGBoost's float32 ProbToMargin: -logf(1 / base_score - 1)
+    base_margin = -_libm(np.log, np.float32(1) / base_score - np.float32(1))
+    arrays = _concatenate(trees)
+    return CompiledTrees('logistic', classes=model.classes_, feature_names_in=getattr(model, 'feature_names_in_', None),
+                         base_margin=base_margin, source=type(model).__name__, original=model, **arrays)
+
+def compile_model(model):
+    """
+    Compile a tree model for predict.
+
+    Returns:
+        CompiledTrees: Or None when the model is not a supported tree ensemble.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, (DecisionTreeClassifier, RandomForestClassifier)):
+        return compile_sklearn(model)
+    # xgboost is only checked for when it has been imported (by unpickling an XGB model)
+    xgboost = sys.modules.get('xgboost')
+    if xgboost is not None and isinstance(model, xgboost.XGBClassifier):
+        return compile_xgboost(model)
+    return None
+
+def compile_models(loaded_models, log=print):
+    """
+    Replace the tree models of a loaded model set by their compiled form.
+
+    Args:
+        loaded_models (dict): Model name -> fitted model.
+        log (callable): Where to report what was compiled.
+
+    Returns:
+        dict: Same names and order; DT/RF/XGB models replaced by CompiledTrees.
+    """
+    compiled = {}
+    for name, model in loaded_models.items():
+        try:
+            compiled_model = compile_model(model)
+        except ValueError as e:
+            log(f"{name}: not compiled ({e})")
+            compiled_model = None
+        if compiled_model is not None:
+            log(f"{name}: {compiled_model!r}")
+        compiled[name] = compiled_model if compiled_model is not None else model
+    return compiled
+
+def check_parity(model, compiled, X, repeat=1):
+    """
+    Compare a compiled model's probabilities and speed with the original's.
+
+    The probabilities are those of the compiled walk on all of X (walk_proba);
+    the timing is of predict_proba, which hands large inputs to the original.
+
+    Args:
+        model: The fitted original model.
+        compiled (CompiledTrees): Its compiled form.
+        X (pandas.DataFrame): Rows to score.
+        repeat (int): Timing repetitions (the best is reported).
+
+    Returns:
+        dict: rows, identical (rows with bit-identical probabilities), max_abs_diff,
+            ok (every row identical), original_s and compiled_s.
+    """
+    def timed(predict_proba):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proba = predict_proba(X)[:, 1]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return proba, best
+
+    expected, original_s = timed(model.predict_proba)
+    _, compiled_s = timed(compiled.predict_proba)
+    actual = compiled.walk_proba(X)[:, 1]
+    diff = np.abs(actual.astype(np.float64) - expected.astype(np.float64))
+    max_abs_diff = float(diff.max()) if len(diff) else 0.0
+    return {
+        'rows': len(X),
+        'identical': int(np.count_nonzero(actual == expected)),
+        'max_abs_diff': max_abs_diff,
+        'ok': bool(np.array_equal(actual, expected)),
+        'original_s': original_s,
+        'compiled_s': compiled_s,
+    }
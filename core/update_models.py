@@ -0,0 +1,191 @@
+import math
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import GaussianNB
+
+from core import calibration, instrumentation, metrics, resampling, train_models
+
+# Resampling strategies an update can apply: both only add rows, so the
+# stored training rows stay in the training set and incremental updates apply
+UPDATE_RESAMPLING = ['smote', 'none']
+
+def extra_estimators(n_estimators, n_added, n_train):
+    """
+    Trees (RF) or boosting rounds (XGB) to add for n_added new training rows.
+
+    The ensemble grows by the share of the training set the new rows make
+    up, so a batch of 10% more rows adds 10% more trees; at least one.
+    """
+    return max(1, int(math.ceil(n_estimators * n_added / max(n_train, 1))))
+
+def _recalibrate(model, X, y):
+    """Refit a CalibratedModel's calibrator on out-of-fold scores of its (already refitted) estimator."""
+    # Same folds as create-model's hyperparameter search
+    kfold = StratifiedKFold(n_splits=10, shuffle=True, random_state=42)
+    X_values = np.asarray(X)
+    y_values = np.asarray(y)
+    scores = np.empty(len(y_values), dtype=np.float64)
+    for train, test in kfold.split(X_values, y_values):
+        fold_model = clone(model.estimator).fit(X.iloc[train], y_values[train])
+        scores[test] = calibration.decision_scores(fold_model, X.iloc[test])
+    return calibration.calibrate(model.estimator, scores, y_values, model.method)
+
+def update_model(model, X_train, y_train, X_added, y_added):
+    """
+    Update one fitted model for new training rows.
+
+    Where the algorithm supports it the model is updated incrementally:
+        - GaussianNB: partial_fit on the added rows (the class means and
+          variances of a refit on all rows, approximately: the variance
+          smoothing epsilon_ is recomputed from the added rows only);
+        - LogisticRegression: refit on all rows, warm-started from the
+          current coefficients;
+        - RandomForestClassifier: extra trees grown on all rows (warm_start),
+          the existing trees are kept;
+        - XGBClassifier: extra boosting rounds on all rows, continuing the
+          current booster.
+    Other models (DecisionTree, SVC, ...) are refitted with the same
+    hyperparameters. A CalibratedModel updates its estimator the same way;
+    after a refit its calibrator is refitted on 10-fold out-of-fold scores,
+    after an incremental update it is kept.
+
+    Args:
+        model: The fitted model (modified in place where updated incrementally).
+        X_train (pandas.DataFrame): All training rows: the stored ones, then the added ones.
+        y_train (numpy.ndarray): Their labels.
+        X_added (pandas.DataFrame): The added rows (the tail of X_train).
+        y_added (numpy.ndarray): Their labels.
+
+    Returns:
+        tuple: (updated model, description of the update)
+    """
+    n_stored = len(X_train) - len(X_added)
+    if isinstance(model, calibration.CalibratedModel):
+        estimator, how = update_model(model.estimator, X_train, y_train, X_added, y_added)
+        model.estimator = estimator
+        if how == 'refit':
+            return _recalibrate(model, X_train, y_train), 'refit + recalibrated'
+        return model, how
+    if isinstance(model, GaussianNB):
+        return model.partial_fit(X_added, y_added), 'partial_fit'
+    if isinstance(model, LogisticRegression):
+        model.set_params(warm_start=True).fit(X_train, y_train)
+        return model.set_params(warm_start=False), 'warm start'
+    if isinstance(model, RandomForestClassifier):
+        n_extra = extra_estimators(model.n_estimators, len(X_added), n_stored)
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + n_extra).fit(X_train, y_train)
+        return model.set_params(warm_start=False), f'+{n_extra} trees'
+    # xgboost is only checked for when it has been imported (by unpickling an XGB model)
+    xgboost = sys.modules.get('xgboost')
+    if xgboost is not None and isinstance(model, xgboost.XGBClassifier):
+        n_rounds = model.get_booster().num_boosted_rounds()
+        n_extra = extra_estimators(n_rounds, len(X_added), n_stored)
+        model.set_params(n_estimators=n_extra).fit(X_train, y_train, xgb_model=model.get_booster())
+        return model.set_params(n_estimators=n_rounds + n_extra), f'+{n_extra} rounds'
+    return clone(model).fit(X_train, y_train), 'refit'
+
+def process(models, transform, data_splits, df_new, resampling_strategy='smote', log=print):
+    """
+    Update trained models with new labelled compounds.
+
+    The new rows go through the stored preprocessing transform only, and are
+    added to the stored training split; with 'smote', synthetic rows drawn
+    from the real training rows balance it again. The stored test split is
+    kept as it is, so the metrics before and after the update compare on
+    the same compounds.
+
+    Args:
+        models (dict): Model name -> fitted model (see update_model).
+        transform (PreprocessingTransform): The bundle's fitted preprocessing.
+        data_splits (dict): The stored X_train, X_test, y_train, y_test and
+            train_real (which training rows are not synthetic; None = all).
+        df_new (pandas.DataFrame): New compounds as prepare_files outputs them
+            (raw descriptors and the 'atividade' column).
+        resampling_strategy (str): 'smote' (rebalance with synthetic actives) or 'none'.
+        log (callable): Where to report progress.
+
+    Returns:
+        tuple: (models, metrics_df, data_splits, comparison)
+            - models: Dictionary of updated models
+            - metrics_df: Metrics of the updated models (the create-model table)
+            - data_splits: The extended training split and the stored test split
+            - comparison: Per model, how it was updated, seconds, and test
+              accuracy/AUC before and after
+    """
+    if resampling_strategy not in UPDATE_RESAMPLING:
+        raise ValueError(f"Unknown update resampling strategy '{resampling_strategy}'. "
+                         f"Choose from {UPDATE_RESAMPLING}")
+    X_train, y_train = data_splits['X_train'], np.asarray(data_splits['y_train'])
+    X_test, y_test = data_splits['X_test'], np.asarray(data_splits['y_test'])
+    if list(transform.output_columns_) != list(X_train.columns):
+        raise ValueError("The preprocessing transform does not produce the stored training features")
+
+    # New rows: replay the stored preprocessing (no refitting)
+    with instrumentation.span('transform', 'transform', rows=len(df_new), columns_in=df_new.shape[1]) as span:
+        X_new = transform.transform(df_new).astype(X_train.dtypes.iloc[0])
+        y_new = df_new['atividade'].to_numpy().astype(y_train.dtype)
+        span.set(columns=X_new.shape[1])
+    log(f"New rows: {len(X_new)} ({int((y_new == 1).sum())} actives, {int((y_new == 0).sum())} decoys)")
+
+    train_real = data_splits.get('train_real')
+    if train_real is None:
+        warnings.warn("The stored splits do not record which training rows are synthetic; "
+                      "all of them are treated as real (recreate the model set with create-model to record it)")
+        train_real = np.ones(len(X_train), dtype=bool)
+    train_real = np.asarray(train_real, dtype=bool)
+
+    # Balance the extended training set. The stored rows, synthetic ones
+    # included, stay a prefix; SMOTE only adds the rows still missing and
+    # interpolates them between real rows, so synthetic rows are never resampled
+    X_added, y_added = X_new, y_new
+    if resampling_strategy == 'smote':
+        labels, counts = np.unique(np.concatenate([y_train, y_new]), return_counts=True)
+        n_new = dict(zip(labels.tolist(), (counts.max() - counts).tolist()))
+        X_real = pd.concat([X_train[train_real], X_new], ignore_index=True)
+        y_real = np.concatenate([y_train[train_real], y_new])
+        with instrumentation.span('resample', 'transform', strategy=resampling_strategy, rows_in=len(X_real)) as span:
+            X_resampled, y_resampled = resampling.smote(X_real, y_real, n_new=n_new)
+            span.set(rows=len(X_resampled))
+        X_added = pd.concat([X_new, X_resampled.iloc[len(X_real):]], ignore_index=True)
+        y_added = np.concatenate([y_new, y_resampled[len(X_real):]])
+    X_all = pd.concat([X_train, X_added], ignore_index=True)
+    y_all = np.concatenate([y_train, y_added])
+    real_all = np.concatenate([train_real, np.arange(len(X_added)) < len(X_new)])
+    log(f"Training rows: {len(X_train)} stored + {len(X_added)} added "
+        f"({len(X_added) - len(X_new)} synthetic)")
+
+    # Test predictions of the models as they were, before they are modified in place
+    model_names = list(models.keys())
+    before = [train_models.predict_with_proba(models[name], X_test) for name in model_names]
+
+    updated = {}
+    rows = []
+    for name in model_names:
+        start = time.perf_counter()
+        with instrumentation.span('update', 'fit', model=name, rows=len(X_all)) as span:
+            updated[name], how = update_model(models[name], X_all, y_all, X_added, y_added)
+            span.set(update=how)
+        seconds = time.perf_counter() - start
+        log(f"{name}: {how} ({seconds:.1f}s)")
+        rows.append({'model': name, 'update': how, 'seconds': round(seconds, 3)})
+
+    new_splits = {'X_train': X_all, 'X_test': X_test, 'y_train': y_all, 'y_test': y_test, 'train_real': real_all}
+    metrics_df = train_models.evaluate(updated, new_splits)
+
+    # Validation on the stored test split: before vs after
+    before_df = metrics.metrics_table(model_names, [('Teste', y_test, np.stack([p for p, _ in before]),
+                                                     np.stack([p for _, p in before]))])
+    after_df = metrics_df[metrics_df['Banco'] == 'Teste'].reset_index(drop=True)
+    comparison = pd.DataFrame(rows)
+    for column in ['Acurácia', 'AUC ROC']:
+        comparison[f'{column} before'] = before_df[column].to_numpy()
+        comparison[f'{column} after'] = after_df[column].to_numpy()
+    return updated, metrics_df, new_splits, comparison
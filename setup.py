@@ -8,9 +8,9 @@ setup(
         "click>=8.0.0",
         "pandas>=1.3.0",
         "numpy>=1.20.0",
-        "scikit-learn>=1.0.0",
+        "scikit-learn>=1.3.0",
         "xgboost>=1.5.0",
-        "imbalanced-learn>=0.8.0",
+        "joblib>=1.0.0",
     ],
     entry_points={
         'console_scripts': [
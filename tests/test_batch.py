@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from core import batch
+
+def _write_manifest(tmp_path, targets, defaults=None):
+    files = {key: f'{key}.txt' for key in batch.TARGET_FILES}
+    manifest = {'defaults': defaults or {}, 'targets': [{**files, **target} for target in targets]}
+    path = tmp_path / 'targets.json'
+    path.write_text(json.dumps(manifest))
+    return str(path)
+
+def test_load_manifest(tmp_path):
+    path = _write_manifest(tmp_path, [{'name': 'A'}, {'name': 'B', 'output': 'b_run', 'corr_cutoff': 0.6}],
+                           defaults={'max_fits': 10})
+    a, b = batch.load_manifest(path)
+    assert (a['output'], b['output']) == ('A', 'b_run')
+    assert a['options']['max_fits'] == b['options']['max_fits'] == 10
+    assert (a['options']['corr_cutoff'], b['options']['corr_cutoff']) == (0.5, 0.6)
+    assert a['files']['actives_datawarrior'] == str(tmp_path / 'actives_datawarrior.txt')
+
+@pytest.mark.parametrize('targets, message', [
+    ([{'name': 'A'}, {'name': 'A'}], "duplicate target 'A'"),
+    ([{'name': 'A'}, {'name': 'B', 'output': 'A'}], "targets 'A' and 'B' have the same output 'A'"),
+    ([{'name': 'A', 'learning_rate': 1}], 'unknown option'),
+])
+def test_load_manifest_rejects(tmp_path, targets, message):
+    with pytest.raises(ValueError, match=message):
+        batch.load_manifest(_write_manifest(tmp_path, targets))
+
+def test_journal_resume(tmp_path):
+    path = _write_manifest(tmp_path, [{'name': 'A'}, {'name': 'B'}, {'name': 'C'}])
+    a, b, c = batch.load_manifest(path)
+    journal_path = str(tmp_path / batch.JOURNAL_NAME)
+    for target, status in [(a, 'started'), (a, 'done'), (b, 'done'), (c, 'started')]:
+        batch.append_journal(journal_path, {'target': target['name'], 'status': status,
+                                            'fingerprint': batch.fingerprint(target)})
+    with open(journal_path, 'a') as file:
+        file.write('{"target": "C", "stat')  # cut short by a crash
+    os.makedirs(tmp_path / 'metrics')
+    for target in (a, b):
+        (tmp_path / 'metrics' / f"{target['output']}_metrics.csv").write_text('')
+
+    journal = batch.read_journal(journal_path)
+    assert {name: record['status'] for name, record in journal.items()} == {'A': 'done', 'B': 'done', 'C': 'started'}
+    assert batch.pending_targets([a, b, c], journal, str(tmp_path)) == [c]
+
+    # A changed definition, or missing outputs, are built again
+    b['options']['corr_cutoff'] = 0.7
+    os.remove(tmp_path / 'metrics' / 'A_metrics.csv')
+    assert batch.pending_targets([a, b, c], journal, str(tmp_path)) == [a, b, c]
+
+def test_process_skips_built_targets_and_records_failures(tmp_path):
+    path = _write_manifest(tmp_path, [{'name': 'A'}, {'name': 'B'}])
+    a, b = batch.load_manifest(path)
+    base_dir = tmp_path / 'runs'
+    os.makedirs(base_dir / 'metrics')
+    (base_dir / 'metrics' / 'A_metrics.csv').write_text('')
+    journal_path = str(base_dir / batch.JOURNAL_NAME)
+    batch.append_journal(journal_path, {'target': 'A', 'status': 'done', 'fingerprint': batch.fingerprint(a)})
+
+    # B's input files do not exist: it fails in its worker process, A is not rebuilt
+    statuses = batch.process(path, str(base_dir), no_cache=True, log=lambda message: None)
+    assert statuses == {'A': 'skipped', 'B': 'failed'}
+    journal = batch.read_journal(journal_path)
+    assert journal['B']['status'] == 'failed' and 'actives_datawarrior.txt' in journal['B']['error']
+    assert os.path.exists(base_dir / batch.LOGS_DIR / 'B.log')
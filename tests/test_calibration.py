@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+
+from core import calibration
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((500, 4))
+    y = (X[:, 0] + 0.5 * rng.standard_normal(len(X)) > 0.8).astype(int)
+    return X, y
+
+def test_sigmoid_matches_platt_fit(data):
+    X, y = data
+    scores = LogisticRegression().fit(X, y).decision_function(X)
+    a, b = calibration.fit_calibrator(scores, y, 'sigmoid')
+    # Plain logistic regression of the smoothed targets on the scores, by Newton's method
+    n_pos = y.sum()
+    target = np.where(y, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (len(y) - n_pos + 2.0))
+    design = np.column_stack([scores, np.ones_like(scores)])
+    params = np.zeros(2)
+    for _ in range(50):
+        p = 1 / (1 + np.exp(-design @ params))
+        params -= np.linalg.solve(design.T @ (design * (p * (1 - p))[:, None]), design.T @ (p - target))
+    np.testing.assert_allclose([a, b], params, rtol=1e-4, atol=1e-5)
+
+def test_sigmoid_large_scores_stay_finite():
+    scores = np.array([-800.0, -700.0, 700.0, 800.0])
+    a, b = calibration.fit_calibrator(scores, np.array([0, 0, 1, 1]), 'sigmoid')
+    assert np.isfinite([a, b]).all() and a > 0
+
+def test_isotonic_matches_sklearn(data):
+    X, y = data
+    scores = GaussianNB().fit(X, y).predict_proba(X)[:, 1]
+    calibrator = calibration.fit_calibrator(scores, y, 'isotonic')
+    expected = IsotonicRegression(out_of_bounds='clip').fit(scores, y).predict(scores)
+    np.testing.assert_allclose(calibrator.predict(scores), expected)
+
+def test_calibrated_model(data):
+    X, y = data
+    estimator = LogisticRegression().fit(X, y)
+    scores = calibration.decision_scores(estimator, X)
+    model = calibration.calibrate(estimator, scores, y, 'sigmoid')
+    proba = model.predict_proba(X)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    np.testing.assert_array_equal(model.predict(X), estimator.predict(X))
+    # Platt scaling is monotonic, so the ranking of the rows is unchanged
+    np.testing.assert_array_equal(np.argsort(proba[:, 1], kind='stable'), np.argsort(scores, kind='stable'))
+    assert model.classes_.tolist() == [0, 1] and model.n_features_in_ == 4
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match='Unknown calibration method'):
+        calibration.fit_calibrator(np.zeros(4), np.array([0, 1, 0, 1]), 'beta')
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from core.column_stats import ColumnStats, CoMoments
+
+@pytest.fixture(scope='module')
+def values():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((1000, 6)) * [1, 10, 1e-3, 1, 5, 1] + [0, 100, 0, 1e4, 0, 0]
+    values[rng.random(values.shape) < 0.3] = 0
+    values[:, 5] = 2.0
+    return values
+
+def _shards(values, bounds):
+    return [values[start:end] for start, end in zip([0] + bounds, bounds + [len(values)])]
+
+@pytest.mark.parametrize('bounds', [[500], [1, 2, 300, 999], [0, 0, 1000]])
+def test_merge_matches_numpy(values, bounds):
+    columns = [f'c{i}' for i in range(values.shape[1])]
+    stats = ColumnStats(columns)
+    for shard in _shards(values, bounds):
+        stats.merge(ColumnStats(columns).update(shard))
+    assert stats.count == len(values)
+    np.testing.assert_array_equal(stats.zero_count, (values == 0).sum(axis=0))
+    np.testing.assert_array_equal(stats.min, values.min(axis=0))
+    np.testing.assert_array_equal(stats.max, values.max(axis=0))
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0), rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(stats.variance(), values.var(axis=0, ddof=1), rtol=1e-10, atol=1e-20)
+    np.testing.assert_array_equal(stats.zero_fraction(), (values == 0).mean(axis=0))
+
+def test_keep_mask(values):
+    stats = ColumnStats([f'c{i}' for i in range(values.shape[1])]).update(values)
+    expected = ((values == 0).mean(axis=0) <= 0.5) & (values.var(axis=0, ddof=1) >= 0.01)
+    np.testing.assert_array_equal(stats.keep_mask(0.5, 0.01), expected)
+    # Column 2 varies too little, column 5 is constant
+    assert not stats.keep_mask()[2] and not stats.keep_mask()[5]
+
+def test_merge_rejects_other_columns():
+    with pytest.raises(ValueError):
+        ColumnStats(['a', 'b']).merge(ColumnStats(['b', 'a']))
+    with pytest.raises(ValueError):
+        ColumnStats(['a', 'b']).update(np.zeros((3, 3)))
+
+def test_comoments_match_numpy(values):
+    comoments = CoMoments(values.shape[1])
+    for shard in _shards(values, [10, 600]):
+        comoments.merge(CoMoments(values.shape[1]).update(shard))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = np.corrcoef(values, rowvar=False)
+    np.testing.assert_allclose(comoments.correlation(), expected, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(comoments.correlation([0, 3]), expected[np.ix_([0, 3], [0, 3])], rtol=1e-9)
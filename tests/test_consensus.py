@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from core import consensus
+
+MODEL_NAMES = ['LR', 'NB', 'DT', 'RF', 'SVM', 'XGB']
+
+@pytest.fixture(scope='module')
+def prob_matrix():
+    rng = np.random.default_rng(0)
+    # Rounded, so some probabilities sit exactly on the threshold
+    return np.round(rng.random((1000, len(MODEL_NAMES))), 1)
+
+def _naive(prob_matrix, thresholds, weights):
+    # One row at a time, as the per-compound loop did
+    counts, labels, weighted = [], [], []
+    for row in prob_matrix:
+        votes = [name for name, prob, limit in zip(MODEL_NAMES, row, thresholds) if prob > limit]
+        counts.append(len(votes))
+        labels.append(', '.join(votes))
+        weighted.append(sum(weights.get(name, 1.0) for name in votes))
+    return counts, labels, weighted
+
+def test_matches_per_row_loop(prob_matrix):
+    model_thresholds = {'DT': 0.7, 'SVM': 0.3}
+    weights = {'RF': 2.0, 'LR': 0.5}
+    columns = consensus.consensus(prob_matrix, MODEL_NAMES, 0.5, model_thresholds, weights)
+    assert list(columns) == ['consensus', 'consensus_Model', 'consensus_weighted']
+    counts, labels, weighted = _naive(prob_matrix, [0.5, 0.5, 0.7, 0.5, 0.3, 0.5], weights)
+    assert columns['consensus'].tolist() == counts
+    assert columns['consensus_Model'].tolist() == labels
+    np.testing.assert_allclose(columns['consensus_weighted'], weighted)
+
+def test_mask_labels(prob_matrix):
+    columns = consensus.consensus(prob_matrix, MODEL_NAMES, labels='mask')
+    assert list(columns) == ['consensus', 'consensus_mask']
+    assert columns['consensus_mask'].dtype == np.uint8
+    above = prob_matrix > 0.5
+    expected = (above * (1 << np.arange(len(MODEL_NAMES)))).sum(axis=1)
+    np.testing.assert_array_equal(columns['consensus_mask'], expected)
+
+def test_mask_codes_wide_matrix():
+    rng = np.random.default_rng(1)
+    for n_models in [3, 64, 70]:
+        above = rng.random((200, n_models)) < 0.02
+        above[:50] = above[50:100]
+        unique_packed, inverse = consensus.mask_codes(above)
+        unpacked = np.unpackbits(unique_packed, axis=1, count=n_models, bitorder='little').astype(bool)
+        np.testing.assert_array_equal(unpacked[inverse], above)
+        assert len(unique_packed) == len({row.tobytes() for row in above})
+
+def test_rejects_unknown_models(prob_matrix):
+    with pytest.raises(ValueError, match='Unknown model name'):
+        consensus.consensus(prob_matrix, MODEL_NAMES, model_thresholds={'KNN': 0.3})
+    with pytest.raises(ValueError, match='Unknown model name'):
+        consensus.consensus(prob_matrix, MODEL_NAMES, weights={'KNN': 2.0})
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import consensus
+from core.predict_compounds import OutputWriter, rank_hits, select_hits
+
+@pytest.fixture
+def df_pred():
+    return pd.DataFrame({
+        'NAME': ['A', 'B', 'C', 'D', 'E'],
+        'ativd_pred_LR': [0.9, 0.2, 0.8, 0.6, 0.9],
+        'ativd_pred_RF': [0.7, 0.1, 0.9, 0.4, 0.7],
+        'consensus': [2, 0, 2, 1, 2],
+        'consensus_Model': ['LR, RF', '', 'LR, RF', 'LR', 'LR, RF'],
+    }).astype({'NAME': object, 'consensus_Model': object})
+
+def test_select_hits_min_consensus(df_pred):
+    assert list(select_hits(df_pred, min_consensus=1)['NAME']) == ['A', 'C', 'D', 'E']
+    assert list(select_hits(df_pred, min_consensus=3)['NAME']) == []
+
+def test_select_hits_top_k_keeps_input_order(df_pred):
+    # C has the highest mean probability; A and E tie and A comes first
+    assert list(select_hits(df_pred, top_k=2)['NAME']) == ['A', 'C']
+    assert select_hits(df_pred, top_k=10) is df_pred
+
+def test_rank_hits(df_pred):
+    assert list(rank_hits(df_pred)['NAME']) == ['C', 'A', 'E', 'D', 'B']
+
+def test_rank_hits_uses_weighted_votes(df_pred):
+    df_pred['consensus_weighted'] = [1.0, 3.0, 1.0, 0.5, 1.0]
+    assert list(rank_hits(df_pred)['NAME']) == ['B', 'C', 'A', 'E', 'D']
+
+def test_mask_values():
+    above = np.array([[True, False, True], [False, False, False], [True, True, True]])
+    mask = consensus.mask_values(above)
+    assert mask.dtype == np.uint8
+    assert list(mask) == [0b101, 0, 0b111]
+    wide = np.zeros((2, 12), dtype=bool)
+    wide[0, 11] = True
+    assert consensus.mask_values(wide).dtype == np.uint16
+    assert list(consensus.mask_values(wide)) == [1 << 11, 0]
+
+def test_csv_writer_appends_under_one_header(df_pred, tmp_path):
+    path = tmp_path / 'hits.csv'
+    with OutputWriter(str(path)) as writer:
+        writer.write(df_pred.iloc[:0])
+        writer.write(df_pred.iloc[:2])
+        writer.write(df_pred.iloc[2:])
+    pd.testing.assert_frame_equal(pd.read_csv(path, keep_default_na=False), df_pred, check_dtype=False)
+
+def test_parquet_writer_skips_empty_first_piece(df_pred, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'hits.parquet'
+    # With --min-consensus the first chunk can have no hits
+    with OutputWriter(str(path), 'parquet') as writer:
+        writer.write(select_hits(df_pred.iloc[:2], min_consensus=3))
+        writer.write(df_pred.iloc[2:])
+    assert writer.n_rows == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(path), df_pred.iloc[2:].reset_index(drop=True),
+                                  check_dtype=False)
+
+def test_parquet_writer_all_empty(df_pred, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'hits.parquet'
+    with OutputWriter(str(path), 'parquet') as writer:
+        writer.write(df_pred.iloc[:0])
+    assert len(pd.read_parquet(path)) == 0
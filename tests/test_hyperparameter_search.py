@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, ParameterSampler, StratifiedKFold
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+
+from core import hyperparameter_search
+from core.train_models import predict_with_proba
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.standard_normal((240, 4)), columns=[f'f{i}' for i in range(4)])
+    y = pd.Series(((X['f0'] + X['f1'] > 0) ^ (rng.random(len(X)) < 0.02)).astype(int))
+    return X, y
+
+def _search(X, y, models_params, **options):
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=0)
+    return hyperparameter_search.search(models_params, X, y, cv, **options)
+
+def _candidates():
+    # C=1e-6 and 2e-6 predict (nearly) one class: after its first fold it cannot catch up any more
+    return {'LR': (LogisticRegression(), {'C': [1.0, 1e-6, 0.1, 2e-6]})}
+
+def _grid():
+    return {'DT': (DecisionTreeClassifier(random_state=0), {'max_depth': [1, 2, 4, 8], 'min_samples_split': [2, 10]}),
+            'NB': (GaussianNB(), {'var_smoothing': [1e-2, 1e-9]})}
+
+def test_grid_matches_grid_search_cv(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _grid())
+    for name, (model, params) in _grid().items():
+        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=0)
+        expected = GridSearchCV(model, params, cv=cv, scoring='accuracy').fit(X, y)
+        assert models[name].get_params() == expected.best_estimator_.get_params()
+        assert scores[name] == pytest.approx(expected.best_score_)
+        assert timings[name]['fits'] == 5 * len(expected.cv_results_['params'])
+    assert list(models['DT'].feature_names_in_) == list(X.columns)
+
+def test_parallel_matches_inline(data):
+    X, y = data
+    models, scores, _ = _search(X, y, _grid())
+    parallel_models, parallel_scores, _ = _search(X, y, _grid(), n_jobs=2)
+    assert parallel_scores == scores
+    for name in models:
+        np.testing.assert_array_equal(parallel_models[name].predict_proba(X), models[name].predict_proba(X))
+
+def test_random_samples_candidates(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _grid(), strategy='random', n_iter=3)
+    sampled = list(ParameterSampler(_grid()['DT'][1], n_iter=3, random_state=42))
+    assert timings['DT']['candidates'] == 3 and timings['DT']['fits'] == 15
+    assert {key: models['DT'].get_params()[key] for key in sampled[0]} in sampled
+    # Fewer combinations than n_iter: the whole grid
+    assert timings['NB']['candidates'] == 2
+
+def test_halving_fits_fewer_rows(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _grid(), strategy='halving')
+    # 8 candidates in three rounds: 8, then 3, then 1 on all training rows
+    assert timings['DT']['fits'] == 5 * (8 + 3 + 1)
+    assert 0.5 < scores['DT'] <= 1.0
+
+def test_rejects_unknown_strategy(data):
+    with pytest.raises(ValueError, match="Unknown search strategy 'bayes'"):
+        _search(*data, _grid(), strategy='bayes')
+
+def test_early_stop_selects_the_same_candidate(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _candidates())
+    stopped_models, stopped_scores, stopped_timings = _search(X, y, _candidates(), early_stop=True)
+    assert stopped_models['LR'].get_params() == models['LR'].get_params()
+    assert stopped_scores == scores
+    assert stopped_timings['LR']['stopped_early'] == 2
+    assert stopped_timings['LR']['fits'] < timings['LR']['fits'] == 20
+
+def test_max_fits_budget(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _candidates(), max_fits=12)
+    # Whole candidates only: the first two (10 fits) fit in the budget, a third would not
+    assert timings['LR']['fits'] == 10
+    assert timings['LR']['stopped_by_budget']
+    assert models['LR'].get_params()['C'] == 1.0
+
+def test_time_budget_runs_the_first_candidate(data):
+    X, y = data
+    models, scores, timings = _search(X, y, _candidates(), time_budget=0.0)
+    assert timings['LR']['fits'] == 5 and timings['LR']['stopped_by_budget']
+    assert models['LR'].get_params()['C'] == 1.0
+
+@pytest.mark.parametrize('model', [LogisticRegression(), GaussianNB(), DecisionTreeClassifier(random_state=0)],
+                         ids=['LR', 'NB', 'DT'])
+def test_predict_with_proba_matches_sklearn(data, model):
+    X, y = data
+    model.fit(X, y)
+    y_pred, y_prob = predict_with_proba(model, X)
+    np.testing.assert_array_equal(y_pred, model.predict(X))
+    np.testing.assert_array_equal(y_prob, model.predict_proba(X)[:, 1])
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import ingest
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example_files')
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_datawarrior_matches_untyped_read(engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    path = os.path.join(EXAMPLES, 'decoys_datawarrior.txt')
+    df = ingest.read_datawarrior(path, engine=engine)
+    expected = pd.read_csv(path, sep='\t')
+    expected = expected.drop(columns=['Structure of smiles [idcode]', 'smiles']
+                             + [col for col in expected.columns if col.startswith('Unnamed:')])
+    assert list(df.columns) == list(expected.columns)
+    assert (df.drop(columns='name').dtypes == np.float32).all()
+    np.testing.assert_array_equal(df.drop(columns='name'), expected.drop(columns='name').astype(np.float32))
+    assert df['name'].tolist() == [name.replace('Resultados/', '').replace('.pdb', '').strip().upper()
+                                   for name in expected['name']]
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_gold_matches_untyped_read(engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    path = os.path.join(EXAMPLES, 'active_consolidated.csv')
+    df = ingest.read_gold(path, np.float64, engine=engine)
+    expected = pd.read_csv(path).drop(columns=['Index', 'Rescore.Rmsd', 'Version'])
+    assert df.columns[0] == 'name' and list(df.columns[1:]) == list(expected.columns[1:])
+    np.testing.assert_array_equal(df.drop(columns='name'), expected.drop(columns='Entry').astype(np.float64))
+    assert df['name'].iloc[0] == expected['Entry'].iloc[0].split('|')[1].replace('.pdb', '').upper()
+
+def test_text_in_a_descriptor_becomes_nan(tmp_path):
+    path = tmp_path / 'actives_datawarrior.txt'
+    path.write_text('name\tcLogP\tcLogS\t\nA\t1.5\t-2\t\nB\tn/a\t-3\t\n')
+    df = ingest.read_datawarrior(str(path), engine='c')
+    assert df['cLogS'].tolist() == [-2.0, -3.0]
+    assert df['cLogP'].iloc[0] == 1.5 and np.isnan(df['cLogP'].iloc[1])
+    assert df['cLogP'].dtype == np.float32
+
+def test_missing_name_column(tmp_path):
+    path = tmp_path / 'decoys_consolidated.csv'
+    path.write_text('Name,PLP.Fitness\nA,1.0\n')
+    with pytest.raises(ValueError, match="has no 'Entry' column"):
+        ingest.read_gold(str(path))
@@ -0,0 +1,80 @@
+import json
+import pstats
+import time
+
+import pytest
+
+from core import instrumentation
+
+def _read_jsonl(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+def test_jsonl_spans_nest(tmp_path):
+    path = str(tmp_path / 'trace.jsonl')
+    tracer = instrumentation.Tracer(path, run_info={'command': 'create-model'})
+    with tracer.span('stage', 'stage') as outer:
+        with tracer.span('read_input', 'io', file='a.csv') as inner:
+            inner.set(rows=10)
+        tracer.record('cv_fit', time.time(), 0.25, 'fit', pid=1234, model='LR')
+        outer.set(columns=3)
+    tracer.close()
+    run, read_input, cv_fit, stage = _read_jsonl(path)
+    assert run['type'] == 'run' and run['command'] == 'create-model'
+    assert [read_input['name'], cv_fit['name'], stage['name']] == ['read_input', 'cv_fit', 'stage']
+    assert read_input['parent'] == cv_fit['parent'] == stage['id'] and stage['parent'] is None
+    assert read_input['attrs'] == {'file': 'a.csv', 'rows': 10}
+    assert cv_fit['pid'] == 1234 and cv_fit['duration_s'] == 0.25 and cv_fit['attrs'] == {'model': 'LR'}
+    assert stage['attrs'] == {'columns': 3} and stage['duration_s'] >= read_input['duration_s']
+    assert {record['run_id'] for record in (run, read_input, cv_fit, stage)} == {tracer.run_id}
+
+def test_failed_span_records_the_error(tmp_path):
+    path = str(tmp_path / 'trace.jsonl')
+    tracer = instrumentation.Tracer(path)
+    with pytest.raises(KeyError):
+        with tracer.span('predict'):
+            raise KeyError('f0')
+    tracer.close()
+    assert _read_jsonl(path)[-1]['attrs'] == {'error': 'KeyError'}
+
+def test_chrome_trace(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    tracer = instrumentation.Tracer(path, fmt='chrome')
+    with tracer.span('transform', 'transform', rows=5):
+        pass
+    tracer.close()
+    with open(path) as file:
+        trace = json.load(file)
+    (event,) = trace['traceEvents']
+    assert event['ph'] == 'X' and event['name'] == 'transform' and event['args']['rows'] == 5
+    assert trace['otherData']['run_id'] == tracer.run_id
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+    tracer = instrumentation.Tracer()
+    with tracer.span('stage', rows=1) as span:
+        span.set(columns=2)
+    tracer.record('cv_fit', time.time(), 0.1)
+    assert span.attrs == {'rows': 1, 'columns': 2}
+    with pytest.raises(ValueError, match="Unknown trace format 'xml'"):
+        instrumentation.Tracer(str(tmp_path / 'trace.xml'), fmt='xml')
+
+def test_configure_replaces_the_process_tracer(tmp_path):
+    first, second = str(tmp_path / 'first.jsonl'), str(tmp_path / 'second.jsonl')
+    try:
+        instrumentation.configure(first)
+        with instrumentation.span('one'):
+            pass
+        instrumentation.configure(second)
+        with instrumentation.span('two'):
+            pass
+    finally:
+        instrumentation.configure()
+    assert [record['name'] for record in _read_jsonl(first)[1:]] == ['one']
+    assert [record['name'] for record in _read_jsonl(second)[1:]] == ['two']
+    assert not instrumentation.get_tracer().enabled
+
+def test_profiled(tmp_path):
+    path = str(tmp_path / 'profiles' / 'run.prof')
+    with instrumentation.profiled(path):
+        sum(range(1000))
+    assert pstats.Stats(path).total_calls > 0
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (accuracy_score, cohen_kappa_score, matthews_corrcoef, precision_score, recall_score,
+                             roc_auc_score)
+
+from core import metrics
+
+@pytest.fixture(scope='module')
+def predictions():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 300)
+    # Coarse scores, so many of them are tied
+    y_prob = np.clip(np.round(0.3 * y_true + 0.7 * rng.random((3, 300)), 1), 0, 1)
+    return y_true, (y_prob > 0.5).astype(int), y_prob
+
+def test_rank_auc_matches_sklearn(predictions):
+    y_true, y_pred, y_prob = predictions
+    expected = [roc_auc_score(y_true, row) for row in y_prob]
+    np.testing.assert_allclose(metrics.roc_auc(y_true, y_prob), expected, rtol=1e-12)
+    assert np.isnan(metrics.roc_auc(np.ones(5), np.arange(5)))
+
+def test_binary_metrics_match_sklearn(predictions):
+    y_true, y_pred, y_prob = predictions
+    values = metrics.binary_metrics(y_true, y_pred, y_prob)
+    for i, row in enumerate(y_pred):
+        assert values['accuracy'][i] == accuracy_score(y_true, row)
+        assert values['recall'][i] == recall_score(y_true, row)
+        assert values['specificity'][i] == recall_score(y_true, row, pos_label=0)
+        assert values['precision'][i] == precision_score(y_true, row)
+        assert values['kappa'][i] == pytest.approx(cohen_kappa_score(y_true, row), abs=1e-12)
+        assert values['mcc'][i] == pytest.approx(matthews_corrcoef(y_true, row), abs=1e-12)
+
+def test_bootstrap_matches_per_resample_loop(predictions):
+    y_true, y_pred, y_prob = predictions
+    # Batches of 7 resamples draw the same rows as one draw per resample
+    intervals = metrics.bootstrap_intervals(y_true, y_pred, y_prob, n_boot=50, batch_size=7)
+    rng = np.random.default_rng(42)
+    aucs, accuracies = [], []
+    for start in range(0, 50, 7):
+        for rows in rng.integers(0, len(y_true), size=(min(7, 50 - start), len(y_true))):
+            aucs.append([roc_auc_score(y_true[rows], row[rows]) for row in y_prob])
+            accuracies.append([accuracy_score(y_true[rows], row[rows]) for row in y_pred])
+    np.testing.assert_allclose(intervals['auc'], np.quantile(aucs, [0.025, 0.975], axis=0), rtol=1e-12)
+    np.testing.assert_allclose(intervals['accuracy'], np.quantile(accuracies, [0.025, 0.975], axis=0))
+
+def test_metrics_table_interleaves_splits(predictions):
+    y_true, y_pred, y_prob = predictions
+    table = metrics.metrics_table(['A', 'B', 'C'], [('Treinamento', y_true, y_pred, y_prob),
+                                                    ('Teste', y_true, y_pred, y_prob)], n_boot=20)
+    assert table['Modelo'].tolist() == ['A', 'A', 'B', 'B', 'C', 'C']
+    assert table['Banco'].tolist() == ['Treinamento', 'Teste'] * 3
+    assert (table['AUC ROC IC inf'] <= table['AUC ROC IC sup']).all()
+    assert table['Acurácia'].iloc[0] == round(100 * accuracy_score(y_true, y_pred[0]), 2)
@@ -0,0 +1,60 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from core import model_bundle, predict_compounds
+
+@pytest.fixture(scope='module')
+def models():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((100, 4)), columns=[f'f{i}' for i in range(4)])
+    y = (X['f0'] > 0.5).astype(int)
+    return {'LR': LogisticRegression().fit(X, y), 'DT': DecisionTreeClassifier(random_state=0).fit(X, y)}
+
+def _pickle(path, obj):
+    with open(path, 'wb') as file:
+        pickle.dump(obj, file)
+
+def test_mixed_directory_prefers_unprefixed_pickles(tmp_path, models):
+    # The shipped models next to a create-model bundle
+    _pickle(tmp_path / 'LR_best_model.pkl', models['LR'])
+    _pickle(tmp_path / 'minmax_scaler_interest.pkl', object())
+    model_bundle.save_bundle(str(tmp_path), 'run', models, ['f0', 'f1', 'f2', 'f3'])
+    with pytest.warns(UserWarning, match='using unprefixed legacy pickles, not bundle run'):
+        loaded_models = predict_compounds.load_models(str(tmp_path))
+    assert list(loaded_models) == ['LR_best_model.pkl']
+
+def test_mixed_directory_uses_newest_set(tmp_path, models):
+    _pickle(tmp_path / 'old_LR_model.pkl', models['LR'])
+    os.utime(tmp_path / 'old_LR_model.pkl', (0, 0))
+    model_bundle.save_bundle(str(tmp_path), 'new', models, ['f0', 'f1', 'f2', 'f3'])
+    with pytest.warns(UserWarning, match=r'using bundle new, not legacy old_\*_model.pkl'):
+        loaded_models = predict_compounds.load_models(str(tmp_path))
+    assert list(loaded_models) == ['new_LR', 'new_DT']
+
+def test_single_set_loads_without_warning(tmp_path, models, recwarn):
+    model_bundle.save_bundle(str(tmp_path), 'run', models, ['f0', 'f1', 'f2', 'f3'])
+    assert list(predict_compounds.load_models(str(tmp_path))) == ['run_LR', 'run_DT']
+    assert not [w for w in recwarn if issubclass(w.category, UserWarning)]
+
+def test_checksum_verified_on_load(tmp_path, models):
+    path = model_bundle.save_bundle(str(tmp_path), 'run', models, ['f0', 'f1', 'f2', 'f3'])
+    with open(os.path.join(path, 'model_DT.joblib'), 'ab') as file:
+        file.write(b'\0')
+    bundle = model_bundle.open_bundle(str(tmp_path), 'run')
+    bundle.load_model('LR')
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        bundle.load_model('DT')
+
+def test_save_replaces_previous_bundle(tmp_path, models):
+    model_bundle.save_bundle(str(tmp_path), 'run', models, ['f0', 'f1', 'f2', 'f3'], artifacts={'extra': [1, 2]})
+    path = model_bundle.save_bundle(str(tmp_path), 'run', {'LR': models['LR']}, ['f0', 'f1', 'f2', 'f3'])
+    assert sorted(os.listdir(path)) == ['manifest.json', 'model_LR.joblib']
+    assert os.listdir(tmp_path) == ['run.bundle']
+    bundle = model_bundle.open_bundle(str(tmp_path), 'run')
+    assert bundle.model_names == ['LR'] and not bundle.has_artifact('extra')
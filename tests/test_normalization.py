@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from core import normalization
+
+@pytest.fixture(scope='module')
+def df_var_final():
+    rng = np.random.default_rng(0)
+    latent = rng.standard_normal((300, 5))
+    values = latent @ rng.standard_normal((5, 40)) + 0.8 * rng.standard_normal((300, 40))
+    values[:, 7] = 2.0  # constant
+    df = pd.DataFrame(values, columns=[f'd{i}' for i in range(40)])
+    df.insert(0, 'name', [f'C{i}' for i in range(len(df))])
+    df['atividade'] = rng.integers(0, 2, len(df))
+    return df
+
+def _naive_drop(df, cutoff):
+    # The original lower-triangle loop over the pandas correlation matrix
+    corr = df.corr().abs()
+    return [col for i, col in enumerate(corr.columns) if (corr.iloc[i, :i] > cutoff).any()]
+
+@pytest.mark.parametrize('block_size', [None, 7, 40])
+def test_correlated_columns_match_naive_loop(df_var_final, block_size):
+    features = df_var_final.drop(columns=['name', 'atividade'])
+    drop = normalization.correlated_columns(features.to_numpy(), 0.5, block_size=block_size)
+    assert list(features.columns[drop]) == _naive_drop(features, 0.5)
+    assert 0 < drop.sum() < len(drop) - 1 and not drop[7]
+
+def test_float32_correlation_agrees_away_from_the_cutoff(df_var_final):
+    features = df_var_final.drop(columns=['name', 'atividade'])
+    corr = features.corr().abs().fillna(0).to_numpy()
+    features = features.to_numpy()
+    exact = normalization.correlated_columns(features, 0.5)
+    single = normalization.correlated_columns(features, 0.5, dtype=np.float32)
+    # Columns whose largest earlier correlation is close to the cutoff may flip
+    margin = np.array([np.abs(corr[i, :i] - 0.5).min() if i else 1.0 for i in range(len(corr))])
+    np.testing.assert_array_equal(single[margin > 1e-5], exact[margin > 1e-5])
+
+def test_process(df_var_final):
+    df_reduced, scaler = normalization.process(df_var_final)
+    features = df_var_final.drop(columns=['name', 'atividade'])
+    kept = [col for col in features.columns if col not in _naive_drop(features, 0.5)]
+    assert list(df_reduced.columns) == kept + ['atividade']
+    expected = MinMaxScaler().fit_transform(features)
+    np.testing.assert_array_equal(df_reduced[kept].to_numpy(), expected[:, [features.columns.get_loc(c) for c in kept]])
+    assert df_reduced['atividade'].tolist() == df_var_final['atividade'].tolist()
+    assert list(scaler.feature_names_in_) == list(features.columns)
+    # The caller's frame is not modified
+    assert 'name' in df_var_final.columns
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import normalization, pipeline, pre_treatment, prepare_files, train_models
+from core.stage_cache import StageCache
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example_files')
+INPUTS = [os.path.join(EXAMPLES, name) for name in
+          ['actives_datawarrior.txt', 'decoys_datawarrior.txt', 'active_consolidated.csv', 'decoys_consolidated.csv']]
+
+@pytest.fixture
+def trained(monkeypatch):
+    # Stop at the training stage: record what it receives
+    received = []
+
+    def process(df_reduced, **options):
+        received.append(df_reduced)
+        return {}, pd.DataFrame(), {}
+
+    monkeypatch.setattr(train_models, 'process', process)
+    return received
+
+def _run(**options):
+    return pipeline.run(*INPUTS, log=lambda message: None, **options)
+
+def test_in_memory_stages_match_csv_round_trips(trained, tmp_path):
+    result = _run()
+    # The stages as separate scripts, each reading the CSV the previous one wrote
+    prepare_files.process(*INPUTS).to_csv(tmp_path / 'df_final.csv', index=False)
+    pre_treatment.process(str(tmp_path / 'df_final.csv')).to_csv(tmp_path / 'df_var_final.csv', index=False)
+    expected, scaler = normalization.process(str(tmp_path / 'df_var_final.csv'))
+    got = trained[0]
+    assert list(got.columns) == list(expected.columns)
+    np.testing.assert_allclose(got.drop(columns='atividade'), expected.drop(columns='atividade'), atol=1e-6)
+    assert got['atividade'].tolist() == expected['atividade'].tolist()
+    assert result['transform'].output_columns_ == [col for col in got.columns if col != 'atividade']
+    assert [stage['stage'] for stage in result['report'].stages] == pipeline.STAGES + ['train_models']
+
+def test_cached_rerun_skips_preprocessing(trained, tmp_path):
+    cache = StageCache(str(tmp_path / 'cache'))
+    _run(cache=cache, keep_intermediates=str(tmp_path / 'intermediates'))
+    assert sorted(os.path.splitext(name)[0] for name in os.listdir(tmp_path / 'intermediates')) == \
+        ['df_final', 'df_reduced', 'df_var_final']
+    result = _run(cache=cache)
+    assert [stage.get('cached', False) for stage in result['report'].stages] == [True, True, True, False]
+    pd.testing.assert_frame_equal(trained[1], trained[0])
+    # Another cutoff reuses the first two stages only
+    result = _run(cache=cache, corr_cutoff=0.6)
+    assert [stage.get('cached', False) for stage in result['report'].stages] == [True, True, False, False]
+
+def test_saved_splits_round_trip(tmp_path):
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    columns = ['a', 'b']
+    splits = {'X_train': pd.DataFrame(rng.random((6, 2)), columns=columns),
+              'X_test': pd.DataFrame(rng.random((2, 2)), columns=columns),
+              'y_train': np.array([0, 1, 0, 1, 1, 1]), 'y_test': np.array([0, 1]),
+              'train_real': np.array([True] * 4 + [False] * 2)}
+    for folder in ['models', 'metrics', 'data']:
+        os.makedirs(tmp_path / folder)
+    result = {'models': {'LR': LogisticRegression().fit(splits['X_train'], splits['y_train'])},
+              'metrics': pd.DataFrame(), 'data_splits': splits, 'scaler': None, 'transform': None}
+    pipeline.save_outputs(result, 'run', str(tmp_path))
+    path = str(tmp_path / 'data' / 'run_train_test_data.npz')
+    loaded = pipeline.load_data_splits(path, columns)
+    for name in ['X_train', 'X_test']:
+        pd.testing.assert_frame_equal(loaded[name], splits[name])
+    for name in ['y_train', 'y_test', 'train_real']:
+        np.testing.assert_array_equal(loaded[name], splits[name])
+    # Splits saved before train_real was recorded
+    del splits['train_real']
+    np.savez(path, **splits)
+    assert pipeline.load_data_splits(path, columns)['train_real'] is None
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+
+from core import predict_compounds
+
+@pytest.fixture(scope='module')
+def models():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.standard_normal((300, 5)), columns=[f'f{i}' for i in range(5)])
+    y = (X['f0'] + X['f1'] + 0.5 * rng.standard_normal(len(X)) > 0.5).astype(int)
+    return {'LR': LogisticRegression().fit(X, y), 'NB': GaussianNB().fit(X, y),
+            'RF': RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y),
+            'DT': DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y)}
+
+@pytest.fixture(scope='module')
+def input_file(tmp_path_factory):
+    rng = np.random.default_rng(1)
+    # 1000 rows: chunks of 128 leave a final piece of 104 rows
+    df = pd.DataFrame(rng.standard_normal((1000, 5)), columns=[f'f{i}' for i in range(5)])
+    df.insert(0, 'NAME', [f'Z{i}' for i in range(len(df))])
+    path = tmp_path_factory.mktemp('predict') / 'library.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+@pytest.mark.parametrize('chunk_size', [100, 256, 5000])
+def test_streaming_matches_in_memory(models, input_file, tmp_path, chunk_size):
+    expected = predict_compounds.process_with_models(input_file, models)
+    output_path = str(tmp_path / 'out.csv')
+    n_rows = predict_compounds.stream_with_models(input_file, output_path, chunk_size, models)
+    assert n_rows == 1000
+    got = pd.read_csv(output_path, keep_default_na=False)
+    expected.to_csv(tmp_path / 'expected.csv', index=False)
+    pd.testing.assert_frame_equal(got, pd.read_csv(tmp_path / 'expected.csv', keep_default_na=False))
+
+def test_streaming_top_k_matches_in_memory(models, input_file, tmp_path):
+    options = {'weights': {'RF': 2.0}, 'top_k': 25, 'min_consensus': 2}
+    expected = predict_compounds.process_with_models(input_file, models, **options)
+    output_path = str(tmp_path / 'top.csv')
+    predict_compounds.stream_with_models(input_file, output_path, 128, models, **options)
+    got = pd.read_csv(output_path, keep_default_na=False)
+    assert got['NAME'].tolist() == expected['NAME'].tolist()
+    assert len(got) == 25 and (got['consensus'] >= 2).all()
+
+def test_missing_feature_column(models, tmp_path):
+    path = tmp_path / 'partial.csv'
+    pd.DataFrame({'NAME': ['A'], 'f0': [0.0]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="Required column 'f1' not found"):
+        predict_compounds.process_with_models(str(path), models)
+
+@pytest.mark.parametrize('min_consensus', [1, 3, 4])
+def test_cascade_matches_full_scoring(models, input_file, min_consensus, capsys):
+    expected = predict_compounds.process_with_models(input_file, models, min_consensus=min_consensus)
+    got = predict_compounds.process_with_models(input_file, models, min_consensus=min_consensus, cascade=True)
+    pd.testing.assert_frame_equal(got, expected)
+    assert 'Cascade:' in capsys.readouterr().out
+
+def test_cascade_skips_rows_that_cannot_reach_min_consensus(models, input_file):
+    X = pd.read_csv(input_file).drop(columns='NAME')
+    stats = predict_compounds._cascade_start(True, 4)
+    rows, probabilities = predict_compounds._cascade_proba(X, models, stats, model_thresholds={'DT': 0.4})
+    full = predict_compounds._predict_proba(X, models, list(models))
+    votes = sum(p > t for p, t in zip(full, [0.5, 0.5, 0.5, 0.4]))
+    np.testing.assert_array_equal(rows, np.flatnonzero(votes >= 4))
+    for p, f in zip(probabilities, full):
+        np.testing.assert_array_equal(p, f[rows])
+    # RF only scores the rows where LR, NB and DT all voted active
+    cheap_votes = sum(p > t for p, t in zip([full[0], full[1], full[3]], [0.5, 0.5, 0.4]))
+    assert stats['scored'] == {'LR': 1000, 'NB': 1000, 'DT': 1000, 'RF': int((cheap_votes == 3).sum())}
+    assert stats['hits'] == len(rows)
+
+def test_cascade_needs_min_consensus(models, input_file):
+    with pytest.raises(ValueError, match='Cascade scoring needs min_consensus'):
+        predict_compounds.process_with_models(input_file, models, cascade=True)
+
+def test_cascade_model_classes(models):
+    from sklearn.svm import SVC
+
+    from core import calibration
+
+    X = pd.DataFrame(np.eye(5), columns=[f'f{i}' for i in range(5)])
+    svc = SVC().fit(np.vstack([X, -X]), [1] * 5 + [0] * 5)
+    calibrated = calibration.calibrate(svc, svc.decision_function(np.vstack([X, -X])), [1] * 5 + [0] * 5)
+    assert predict_compounds._model_class(calibrated) == 'SVC'
+    # An ensemble's 'estimator' is its unfitted base tree, not a wrapped model
+    assert predict_compounds._model_class(models['RF']) == 'RandomForestClassifier'
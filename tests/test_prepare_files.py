@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import ingest, prepare_files
+
+@pytest.fixture
+def frames():
+    df_left = pd.DataFrame({'name': ['C', 'A', 'D', 'B'], 'mw': [3.0, 1.0, 4.0, 2.0]})
+    df_right = pd.DataFrame({'name': ['A', 'B', 'C', 'E', 'A'], 'score': [10.0, 20.0, 30.0, 50.0, 99.0]})
+    return df_left, df_right
+
+def test_inner_join_keeps_left_order(frames):
+    joined, report = prepare_files.join_on_name(*frames)
+    assert joined['name'].tolist() == ['C', 'A', 'B']
+    assert joined['score'].tolist() == [30.0, 10.0, 20.0]
+    assert report['matched'].tolist() == [True] * 3
+    assert report['unmatched_left'] == ['D']
+    assert report['unmatched_right'] == ['E']
+    assert report['duplicate_right'] == ['A']
+
+def test_left_join_fills_missing_scores(frames):
+    joined, report = prepare_files.join_on_name(*frames, how='left')
+    assert joined['name'].tolist() == ['C', 'A', 'D', 'B']
+    assert joined['mw'].tolist() == [3.0, 1.0, 4.0, 2.0]
+    assert joined['score'].tolist() == [30.0, 10.0, 0.0, 20.0]
+    assert report['matched'].tolist() == [True, True, False, True]
+
+def test_join_rejects_other_how(frames):
+    with pytest.raises(ValueError, match="how must be 'inner' or 'left'"):
+        prepare_files.join_on_name(*frames, how='outer')
+
+def test_normalize_names():
+    names = pd.Series(['Resultados/loc_1.pdb ', 'LOC_2', None], dtype='category')
+    assert ingest.normalize_names(names).tolist()[:2] == ['LOC_1', 'LOC_2']
+    assert pd.isna(ingest.normalize_names(names).iloc[2])
+    entries = pd.Series(['0|LocE_1_rank1.pdb|1', '1|Resultados/x.pdb|2'])
+    assert ingest.normalize_names(entries, entry_field=1).tolist() == ['LOCE_1_RANK1', 'X']
+
+def _write_exports(tmp_path, actives, decoys, gold_actives, gold_decoys):
+    paths = []
+    for kind, names in [('actives', actives), ('decoys', decoys)]:
+        path = tmp_path / f'{kind}_datawarrior.txt'
+        rows = ''.join(f'C\tC\t{name}.pdb\t{i + 1.5}\t\n' for i, name in enumerate(names))
+        path.write_text('Structure of smiles [idcode]\tsmiles\tname\tcLogP\t\n' + rows)
+        paths.append(str(path))
+    for kind, names in [('active', gold_actives), ('decoys', gold_decoys)]:
+        path = tmp_path / f'{kind}_consolidated.csv'
+        rows = ''.join(f'{i}|{name}.pdb|1,{i},{-10.0 * (i + 1)},0.0,2024.1.0\n' for i, name in enumerate(names))
+        path.write_text('Entry,Index,PLP.Fitness,Rescore.Rmsd,Version\n' + rows)
+        paths.append(str(path))
+    return paths
+
+def test_process_joins_exports(tmp_path, capsys):
+    paths = _write_exports(tmp_path, ['a1', 'a2'], ['d1', 'd2', 'd3'], ['a2', 'a1'], ['d3', 'd1'])
+    df = prepare_files.process(*paths)
+    assert df.columns.tolist() == ['name', 'cLogP', 'PLP.Fitness', 'atividade']
+    assert df['name'].tolist() == ['A1', 'A2', 'D1', 'D3']
+    assert df['atividade'].tolist() == [1, 1, 0, 0]
+    assert df['PLP.Fitness'].tolist() == [-20.0, -10.0, -20.0, -10.0]
+    assert df['cLogP'].dtype == np.float32
+    assert '1 DataWarrior compounds without GOLD scores: D2' in capsys.readouterr().out
+    df_left = prepare_files.process(*paths, how='left')
+    assert df_left['name'].tolist() == ['A1', 'A2', 'D1', 'D2', 'D3']
+    assert df_left['PLP.Fitness'].tolist() == [-20.0, -10.0, -20.0, 0.0, -10.0]
+
+def test_process_rejects_activity_conflicts(tmp_path):
+    # d1 is a decoy in DataWarrior but an active in GOLD
+    paths = _write_exports(tmp_path, ['a1'], ['d1', 'd2'], ['a1', 'd1'], ['d2'])
+    with pytest.raises(ValueError, match=r"1 compounds are active in one export and decoy in the other.*'D1'"):
+        prepare_files.process(*paths)
+    # Unmatched compounds of a left join cannot conflict
+    paths = _write_exports(tmp_path, ['a1'], ['d1', 'd2'], ['a1'], ['d2'])
+    assert prepare_files.process(*paths, how='left')['atividade'].tolist() == [1, 0, 0]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import resampling
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.standard_normal((400, 6)), columns=[f'f{i}' for i in range(6)])
+    y = pd.Series(np.where(rng.random(len(X)) < 0.15, 1, 0), name='atividade')
+    return X, y
+
+def test_smote_matches_imblearn(data):
+    imblearn = pytest.importorskip('imblearn.over_sampling')
+    X, y = data
+    expected_X, expected_y = imblearn.SMOTE(random_state=42).fit_resample(X, y)
+    got_X, got_y = resampling.smote(X, y, chunk_size=100)
+    pd.testing.assert_frame_equal(got_X, expected_X)
+    pd.testing.assert_series_equal(got_y, expected_y)
+
+def test_smote_balances_in_chunks(data):
+    X, y = data
+    got_X, got_y = resampling.smote(X, y, chunk_size=7)
+    counts = got_y.value_counts()
+    assert counts[0] == counts[1] == (y == 0).sum()
+    # The original rows come first, unchanged
+    pd.testing.assert_frame_equal(got_X.iloc[:len(X)], X)
+    same_X, _ = resampling.smote(X, y, chunk_size=10000)
+    pd.testing.assert_frame_equal(got_X, same_X)
+    float32_X, _ = resampling.smote(X, y, dtype=np.float32)
+    assert (float32_X.dtypes == np.float32).all()
+
+def test_approximate_neighbors_recall():
+    rng = np.random.default_rng(1)
+    X = rng.standard_normal((3000, 8))
+    exact = resampling.exact_neighbors(X, 5)
+    approximate = resampling.approximate_neighbors(X, 5)
+    assert approximate.shape == exact.shape
+    assert not (approximate == np.arange(len(X))[:, None]).any()
+    recall = np.mean([len(set(a) & set(e)) / 5 for a, e in zip(approximate, exact)])
+    assert recall > 0.9
+
+def test_undersample(data):
+    X, y = data
+    got_X, got_y = resampling.undersample(X, y)
+    assert (got_y == 0).sum() == (got_y == 1).sum() == (y == 1).sum()
+    assert len(got_X) == len(got_y)
+    assert set(map(tuple, got_X.to_numpy())) <= set(map(tuple, X.to_numpy()))
+
+def test_unknown_strategy(data):
+    with pytest.raises(ValueError, match='Unknown resampling strategy'):
+        resampling.resample(*data, strategy='adasyn')
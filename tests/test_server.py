@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from core import model_bundle, predict_compounds, server
+
+FEATURES = ['f0', 'f1', 'f2']
+
+@pytest.fixture(scope='module')
+def models():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((200, 3)), columns=FEATURES)
+    y = (X['f0'] > 0.5).astype(int)
+    return {'LR': LogisticRegression().fit(X, y), 'DT': DecisionTreeClassifier(random_state=0).fit(X, y)}
+
+@pytest.fixture(scope='module')
+def url(models, tmp_path_factory):
+    models_dir = str(tmp_path_factory.mktemp('models'))
+    model_bundle.save_bundle(models_dir, 'toy', models, FEATURES)
+    # A long wait, so concurrent requests end up in the same micro-batch
+    httpd, batcher = server.make_server(models_dir, port=0, max_wait_ms=200)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    batcher.close()
+
+def post(url, body):
+    request = urllib.request.Request(url + '/predict', data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def rows(n, offset=0):
+    rng = np.random.default_rng(offset)
+    return [dict(zip(FEATURES, values), NAME=f'C{offset + i}') for i, values in enumerate(rng.random((n, 3)).tolist())]
+
+def test_predict_matches_local_scoring(url, models):
+    status, body = post(url, {'prefix': 'toy', 'rows': rows(5)})
+    assert status == 200
+    expected = predict_compounds._score_frame(pd.DataFrame(rows(5)), models)
+    got = pd.DataFrame(body['data'], columns=body['columns'])
+    np.testing.assert_allclose(got['ativd_pred_LR'], expected['ativd_pred_LR'])
+    assert list(got['consensus']) == list(expected['consensus'])
+
+def test_bad_request_does_not_fail_its_batch(url):
+    bad_dtype = rows(3, 100)
+    bad_dtype[1]['f2'] = 'not a number'
+    missing_column = [{k: v for k, v in row.items() if k != 'f1'} for row in rows(3, 200)]
+    bodies = [{'prefix': 'toy', 'rows': rows(4, 300)}, {'prefix': 'toy', 'rows': bad_dtype},
+              {'prefix': 'toy', 'rows': missing_column}, {'prefix': 'toy', 'rows': rows(2, 400)}]
+    with ThreadPoolExecutor(len(bodies)) as pool:
+        results = list(pool.map(lambda body: post(url, body), bodies))
+    assert [status for status, _ in results] == [200, 400, 400, 200]
+    assert "'f1'" in results[2][1]['error']
+    assert [len(body['data']) for status, body in results if status == 200] == [4, 2]
+    assert [row[0] for row in results[3][1]['data']] == ['C400', 'C401']
+
+@pytest.mark.parametrize('field, value', [
+    ('models', 'LR'),
+    ('models', ['LR', 3]),
+    ('weights', ['LR']),
+    ('model_thresholds', {'LR': 'high'}),
+])
+def test_mistyped_fields_are_rejected(url, field, value):
+    status, body = post(url, {'prefix': 'toy', 'rows': rows(2), field: value})
+    assert status == 400
+    assert field in body['error']
+
+def test_unknown_prefix(url):
+    status, body = post(url, {'prefix': 'missing', 'rows': rows(2)})
+    assert status == 400
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from core.predict_compounds import ShardedScorer, _predict_proba
+
+@pytest.fixture(scope='module')
+def models():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((300, 5)), columns=[f'f{i}' for i in range(5)])
+    y = (X['f0'] + X['f1'] > 1).astype(int)
+    return {'LR': LogisticRegression().fit(X, y), 'DT': DecisionTreeClassifier(random_state=0).fit(X, y)}, X
+
+def test_sharded_matches_single_process(models):
+    loaded_models, X = models
+    expected = _predict_proba(X, loaded_models, ['LR', 'DT'])
+    with ShardedScorer(loaded_models, 2) as scorer:
+        # 300 rows leave a short last block, which is merged into the one before it
+        got = scorer.predict_proba(X, ['LR', 'DT'])
+    for e, g in zip(expected, got):
+        np.testing.assert_array_equal(e, g)
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_empty_input(models, workers):
+    loaded_models, X = models
+    if workers is None:
+        got = _predict_proba(X.iloc[:0], loaded_models, ['LR', 'DT'])
+    else:
+        with ShardedScorer(loaded_models, workers) as scorer:
+            got = scorer.predict_proba(X.iloc[:0], ['LR', 'DT'])
+    assert [len(p) for p in got] == [0, 0]
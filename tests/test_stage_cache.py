@@ -0,0 +1,89 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import ingest, stage_cache
+from core.stage_cache import StageCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return StageCache(str(tmp_path / 'cache'))
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'name': ['A', 'B', 'C'], 'x': np.arange(3, dtype=np.float32)})
+
+def test_put_get_roundtrip(cache, frame):
+    key = cache.key('stage', stage_cache, ['input'], {'cutoff': 0.5})
+    assert cache.get(key) is None
+    cache.put(key, 'stage', frame, {'scaler': {'min': [0.0]}})
+    hit_frame, artifacts = cache.get(key)
+    pd.testing.assert_frame_equal(hit_frame, frame)
+    assert artifacts == {'scaler': {'min': [0.0]}}
+    assert [entry['stage'] for entry in cache.entries()] == ['stage']
+
+def test_key_changes_with_params_and_inputs(cache):
+    key = cache.key('stage', stage_cache, ['input'], {'cutoff': 0.5})
+    assert cache.key('stage', stage_cache, ['input'], {'cutoff': 0.5}) == key
+    assert cache.key('stage', stage_cache, ['input'], {'cutoff': 0.6}) != key
+    assert cache.key('stage', stage_cache, ['other'], {'cutoff': 0.5}) != key
+    assert cache.key('other_stage', stage_cache, ['input'], {'cutoff': 0.5}) != key
+    assert cache.key('stage', [stage_cache, ingest], ['input'], {'cutoff': 0.5}) != key
+
+def test_file_digest_follows_content(cache, tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_text('one')
+    digest = cache.file_digest(str(path))
+    assert cache.file_digest(str(path)) == digest
+    path.write_text('two')
+    os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)
+    assert cache.file_digest(str(path)) != digest
+
+def test_ingest_hits_until_the_file_changes(cache, tmp_path, monkeypatch):
+    path = tmp_path / 'actives_datawarrior.txt'
+    path.write_text('name\tcLogP\t\nA.pdb\t1.5\t\nB.pdb\t2.5\t\n')
+    reads = []
+    read_typed = ingest._read_typed
+
+    def counting(*args):
+        reads.append(args[0])
+        return read_typed(*args)
+
+    monkeypatch.setattr(ingest, '_read_typed', counting)
+    first = ingest.read_datawarrior(str(path), cache=cache)
+    second = ingest.read_datawarrior(str(path), cache=cache)
+    assert len(reads) == 1
+    pd.testing.assert_frame_equal(second, first)
+    # Another dtype is another entry
+    ingest.read_datawarrior(str(path), np.float64, cache=cache)
+    assert len(reads) == 2
+    path.write_text('name\tcLogP\t\nA.pdb\t9.5\t\n')
+    os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)
+    assert ingest.read_datawarrior(str(path), cache=cache)['cLogP'].tolist() == [9.5]
+    assert len(reads) == 3
+
+def test_evicts_least_recently_used(cache, frame):
+    keys = [cache.key('stage', stage_cache, [str(i)]) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'stage', frame)
+        meta_path = os.path.join(cache.cache_dir, key, stage_cache.META_NAME)
+        os.utime(meta_path, (1000 + i, 1000 + i))
+    # Reading the oldest entry makes it the most recently used
+    cache.get(keys[0])
+    entries = cache.entries()
+    assert [entry['key'] for entry in entries] == [keys[1], keys[2], keys[0]]
+    cache.max_bytes = entries[1]['bytes'] + entries[2]['bytes']
+    assert cache.evict() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.clear() == 2 and cache.entries() == []
+
+def test_unreadable_entry_is_a_miss(cache, frame):
+    key = cache.key('stage', stage_cache, ['input'])
+    cache.put(key, 'stage', frame)
+    with open(os.path.join(cache.cache_dir, key, stage_cache.META_NAME), 'w') as file:
+        file.write('{')
+    assert cache.get(key) is None
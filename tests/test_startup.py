@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.startup import HEAVY_MODULES, run_command
+
+# Light commands must not import the ML stack (see cli.py's lazy imports);
+# their wall time budget is checked by python -m benchmarks.startup
+@pytest.mark.parametrize('command', [
+    ['--help'],
+    ['predict', '--help'],
+    ['create-model', '--help'],
+    ['list-models', '--model-dir', '{tmp}'],
+])
+def test_light_commands_do_not_import_ml_stack(command, tmp_path):
+    command = [arg.format(tmp=tmp_path) for arg in command]
+    _, heavy = run_command(command)
+    assert not set(heavy) & set(HEAVY_MODULES + ('?',)), f"cli.py {' '.join(command)} imported {', '.join(heavy)}"
@@ -0,0 +1,46 @@
+import argparse
+import filecmp
+
+import pandas as pd
+import pytest
+
+from benchmarks import correlation_pruning, pipeline_stages, synthetic
+from core import normalization, pre_treatment, prepare_files
+
+@pytest.fixture(scope='module')
+def paths(tmp_path_factory):
+    return synthetic.generate(str(tmp_path_factory.mktemp('synthetic')), n_rows=400, n_descriptors=60,
+                              active_fraction=0.1, seed=3)
+
+def test_generated_files_go_through_prepare_files(paths):
+    df = prepare_files.process(**paths)
+    assert len(df) == 400 and (df['atividade'] == 1).sum() == 40
+    # name, 9 DataWarrior and 51 GOLD descriptors, atividade
+    assert df.shape[1] == 1 + 60 + 1
+    assert df['name'].iloc[0] == 'LOCE_1_RANK1' and df['name'].iloc[-1] == 'LOCE_ZINC000000000360_RANK1'
+    gold = pd.read_csv(paths['decoys_cons_path'])
+    # GOLD rows are shuffled, so the join has to match names
+    assert gold['Entry'].iloc[0] != '0|LocE_ZINC000000000001_rank1.pdb|1'
+
+def test_generated_files_exercise_the_filters(paths):
+    df_var_final = pre_treatment.process(prepare_files.process(**paths))
+    n_kept = df_var_final.shape[1] - 2
+    assert 0 < n_kept < 60
+    df_reduced, _ = normalization.process(df_var_final)
+    assert 1 < df_reduced.shape[1] - 1 < n_kept
+
+def test_same_seed_same_files(paths, tmp_path):
+    again = synthetic.generate(str(tmp_path), n_rows=400, n_descriptors=60, active_fraction=0.1, seed=3)
+    for key, path in paths.items():
+        assert filecmp.cmp(path, again[key], shallow=False)
+
+def test_legacy_correlation_loop_matches():
+    data = correlation_pruning.synthetic_descriptors(300, 50)
+    df = pd.DataFrame(data, columns=[f'c{i}' for i in range(50)])
+    drop = normalization.correlated_columns(data, 0.5)
+    assert set(df.columns[drop]) == correlation_pruning.legacy_correlated_columns(df, 0.5)
+
+def test_parse_size():
+    assert pipeline_stages.parse_size('2000x200') == (2000, 200)
+    with pytest.raises(argparse.ArgumentTypeError, match='expected ROWSxDESCRIPTORS'):
+        pipeline_stages.parse_size('2000')
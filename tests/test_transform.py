@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import normalization, pipeline, pre_treatment
+from core.transform import PreprocessingTransform
+
+@pytest.fixture(scope='module')
+def df_final():
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    latent = rng.standard_normal((n_rows, 4))
+    values = latent @ rng.standard_normal((4, 30)) + 0.5 * rng.standard_normal((n_rows, 30))
+    values[:, :5] *= rng.random((n_rows, 5)) < 0.3  # zero-inflated
+    values[:, 5] = 1.0                               # constant
+    df = pd.DataFrame(values.astype(np.float32), columns=[f'd{i}' for i in range(30)])
+    df.insert(0, 'name', [f'C{i}' for i in range(n_rows)])
+    df['atividade'] = rng.integers(0, 2, n_rows)
+    return df
+
+def test_stream_preprocessing_matches_stages(df_final):
+    expected, scaler = normalization.process(pre_treatment.process(df_final))
+    df_reduced, transform = pipeline.stream_preprocessing(df_final, chunk_rows=64)
+    pd.testing.assert_frame_equal(df_reduced, expected)
+    np.testing.assert_array_equal(transform.scaler_.scale_, scaler.scale_)
+    np.testing.assert_array_equal(transform.scaler_.min_, scaler.min_)
+
+def test_partial_fit_finalizes_lazily(df_final):
+    transform = PreprocessingTransform()
+    for start in range(0, len(df_final), 100):
+        transform.partial_fit(df_final.iloc[start:start + 100])
+    assert not hasattr(transform, 'output_columns_')
+    # transform finalizes on first use
+    chunked = transform.transform(df_final)
+    fitted = PreprocessingTransform().fit(df_final)
+    assert transform.output_columns_ == fitted.output_columns_
+    pd.testing.assert_frame_equal(chunked, fitted.transform(df_final))
+
+def test_partial_fit_rejects_other_columns(df_final):
+    transform = PreprocessingTransform().partial_fit(df_final.iloc[:100])
+    with pytest.raises(ValueError):
+        transform.partial_fit(df_final.iloc[100:200].drop(columns=['d3']))
+
+def test_reader_stats_match_in_memory(df_final, tmp_path):
+    path = tmp_path / 'df_final.csv'
+    df_final.to_csv(path, index=False)
+    columns = [col for col in df_final.columns if col not in ('name', 'atividade')]
+    in_memory = pre_treatment.column_stats([df_final], columns)
+    chunks = pre_treatment.read_chunks(path, chunk_size=64, usecols=columns, descriptor_dtype=np.float32)
+    streamed = pre_treatment.column_stats(chunks, columns)
+    assert streamed.count == in_memory.count
+    np.testing.assert_array_equal(streamed.zero_count, in_memory.zero_count)
+    np.testing.assert_array_equal(streamed.min, in_memory.min)
+    np.testing.assert_array_equal(streamed.max, in_memory.max)
+    np.testing.assert_allclose(streamed.mean, in_memory.mean, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(streamed.variance(), in_memory.variance(), rtol=1e-10)
+    pd.testing.assert_frame_equal(pre_treatment.process(str(path), chunk_size=64),
+                                  pre_treatment.process(pd.read_csv(path)))
+
+def test_stream_preprocessing_from_csv(df_final, tmp_path):
+    path = tmp_path / 'df_final.csv'
+    df_final.to_csv(path, index=False)
+    expected, expected_transform = pipeline.stream_preprocessing(df_final)
+    df_reduced, transform = pipeline.stream_preprocessing(str(path), chunk_rows=64, descriptor_dtype=np.float32)
+    pd.testing.assert_frame_equal(df_reduced, expected)
+    assert transform.output_columns_ == expected_transform.output_columns_
+    np.testing.assert_array_equal(transform.scaler_.scale_, expected_transform.scaler_.scale_)
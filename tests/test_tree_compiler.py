@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from core import tree_compiler
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((600, 8))
+    # Coarse values put rows exactly on thresholds; the rest are not representable in float32
+    values[:, :3] = np.round(values[:, :3], 1)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    X = pd.DataFrame(values, columns=[f'f{i}' for i in range(8)])
+    y = ((np.nan_to_num(values[:, 0]) + np.nan_to_num(values[:, 3]) * values[:, 4] > 0.2)
+         ^ (rng.random(len(values)) < 0.1)).astype(int)
+    return X, y
+
+def _fit(name, X, y):
+    if name == 'DT':
+        return DecisionTreeClassifier(random_state=0).fit(X, y)
+    if name == 'RF':
+        return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    xgboost = pytest.importorskip('xgboost')
+    return xgboost.XGBClassifier(n_estimators=30, max_depth=5, random_state=0).fit(X, y)
+
+@pytest.mark.parametrize('name', ['DT', 'RF', 'XGB'])
+def test_walk_matches_original(data, name):
+    X, y = data
+    model = _fit(name, X, y)
+    compiled = tree_compiler.compile_model(model)
+    assert isinstance(compiled, tree_compiler.CompiledTrees)
+    expected = model.predict_proba(X)
+    got = compiled.walk_proba(X)
+    assert got.dtype == expected.dtype
+    np.testing.assert_array_equal(got, expected)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    # Columns in another order are selected by name
+    np.testing.assert_array_equal(compiled.walk_proba(X[X.columns[::-1]]), expected)
+    assert compiled.walk_proba(X.iloc[:0]).shape == (0, 2)
+
+def test_large_inputs_use_original(data, monkeypatch):
+    X, y = data
+    compiled = tree_compiler.compile_model(_fit('RF', X, y))
+
+    def walk_proba(X):
+        raise AssertionError("walked a large input")
+
+    monkeypatch.setattr(compiled, 'walk_proba', walk_proba)
+    monkeypatch.setitem(tree_compiler.MAX_WALK_STEPS, 'average', 0)
+    np.testing.assert_array_equal(compiled.predict_proba(X), compiled.original.predict_proba(X))
+
+def test_compile_models_keeps_other_models(data):
+    X, y = data
+    filled = X.fillna(0)
+    loaded_models = {'LR': LogisticRegression().fit(filled, y), 'DT': _fit('DT', filled, y)}
+    compiled = tree_compiler.compile_models(loaded_models, log=lambda message: None)
+    assert list(compiled) == ['LR', 'DT']
+    assert compiled['LR'] is loaded_models['LR']
+    assert isinstance(compiled['DT'], tree_compiler.CompiledTrees)
+
+def test_check_parity(data):
+    X, y = data
+    model = _fit('RF', X, y)
+    result = tree_compiler.check_parity(model, tree_compiler.compile_model(model), X)
+    assert result['ok'] and result['identical'] == len(X) and result['max_abs_diff'] == 0.0
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+
+from core import resampling, update_models
+from core.transform import PreprocessingTransform
+
+def _compounds(rng, n_rows, start=0):
+    values = rng.standard_normal((n_rows, 6)).astype(np.float32)
+    df = pd.DataFrame(values, columns=[f'd{i}' for i in range(6)])
+    df.insert(0, 'name', [f'C{i}' for i in range(start, start + n_rows)])
+    df['atividade'] = (values[:, 0] + 0.5 * rng.standard_normal(n_rows) > 1.0).astype(int)
+    return df
+
+@pytest.fixture(scope='module')
+def stored():
+    rng = np.random.default_rng(0)
+    df_old = _compounds(rng, 300)
+    transform = PreprocessingTransform(corr_cutoff=0.99).fit(df_old)
+    X = transform.transform(df_old)
+    X_resampled, y_resampled = resampling.smote(X, df_old['atividade'])
+    # As train_models splits it: the synthetic rows are shuffled into both splits
+    real = np.arange(len(X_resampled)) < len(X)
+    X_train, X_test, y_train, y_test, train_real, _ = train_test_split(
+        X_resampled, y_resampled.to_numpy(), real, test_size=0.2, random_state=42)
+    splits = {'X_train': X_train.reset_index(drop=True), 'X_test': X_test.reset_index(drop=True),
+              'y_train': y_train, 'y_test': y_test, 'train_real': train_real}
+    return transform, splits, _compounds(rng, 80, start=300)
+
+def _models(splits):
+    X, y = splits['X_train'], splits['y_train']
+    return {'NB': GaussianNB().fit(X, y), 'LR': LogisticRegression().fit(X, y),
+            'DT': DecisionTreeClassifier(max_depth=3, random_state=0).fit(X, y)}
+
+def test_smote_update_resamples_real_rows_only(stored, monkeypatch):
+    transform, splits, df_new = stored
+    calls = []
+    original = resampling.smote
+
+    def smote(X, y, **options):
+        calls.append(len(X))
+        return original(X, y, **options)
+
+    monkeypatch.setattr(update_models.resampling, 'smote', smote)
+    models, metrics_df, new_splits, comparison = update_models.process(
+        _models(splits), transform, splits, df_new, log=lambda message: None)
+
+    n_stored, n_real = len(splits['X_train']), int(splits['train_real'].sum())
+    assert calls == [n_real + len(df_new)]
+    # The stored rows stay a prefix, followed by the new rows and the synthetic ones
+    pd.testing.assert_frame_equal(new_splits['X_train'].iloc[:n_stored], splits['X_train'])
+    X_new = transform.transform(df_new)
+    np.testing.assert_array_equal(new_splits['X_train'].iloc[n_stored:n_stored + len(df_new)], X_new)
+    real = new_splits['train_real']
+    assert real[:n_stored].tolist() == splits['train_real'].tolist()
+    assert real[n_stored:n_stored + len(df_new)].all() and not real[n_stored + len(df_new):].any()
+    assert np.bincount(new_splits['y_train']).tolist() == [len(real) // 2] * 2
+    pd.testing.assert_frame_equal(new_splits['X_test'], splits['X_test'])
+
+def test_models_before_and_after(stored):
+    transform, splits, df_new = stored
+    models = _models(splits)
+    before = {name: (model.predict(splits['X_test']) == splits['y_test']).mean() for name, model in models.items()}
+    updated, metrics_df, new_splits, comparison = update_models.process(
+        models, transform, splits, df_new, log=lambda message: None)
+    assert comparison['model'].tolist() == ['NB', 'LR', 'DT']
+    assert comparison['update'].tolist() == ['partial_fit', 'warm start', 'refit']
+    np.testing.assert_allclose(comparison['Acurácia before'], [100 * before[name] for name in ['NB', 'LR', 'DT']],
+                               atol=0.01)
+    after = [(updated[name].predict(splits['X_test']) == splits['y_test']).mean() for name in ['NB', 'LR', 'DT']]
+    np.testing.assert_allclose(comparison['Acurácia after'], 100 * np.array(after), atol=0.01)
+    # partial_fit gives the class means of a refit on all rows, and nearly its variances
+    refit = GaussianNB().fit(new_splits['X_train'], new_splits['y_train'])
+    np.testing.assert_allclose(updated['NB'].theta_, refit.theta_, rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(updated['NB'].var_, refit.var_, rtol=1e-2)
+
+def test_none_adds_new_rows_only(stored):
+    transform, splits, df_new = stored
+    _, _, new_splits, _ = update_models.process(
+        _models(splits), transform, splits, df_new, resampling_strategy='none', log=lambda message: None)
+    assert len(new_splits['X_train']) == len(splits['X_train']) + len(df_new)
+    assert new_splits['train_real'][len(splits['X_train']):].all()
+
+def test_splits_without_real_mask_warn(stored):
+    transform, splits, df_new = stored
+    splits = dict(splits, train_real=None)
+    with pytest.warns(UserWarning, match='all of them are treated as real'):
+        _, _, new_splits, _ = update_models.process(
+            _models(splits), transform, splits, df_new, resampling_strategy='none', log=lambda message: None)
+    assert new_splits['train_real'].all()
+
+def test_rejects_undersampling(stored):
+    transform, splits, df_new = stored
+    with pytest.raises(ValueError, match='Unknown update resampling strategy'):
+        update_models.process(_models(splits), transform, splits, df_new, resampling_strategy='undersample')